@@ -1,4 +1,4 @@
-from langchain.chat_models import init_chat_model
+from helpers.llm_gateway import chat_model
 
 class TaskSource:
     def get_task(self) -> str:
@@ -12,8 +12,19 @@ class ConsoleSource(TaskSource):
         return question
     
 class APISource(TaskSource):
+    """Pulls tasks submitted to the local HTTP TaskService (helpers/task_service.py).
+    `warm_apps` reports the worker's warm browser contexts so the scheduler can keep them hot."""
+    def __init__(self, service, worker_id=0, warm_apps=None):
+        self.service = service
+        self.worker_id = worker_id
+        self.warm_apps = warm_apps or (lambda: set())
+        self.current_job = None
+
     def get_task(self) -> str:
-        raise NotImplementedError("APISource will handle tasks coming from the web API in a future version.")
+        self.current_job = self.service.next_job(self.worker_id, self.warm_apps())
+        if self.current_job is None:
+            return None
+        return self.current_job.task
 
 class Command_AgentA:
     def __init__(
@@ -25,8 +36,8 @@ class Command_AgentA:
         self.name = name
         self.source = source
 
-        # Agent A's own LLM for rewriting/simplifying user input
-        self.llm = init_chat_model(model_name)
+        # Agent A's own LLM for rewriting/simplifying user input (created on first use)
+        self.model_name = model_name
 
         self.system_prompt = (
             """
@@ -40,6 +51,10 @@ class Command_AgentA:
             """
         )
 
+    @property
+    def llm(self):
+        return chat_model(self.model_name)
+
     def normalize_question(self, raw_question: str) -> str:
         """Use the LLM to rewrite the question."""
         response = self.llm.invoke([
@@ -1,80 +1,152 @@
-from playwright.sync_api import sync_playwright
 from helpers.webapp_info import detect_webapp_and_url
-from langchain.chat_models import init_chat_model
-import os, json, re
+from helpers.completion_rules import mark_alerts, quick_completion_verdict
+from helpers.stall_detector import StallDetector
+from helpers.app_stats import AppStats
+from helpers.action_model import ACTION_TYPES, Action, StepRecord, StepHistory, extract_json
+from helpers.element_ranker import build_query, scan_elements
+from helpers.menu_resolver import select_option
+from helpers.list_finder import find_in_list, scroll_container
+from helpers import warm_start
+from helpers.deep_links import DeepLinkIndex
+from helpers.diagnostics import DiagnosticsRecorder
+from helpers.tab_explorer import explore
+from helpers.prompt_templates import NEXT_ACTION_PROMPT, COMPLETION_PROMPT, PromptCacheStats
+from helpers.browser_pool import BrowserPool, PROFILES_ROOT, STORAGE_STATE_FILE
+from helpers.run_store import RunStore
+from helpers.login_wall import SessionExpired, detect_login_wall, is_profile_stale, mark_profile_stale, clear_profile_stale
+from helpers.llm_gateway import chat_model
+import json, re, time
 from pathlib import Path
 
 class Navigator_AgentB:
-    def __init__(self, name: str = "Agent B"):
+    def __init__(self, name: str = "Agent B", interactive: bool = True, pool: BrowserPool | None = None, store: RunStore | None = None, artifact_mode: str | None = None, explore_tabs: int = 0):
         self.name = name
-        self.llm = init_chat_model("openai:gpt-4o-mini")
-
-    def handle_question(self, question: str) -> None:
+        self.model_name = "openai:gpt-4o-mini"
+        # Interactive runs may stop and ask the user to log in; service workers fail fast instead
+        self.interactive = interactive
+        # (host, editor kind) pairs whose editors ignore Input.insertText and need real key events
+        self._key_event_editors = set()
+        # Passive CDP collector for the current page (None when unavailable)
+        self._events = None
+        # Progress callback for the current run (see TaskService)
+        self._on_event = None
+        # Warm browser contexts per app, reused across tasks
+        self.pool = pool or BrowserPool()
+        # SQLite index of runs + content-addressed screenshots (screenshots/runs.db)
+        self.store = store or RunStore()
+        # Provider prompt-cache hits across all LLM calls of this navigator
+        self.prompt_cache = PromptCacheStats()
+        # "full" screenshots every step, "failures" keeps states in memory and writes only on failure
+        self.artifact_mode = artifact_mode or self.pool.profile.get("artifacts", "full")
+        self.diagnostics = DiagnosticsRecorder(self.artifact_mode)
+        self._last_hints = None
+        # Open up to N candidate links in parallel tabs when the model is unsure which one to click (0 = off)
+        self.explore_tabs = explore_tabs
+
+    @property
+    def llm(self):
+        """Chat model, created on first use."""
+        return chat_model(self.model_name)
+
+    def warm_apps(self) -> set:
+        """Apps this navigator currently holds a warm browser context for."""
+        return self.pool.warm_apps()
+
+    def close(self):
+        """Close all browser contexts held by this navigator."""
+        self.pool.close()
+
+    def handle_question(self, question: str, app_info: dict | None = None, on_event=None) -> dict:
         """
         Run the browser, navigate, and capture UI states.
+        `app_info` skips app detection when the caller already knows it, and
+        `on_event` receives progress events (dicts) for every step.
+        Returns {"success": bool, "error": str, "steps": int, "folder": str}.
         """
         print(f"[INFO] {self.name} received task from Agent A")
+        self._on_event = on_event
+        self._trace_steps = []
+        self._settle_timeouts = []
+        self._run_id = None
+        self._prompt_mark = self.prompt_cache.mark()
 
         # Detect target app and URL
-        app_info = detect_webapp_and_url(question)
+        if app_info is None:
+            app_info = detect_webapp_and_url(question)
         app_name = app_info.get("app")
         app_url = app_info.get("url")
 
         if not app_name or app_name == "none":
             print(f"[ERROR] Could not determine target web application")
-            return
+            return self._result(False, "Could not determine target web application")
         else:
             print(f"[DETECTED] Web App: {app_name}")
 
         if not app_url or app_url == "none":
             print(f"[ERROR] Could not determine web app URL")
-            return
+            return self._result(False, "Could not determine web app URL")
         else:
             print(f"[DETECTED] URL: {app_url}\n")
-
-        # Prepare screenshot directories
-        screenshots_root = Path("screenshots")
-        app_folder = screenshots_root / app_name
-        app_folder.mkdir(parents=True, exist_ok=True)
+        self._app_url = app_url
 
         # Remove app name from question since it's already in the parent folder
         task_text = self._remove_app_name_from_question(question, app_name)
         base_slug = self._slug(task_text)
         if not base_slug:
             base_slug = "task"
-        # Ensure uniqueness if the same task asked multiple times
-        candidate = app_folder / base_slug
-        if candidate.exists():
-            i = 1
-            while (app_folder / f"{base_slug}_{i}").exists():
-                i += 1
-            candidate = app_folder / f"{base_slug}_{i}"
-        task_folder = candidate
-        task_folder.mkdir(parents=True, exist_ok=True)
+        # Register the run; the store picks a unique screenshots/<app>/<slug>[_n] folder
+        self._run_id, task_folder = self.store.new_run(app_name, base_slug, question)
+        screenshots_root = self.store.root
         self._snap_seq = 0
+
+        # Step budget, settle timeouts and prompt hints learned from past runs of this app
+        app_stats = AppStats.load(app_name, screenshots_root, store=self.store)
+        max_steps = app_stats.step_budget()
+        print(f"[INFO] Step budget for {app_name}: {max_steps} (from {len(app_stats.traces)} past runs)")
         
         # Initialize README.md for this task
         readme_path = self._init_readme(task_folder, question, app_name)
 
 
-        profiles_root = Path("browser_profiles")
-        app_profile_dir = profiles_root / app_name
+        app_profile_dir = PROFILES_ROOT / app_name
         app_profile_dir.mkdir(parents=True, exist_ok=True)
 
         login_flag = app_profile_dir / "logged_in.flag"
-
-        with sync_playwright() as p:
-            context = p.chromium.launch_persistent_context(
-                user_data_dir=str(app_profile_dir),
-                headless=False,
-                channel="chrome",  
-                slow_mo=200,                # helps stability for humans + UI
-            )
-            page = context.new_page()
-
+        # The manual first-login flow needs a human and a visible browser
+        can_prompt = self.interactive and not self.pool.profile["headless"]
+        if not login_flag.exists() and not can_prompt:
+            error = f"No saved login for {app_name}; run once with the interactive profile (python main.py) to log in"
+            print(f"[ERROR] {error}")
+            self._finalize_readme(readme_path, success=False, reasoning=error)
+            self._write_trace(task_folder, question, app_name, success=False, error=error)
+            return self._result(False, error, folder=task_folder)
+        if is_profile_stale(app_profile_dir) and not can_prompt:
+            error = f"Session for {app_name} is marked stale; log in again with the interactive profile"
+            print(f"[ERROR] {error}")
+            self._finalize_readme(readme_path, success=False, reasoning=error)
+            self._write_trace(task_folder, question, app_name, success=False, error=error)
+            return self._result(False, error, folder=task_folder, session_expired=True)
+        self._profile_dir = app_profile_dir
+        self._can_prompt = can_prompt
+
+        cold_start = app_name not in self.pool.warm_apps()
+        page, self._events = self.pool.new_page(app_name, app_profile_dir)
+        self._emit({"type": "context", "app": app_name, "cold_start": cold_start})
+
+        # First action of earlier runs of this kind of task, if any
+        template = warm_start.task_template(question, app_name)
+        warm = self.store.warm_start(app_name, template)
+        self._landing = None
+        self._warm_start = None
+
+        result = None
+        diag_folder = None
+        try:
+            self.diagnostics.begin(page, self._events)
             # Go to app URL
             page.goto(app_url, wait_until="domcontentloaded", timeout=60_000)
-            page.wait_for_timeout(1500)  # wait a bit for UI to settle
+            if warm is None or not warm_start.wait_for_target(page, warm["action"]):
+                page.wait_for_timeout(1500)  # wait a bit for UI to settle
 
             # First-time login for this app → manual
             if not login_flag.exists():
@@ -85,294 +157,334 @@ class Navigator_AgentB:
                 input()
 
                 # mark login done for this app
-                login_flag.write_text("ok")
+                self._mark_logged_in(page, app_profile_dir)
+
+            # Session may have expired since the flag was written
+            self._ensure_logged_in(page, app_name)
 
             # Logged in (either already or just now)
             self._snap(page, task_folder, "opened_app")
             opened_state = page.inner_text("body")[:1500]
+            self._landing = warm_start.landing_snapshot(page)
+            first_action = None
+            if warm is not None:
+                ok, reason = warm_start.validate(warm, self._landing)
+                if ok:
+                    first_action = Action.from_dict(warm["action"])
+                    print(f"[WARM] Reusing first step '{first_action.label}' ({reason}, {warm['hits']} earlier hits)")
+                else:
+                    print(f"[WARM] Cached first step not used: {reason}")
+                self._warm_start = ok
+            # Goal names an entity opened in an earlier run: go straight to its page
+            deep_links = DeepLinkIndex(self.store, app_name)
+            if first_action is None:
+                known = deep_links.match_goal(question, page.url)
+                if known:
+                    first_action = deep_links.goto(*known)
 
             # Execute goal loop: read page -> ask LLM for next action -> execute -> repeat
-            try:
-                self._execute_goal_loop(
-                    question,
-                    page,
-                    task_folder,
-                    app_name=app_name,
-                    max_steps=10,
-                    initial_last_after_state=opened_state,
-                    readme_path=readme_path,
-                )
-                self._finalize_readme(readme_path, success=True)
-                print("[SUCCESS] Task completed successfully\n")
-            except Exception as e:
-                self._finalize_readme(readme_path, success=False, reasoning=str(e))
-                print(f"[ERROR] Task failed: {e}\n")
-            finally:
-                context.close()
+            self._execute_goal_loop(
+                question,
+                page,
+                task_folder,
+                app_name=app_name,
+                max_steps=max_steps,
+                initial_last_after_state=opened_state,
+                readme_path=readme_path,
+                app_stats=app_stats,
+                first_action=first_action,
+                deep_links=deep_links,
+            )
+            self._finalize_readme(readme_path, success=True)
+            self._write_trace(task_folder, question, app_name, success=True)
+            self._update_warm_start(app_name, template, success=True, goal=question)
+            print("[SUCCESS] Task completed successfully\n")
+            result = self._result(True, folder=task_folder)
+        except SessionExpired as e:
+            diag_folder = self._capture_diagnostics(task_folder, str(e))
+            self._finalize_readme(readme_path, success=False, reasoning=str(e), diagnostics=diag_folder)
+            self._write_trace(task_folder, question, app_name, success=False, error=str(e))
+            print(f"[ERROR] {e}\n")
+            result = self._result(False, str(e), folder=task_folder, session_expired=True)
+        except Exception as e:
+            diag_folder = self._capture_diagnostics(task_folder, str(e))
+            self._finalize_readme(readme_path, success=False, reasoning=str(e), diagnostics=diag_folder)
+            self._write_trace(task_folder, question, app_name, success=False, error=str(e))
+            self._update_warm_start(app_name, template, success=False, goal=question)
+            print(f"[ERROR] Task failed: {e}\n")
+            result = self._result(False, str(e), folder=task_folder)
+        finally:
+            self.diagnostics.end()
+            # Keep the app's context warm for the next task; only the page goes away
+            self.pool.release(page, self._events)
+            self._events = None
+            if result is not None and result.get("session_expired"):
+                # A logged-out context is useless to later tasks, and its cookies must not be saved
+                self.pool.close(app_name, save_state=False)
+        return result
+
+    def _emit(self, event: dict):
+        """Send a progress event to the caller's callback, if any."""
+        if self._on_event is None:
+            return
+        try:
+            self._on_event(event)
+        except Exception:
+            pass
+
+    def _result(self, success: bool, error: str = "", folder: Path | None = None, session_expired: bool = False) -> dict:
+        result = {
+            "success": success,
+            "error": error,
+            "steps": len(getattr(self, "_trace_steps", [])),
+            "folder": str(folder) if folder else "",
+            "session_expired": session_expired,
+        }
+        self._emit({"type": "result", **result})
+        return result
 
     # ============================= helper methods =============================
 
+    def _ensure_logged_in(self, page, app_name: str):
+        """
+        Detect a login wall (expired session). Interactive runs hand off to the
+        user and continue; otherwise the profile is marked stale and the run fails fast.
+        """
+        reason = detect_login_wall(page, app_name)
+        profile_dir = getattr(self, "_profile_dir", None)
+        if reason is None:
+            if profile_dir is not None and getattr(self, "_can_prompt", False) and is_profile_stale(profile_dir):
+                # Someone logged in again (the interactive run got past the wall): let workers resume
+                self._mark_logged_in(page, profile_dir)
+                print(f"[INFO] {app_name} session is valid again; cleared the stale flag")
+            return
+        if profile_dir is not None:
+            mark_profile_stale(profile_dir, reason)
+        if not getattr(self, "_can_prompt", False):
+            raise SessionExpired(app_name, reason)
+
+        print(f"\n[ACTION REQUIRED] Your {app_name} session expired ({reason})")
+        print("  - Log in again in the opened browser")
+        print("  - Press Enter here when ready to continue\n")
+        self._emit({"type": "reauth_required", "app": app_name, "reason": reason})
+        input()
+        if profile_dir is not None:
+            self._mark_logged_in(page, profile_dir)
+        if detect_login_wall(page, app_name) is not None:
+            raise SessionExpired(app_name, "still on the login page after re-authentication")
+
+    def _mark_logged_in(self, page, profile_dir: Path):
+        """Record a fresh login: flag file, clear stale marker, refresh the cloneable state."""
+        (profile_dir / "logged_in.flag").write_text("ok")
+        clear_profile_stale(profile_dir)
+        state_path = profile_dir / STORAGE_STATE_FILE
+        if self.pool.mode == "shared":
+            # The login happened in a cloned context; save its state for the other clones
+            page.context.storage_state(path=str(state_path))
+        elif state_path.exists():
+            # Re-exported from the refreshed persistent profile on next use
+            state_path.unlink()
+
+    def _capture_diagnostics(self, task_folder: Path, reason: str, step: int | None = None) -> Path | None:
+        """Write the failure bundle (trace chunk, full screenshot, HAR, console, recent states)."""
+        try:
+            return self.diagnostics.capture(task_folder, reason, step=step, store=self.store, run_id=getattr(self, "_run_id", None))
+        except Exception as e:
+            print(f"[WARNING] Could not write diagnostics: {e}")
+            return None
+
     def _snap(self, page, outdir, label):
+        if self.artifact_mode != "full":
+            return  # the diagnostics ring buffer covers successful steps
         seq = getattr(self, "_snap_seq", 0) + 1
         self._snap_seq = seq
         filename = f"{seq:02d}_{label}.png"
-        path = os.path.join(outdir, filename)
-        page.screenshot(path=path, full_page=True)
+        # Identical frames (e.g. an unchanged page) share one blob in the run store
+        self.store.add_screenshot(getattr(self, "_run_id", None), seq, Path(outdir) / filename, page.screenshot(full_page=True))
+
+    def _update_warm_start(self, app_name: str, template: str, success: bool, goal: str = ""):
+        """Learn the first step from successful runs; drop a cached one that failed."""
+        steps = getattr(self, "_trace_steps", None)
+        if not steps or self._landing is None:
+            return
+        first = next(iter(steps)).to_dict()
+        try:
+            if self._warm_start and first.get("status") != "success":
+                print("[WARM] Cached first step failed; dropping it")
+                self.store.drop_warm_start(app_name, template)
+            elif self._warm_start and first.get("status") == "success":
+                self.store.warm_start_hit(app_name, template)
+            elif success and warm_start.cacheable(first, goal):
+                action = {"type": first["type"], "label": first.get("label", ""), "locator": first.get("locator") or {}}
+                # The run's values go along so a replay can check its target names none of them
+                landing = {**self._landing, "values": warm_start.goal_values(goal)}
+                self.store.save_warm_start(app_name, template, landing, action)
+        except Exception as e:
+            print(f"[WARNING] Could not update warm-start cache: {e}")
+
+    def _settle(self, page, timeout_ms: int, interval_ms: int = 150, quiet_intervals: int = 3) -> int:
+        """Wait until the page is quiet (or timeout), return elapsed ms.
+
+        Uses the CDP event buffer when attached, otherwise polls the DOM fingerprint
+        until it is unchanged for `quiet_intervals` polls in a row (one equal pair
+        would call a render that starts after a slow request settled).
+        """
+        if self._events is not None:
+            return self._events.wait_for_quiet(page, timeout_ms=timeout_ms)
+        start = time.perf_counter()
+        last = self._dom_fingerprint(page)
+        quiet = 0
+        while True:
+            page.wait_for_timeout(interval_ms)
+            elapsed = int((time.perf_counter() - start) * 1000)
+            current = self._dom_fingerprint(page)
+            quiet = quiet + 1 if current == last else 0
+            if quiet >= quiet_intervals or elapsed >= timeout_ms:
+                return elapsed
+            last = current
+
+    def _dom_fingerprint(self, page) -> str:
+        """Hash of URL, visible text, form values and element count (one round-trip)."""
+        try:
+            raw = page.evaluate(
+                """() => {
+                    const vals = Array.from(document.querySelectorAll('input, textarea, select'))
+                        .map(el => el.value || '').join('|');
+                    const body = document.body ? document.body.innerText.slice(0, 5000) : '';
+                    return [location.href, document.getElementsByTagName('*').length, vals, body].join('\\n');
+                }"""
+            )
+        except Exception:
+            raw = ""
+        return StallDetector.fingerprint(raw)
 
-    def _collect_dom_hints(self, page):
+    def _collect_dom_hints(self, page, query: dict | None = None):
         """Scan common editable elements, buttons, and success indicators, return structured hints.
+        With a `query` (helpers/element_ranker.build_query) inputs and buttons are ranked
+        against it and only the top ones are returned.
 
         Returns:
             {"inputs": [...], "buttons": [...], "alerts": [...]}
         """
-        hints = {"inputs": [], "buttons": [], "alerts": []}
         try:
-            # Scan for input/textarea/editable fields
-            elements = page.query_selector_all('input, textarea, [contenteditable="true"], [role="textbox"]')
-            for el in elements:
-                try:
-                    aria = (el.get_attribute("aria-label") or "").strip()
-                except Exception:
-                    aria = ""
-                try:
-                    name = (el.get_attribute("name") or "").strip()
-                except Exception:
-                    name = ""
-                try:
-                    id_ = (el.get_attribute("id") or "").strip()
-                except Exception:
-                    id_ = ""
-                try:
-                    placeholder = (el.get_attribute("placeholder") or "").strip()
-                except Exception:
-                    placeholder = ""
-                try:
-                    tag = el.evaluate("el => el.tagName.toLowerCase()")
-                except Exception:
-                    tag = ""
-                try:
-                    val = el.input_value()
-                except Exception:
-                    try:
-                        val = el.inner_text()
-                    except Exception:
-                        val = ""
-                val = (val or "").strip()
-
-                hints["inputs"].append({
-                    "aria-label": aria,
-                    "name": name,
-                    "id": id_,
-                    "placeholder": placeholder,
-                    "tag": tag,
-                    "value": val,
-                    "empty": not val,  # True if no value, False if has value
-                })
-
-            # Scan for buttons and clickable links (including table rows with links)
-            buttons = page.query_selector_all('button, [role="button"], a[onclick], input[type="button"], input[type="submit"], a[href], [role="link"]')
-            for btn in buttons:
-                try:
-                    btn_text = (btn.inner_text() or "").strip()
-                except Exception:
-                    btn_text = ""
-                try:
-                    btn_aria = (btn.get_attribute("aria-label") or "").strip()
-                except Exception:
-                    btn_aria = ""
-                try:
-                    btn_title = (btn.get_attribute("title") or "").strip()
-                except Exception:
-                    btn_title = ""
-                try:
-                    btn_id = (btn.get_attribute("id") or "").strip()
-                except Exception:
-                    btn_id = ""
-                try:
-                    btn_name = (btn.get_attribute("name") or "").strip()
-                except Exception:
-                    btn_name = ""
-                try:
-                    # Get the role to distinguish between different types
-                    btn_role = (btn.get_attribute("role") or btn.evaluate("el => el.tagName.toLowerCase()")).strip()
-                except Exception:
-                    btn_role = ""
-                try:
-                    btn_visible = btn.is_visible()
-                except Exception:
-                    btn_visible = False
-                
-                # Include buttons with text, aria-label, title, or if they're visible icon buttons
-                if (btn_text or btn_aria or btn_title) and btn_visible:
-                    btn_info = {
-                        "text": btn_text,
-                        "aria-label": btn_aria if not btn_text else "",                        
-                        "title": btn_title,
-                        "id": btn_id,
-                        "name": btn_name,
-                        "role": btn_role if btn_role in ["button", "link", "a"] else "button"
-                    }
-                    # Mark icon-only buttons
-                    if not btn_text and (btn_aria or btn_title):
-                        btn_info["type"] = "icon"
-                    hints["buttons"].append(btn_info)
-
-            # Scan for toast/alert/notification elements (success/error messages)
-            alerts = page.query_selector_all('[role="alert"], .toast, .notification, .message, [class*="toast"], [class*="alert"], [class*="message"], [class*="notification"]')
-            for alert in alerts:
-                try:
-                    alert_text = (alert.inner_text() or "").strip()
-                    if alert_text:  # Only include if has visible text
-                        hints["alerts"].append({
-                            "text": alert_text,
-                            "type": "alert/toast/notification"
-                        })
-                except Exception:
-                    pass
+            hints = scan_elements(page, query)
         except Exception:
-            pass
+            return {"inputs": [], "buttons": [], "alerts": []}
+        stats = hints.pop("stats", {})
+        if query is not None:
+            print(f"[INFO] Ranked {stats.get('buttons', 0)} buttons / {stats.get('inputs', 0)} inputs in {stats.get('rank_ms', 0):.2f} ms (scan {stats.get('scan_ms', 0):.0f} ms)")
         return hints
 
-    def _decide_next_action(self, goal, page, step_num: int, action_history: list = None, app_name: str = "unknown") -> dict:
-        """Ask the LLM to return the next single action (JSON dict) given the goal
-        and the current page state.
+    def _decide_next_action(self, goal, page, step_num: int, history: StepHistory | None = None, app_name: str = "unknown", recovery_note: str = "", app_hint: str = "") -> Action:
+        """Ask the LLM to return the next single action given the goal
+        and the current page state. Raises ValueError if the reply is not a valid action.
         """
-        if action_history is None:
-            action_history = []
 
         visible_text = page.inner_text("body")[:4000]
 
-        # Collect structured DOM hints (inputs, buttons, alerts)
-        hints = self._collect_dom_hints(page)
+        # Collect structured DOM hints (inputs, buttons, alerts), most relevant to the goal first
+        hints = self._collect_dom_hints(page, build_query(goal, history))
+        self._last_hints = hints
         
         inputs_json = json.dumps(hints.get("inputs", [])[:20], ensure_ascii=False)
         buttons_json = json.dumps(hints.get("buttons", [])[:15], ensure_ascii=False)
         alerts_json = json.dumps(hints.get("alerts", [])[:10], ensure_ascii=False)
         
-        # Format action history for the LLM
-        history_summary = ""
-        if action_history:
-            history_summary = "\n\nActions taken so far:\n"
-            for act in action_history[-5:]: 
-                loc = act.get("locator", {})
-                loc_str = loc.get("aria-label") or loc.get("placeholder") or loc.get("text") or loc.get("name") or "unknown"
-                text_str = f" with text '{act.get('text')}'" if act.get("text") else ""
-                status = act.get("status", "success")
-                status_marker = "✓" if status == "success" else "✗ FAILED"
-                history_summary += f"Step {act['step']}: {status_marker} {act['type']} on [{loc_str}]{text_str}\n"
-
-        # Add app-specific complexity warning
-        app_complexity_note = ""
-        if app_name.lower() == "asana":
-            app_complexity_note = "\n ASANA COMPLEXITY: Asana has a complex UI with nested menus, modal dialogs, and multi-step workflows. Expect to take more steps than usual. Be patient and verify each action completes before moving to the next.\n"
-
-        prompt = (
-            f"""
-            You are a browser automation agent with expert knowledge of modern web applications and their typical UI patterns.
-
-            Application: {app_name}
-            Goal: {goal}
-            Current Step: {step_num}{history_summary}
-
-            Current page text (truncated):
-            {visible_text}
-
-            Detected input hints (first 20, include aria-labels, placeholders, and current values): {inputs_json}
-            Detected buttons and links (first 15, available actions - includes links to items in lists/tables): {buttons_json}
-            Detected alerts/toasts (success/error messages): {alerts_json}{app_complexity_note}
-
-            IMPORTANT: Use your knowledge of how web apps typically work to make intelligent decisions:
-            - Understand which apps use explicit Create/Save buttons vs. auto-save behavior
-            - Recognize when a task is complete based on app-specific patterns (toasts, redirects, auto-save, list updates)
-            - Adapt your strategy based on the app you're automating
-            - After clicking a button that opens a dropdown/menu, the next action should typically be clicking an option from that menu (look for the specific value in the page text), NOT clicking another button or textbox.
-            - If you just clicked something and now see a dropdown menu with options, your next action MUST be clicking one of those options - completely ignore any search/filter textboxes and their placeholders that appear alongside the dropdown.
-            
-            CRITICAL - Read the current page first:
-            - Before deciding your action, carefully examine "Current page text" and "Detected buttons and links" to understand WHERE you are
-            - Goals often require multiple steps. Break them down: navigate → interact → confirm
-            - Don't assume you're already at the right place. If the goal requires opening an item, check if you need to navigate to a list first.
-            - Take one logical step at a time based on what's actually visible on the current page
-
-            Decide the NEXT SINGLE ACTION to take toward the goal. Return ONLY valid JSON with this schema:
-            {{{{
-              "type": "goto|click|fill|select|press|scroll|wait|done",
-              "label": "<short human label for logs>",
-              "locator": {{"role":"...","name":"...","aria-label":"...","placeholder":"...","text":"...","css":"..."}},
-              "text": "<for fill - use short unique values (12-16 chars) with random suffix",
-              "value": "<for select>",
-              "key": "<for press>",
-              "direction": "down|up",
-              "url": "<for goto>"
-            }}}}
-
-            Rules:
-            - Review "Actions taken so far" to see what you've already done. DO NOT repeat actions you've already completed.
-            - If a previous step shows "✗ FAILED", do NOT retry the same locator - try a different approach or different element.
-            - If you filled a field in a previous step, DO NOT fill it again. Move to the next action.
-            - When filling text inputs (project names, issue titles, labels, comments, etc.), generate SHORT UNIQUE values between 12-16 characters with a random suffix. This prevents duplicate name errors on repeated test runs.
-            - Use your app knowledge to determine the correct workflow (explicit save button vs. auto-save, etc.)
-            - NEVER return type: "done" just because fields are filled. Consider if the app requires an explicit action button click.
-            - Return type: "done" ONLY when goal is completed based on observable evidence appropriate for the app type.
-            - Locator preference: 1) role + VISIBLE TEXT (the label users see), 2) role + aria-label/name (accessible name), 3) placeholder (for empty inputs), 4) text, 5) css (last resort).
-            - To click table/list items, prefer using role: "link" with the item text rather than role: "row". Links are clickable, rows may not be.
-            - When selecting from dropdowns/menus: placeholders in filter/search boxes are just hints - ignore them and directly click the actual option you need from the visible list.
-            - CRITICAL RULE: Only suggest "fill" actions for inputs where "empty": true. Do NOT re-fill inputs that already have a value ("empty": false).
-            - ACTION PRIORITY: 1) Fill ONLY empty required fields that you haven't filled yet, 2) Click action buttons if needed by the app, 3) Wait and verify completion, 4) Return done when truly completed.
-            - When all required fields are filled (empty: false or already_filled: true), immediately look for and click relevant action buttons from the Detected buttons list.
-            - CRITICAL: Do NOT invent button names or aria-labels. ONLY use elements you can see in "Detected buttons and links" or "Current page text". If you can't find an exact button, look for visible text that represents the current state (e.g., the current status value might itself be clickable to change it).
-            - When you need to interact with something but can't find a dedicated button, examine the page text for the actual current value or label that might be interactive.
-            - If the goal mentions an action (e.g., "change", "update", "modify") but you can't find that exact word, look for synonyms or related terms in the detected buttons (e.g., "Set", "Edit", "Configure") or click the current value directly if it's interactive.
-            - When changing/updating a value (status, priority, assignee, etc.), select an option that is DIFFERENT from the current value. Don't click the same value that's already set.
-            - Output JSON only. No markdown. No commentary.
-            """
+        # Format action history for the LLM (cached until the next step is recorded)
+        history_summary = history.summary() if history is not None else ""
+        if recovery_note:
+            history_summary += f"\nWARNING: {recovery_note}\n"
+
+        # Static rules + app hints are a fixed, cacheable system prefix; the step state goes last
+        messages = NEXT_ACTION_PROMPT.compile(app_name, app_hint).messages(
+            goal=goal,
+            step_num=step_num,
+            history=history_summary,
+            page_text=visible_text,
+            inputs=inputs_json,
+            buttons=buttons_json,
+            alerts=alerts_json,
         )
-
-        resp = self.llm.invoke([{"role": "user", "content": prompt}])
-        text = resp.content.strip()
-
-        # Extract JSON: find the first { and parse from there
-        start_idx = text.find('{')
-        if start_idx == -1:
-            raise ValueError(f"LLM did not return JSON for next action: {text}")
-        
-        action = None
-        for end_idx in range(start_idx + 1, len(text) + 1):
-            try:
-                candidate = text[start_idx:end_idx]
-                action = json.loads(candidate)
-                break
-            except json.JSONDecodeError:
-                continue
-        
-        if action is None:
-            raise ValueError(f"Could not parse valid JSON from LLM response: {text}")
-
-        return action
-
-    def _execute_goal_loop(self, goal, page, outdir, app_name: str = "unknown", max_steps: int = 10, initial_last_after_state: str | None = None, readme_path: Path | None = None):
+        resp = self.llm.invoke(messages)
+        self.prompt_cache.record(resp)
+        return Action.parse(resp.content.strip())
+
+    def _explore_candidates(self, goal, page, action: Action, history: StepHistory, app_name: str) -> Action:
+        """Score the model's pick and its alternative links in parallel tabs; open the best one."""
+        names = [action.target()] + [c for c in action.candidates if c != action.target()]
+        start = time.perf_counter()
+        try:
+            results = explore(page, goal, app_name, names, build_query(goal, history), max_tabs=self.explore_tabs)
+        except Exception as e:
+            print(f"[EXPLORE] Skipped: {e}")
+            return action
+        if not results:
+            return action
+        elapsed = int((time.perf_counter() - start) * 1000)
+        for r in results:
+            print(f"[EXPLORE] {r['score']:>6.2f}  {r['name'][:40]}  {r.get('title') or r.get('reason', '')}")
+        best = results[0]
+        if best["name"] == names[0]:
+            print(f"[EXPLORE] Keeping '{best['name']}' ({len(results)} tabs, {elapsed} ms)")
+            return action
+        print(f"[EXPLORE] Switching to '{best['name']}' ({len(results)} tabs, {elapsed} ms)")
+        # Go straight to the URL the tab landed on: a click by name can hit another element with the same label
+        return Action(type="goto", label=f"open {best['name']}", url=best["url"],
+                      reasoning=f"best of {len(results)} explored candidates: {best.get('title') or best['url']}")
+
+    def _execute_goal_loop(self, goal, page, outdir, app_name: str = "unknown", max_steps: int = 10, initial_last_after_state: str | None = None, readme_path: Path | None = None, app_stats: AppStats | None = None, first_action: Action | None = None, deep_links: DeepLinkIndex | None = None):
         """
         Real-time loop: for up to `max_steps` iterations, ask the LLM for the next
         action given the current page, execute it, take screenshots, and repeat
-        until the LLM returns type == 'done'.
+        until the LLM returns type == 'done'. A validated warm-start `first_action`
+        replaces the LLM call for step 1; clicks on entities in `deep_links`
+        become a direct goto.
         """
+        if app_stats is None:
+            app_stats = AppStats(app_name, [])
+        app_hint = app_stats.prompt_hint()
         step_num = 1
-        action_history = []  # Track all actions taken so LLM can see what it already did
+        history = StepHistory()  # Track all actions taken so LLM can see what it already did
+        self._trace_steps = history
         # Track last after screenshot state to avoid redundant before screenshots
         last_after_state = initial_last_after_state
+        stall = StallDetector()
+        recovery_note = ""
         
         while step_num <= max_steps:
-            action = self._decide_next_action(goal, page, step_num, action_history, app_name)
-            print(f"[ACTION] Step {step_num}: {action}")
+            decide_start = time.perf_counter()
+            if first_action is not None:
+                action, first_action = first_action, None
+            else:
+                try:
+                    action = self._decide_next_action(goal, page, step_num, history, app_name, recovery_note=recovery_note, app_hint=app_hint)
+                except ValueError as e:
+                    # Invalid reply (unknown type, no JSON, bad locator): a failed step, not a failed run
+                    print(f"[WARNING] Step {step_num}: invalid action from LLM: {e}")
+                    record = StepRecord(step_num, "invalid", f"step_{step_num}", {}, "", "failed")
+                    record.decide_ms = int((time.perf_counter() - decide_start) * 1000)
+                    history.append(record)
+                    recovery_note = f"Your last reply was not a valid action ({str(e)[:200]}). Reply with ONE JSON object whose type is one of: {', '.join(ACTION_TYPES)}."
+                    step_num += 1
+                    continue
+                if deep_links is not None:
+                    action = deep_links.rewrite(action, page)
+                if self.explore_tabs > 1 and action.type == "click" and action.candidates:
+                    action = self._explore_candidates(goal, page, action, history, app_name)
+            decide_ms = int((time.perf_counter() - decide_start) * 1000)
+            recovery_note = ""
+            action_dict = action.as_dict()
+            print(f"[ACTION] Step {step_num}: {action_dict}")
 
             # If LLM says we're done, finish
-            if isinstance(action, dict) and action.get("type") == "done":
-                print(f"[COMPLETE] Goal reached at step {step_num}: {action.get('reasoning', '')}")
+            if action.type == "done":
+                print(f"[COMPLETE] Goal reached at step {step_num}: {action.reasoning}")
+                self._emit({"type": "step", "step": step_num, "action": {"type": "done", "status": "completed"}})
                 if readme_path:
-                    self._append_step_to_readme(readme_path, step_num, action, "completed")
+                    self._append_step_to_readme(readme_path, step_num, action_dict, "completed")
                 return
 
-            label = action.get("label") or f"step_{step_num}"
+            label = action.label or f"step_{step_num}"
 
             # exiBEFORE screenshot - only if different from last after state
             current_before_state = page.inner_text("body")[:1500]
@@ -380,132 +492,149 @@ class Navigator_AgentB:
                 self._snap(page, outdir, f"before_{self._slug(label)}")
             # else: skip before screenshot as it's identical to previous after
 
+            # Don't re-run an action that already failed on this exact page state
+            fp_before = self._dom_fingerprint(page)
+            if stall.is_known_failure(fp_before, action_dict):
+                print(f"[STALL] Step {step_num}: skipping repeat of an action that already failed here")
+                record = StepRecord.from_action(step_num, action, label, "failed")
+                record.decide_ms = decide_ms
+                history.append(record)
+                if readme_path:
+                    self._append_step_to_readme(readme_path, step_num, action_dict, "failed")
+                recovery_note = "The action you just proposed already FAILED on this exact page. Choose a DIFFERENT element or approach."
+                # Counts as a failed step on an unchanged page, so a model stuck on it escalates
+                strategy, reason = stall.record(fp_before, fp_before, action_dict, "failed")
+                if strategy:
+                    recovery_note = self._recover_from_stall(page, stall, strategy, reason, step_num)
+                step_num += 1
+                continue
+
             # Execute action
+            if action.type not in ("fill", "type"):
+                mark_alerts(page)   # toasts present now are not this action's result
+            url_before = page.url
+            events_mark = self._events.mark() if self._events is not None else None
             action_status = "success"
+            action_start = time.perf_counter()
             try:
-                self._do_action(action, page)
-                action_history.append({
-                    "step": step_num,
-                    "type": action.get("type"),
-                    "label": label,
-                    "locator": action.get("locator", {}),
-                    "text": action.get("text", ""),
-                    "status": "success"
-                })
+                self._do_action(action_dict, page)
             except Exception:
                 action_status = "failed"
-                action_history.append({
-                    "step": step_num,
-                    "type": action.get("type"),
-                    "label": label,
-                    "locator": action.get("locator", {}),
-                    "text": action.get("text", ""),
-                    "status": "failed"
-                })
+            record = StepRecord.from_action(step_num, action, label, action_status, int((time.perf_counter() - action_start) * 1000))
+            record.decide_ms = decide_ms
+            history.append(record)
             
             # Append step to README
             if readme_path:
-                self._append_step_to_readme(readme_path, step_num, action, action_status)
+                self._append_step_to_readme(readme_path, step_num, action_dict, action_status)
 
-            # Post-action settle (longer for clicks)
+            # Post-action settle: wait for the DOM to stop changing, bounded by the app's learned timeout
             try:
-                if action.get("type") == "click":
-                    page.wait_for_timeout(2000)
-                else:
-                    page.wait_for_timeout(900)
+                settle_timeout = app_stats.settle_timeout(action.type)
+                record.settle_ms = self._settle(page, settle_timeout)
+                if record.settle_ms >= settle_timeout:
+                    # Cut off, not settled: AppStats must not learn this as the settle time
+                    self._settle_timeouts.append(step_num)
             except Exception:
                 pass
+            # Fail fast (or hand off) if the step landed on a login wall
+            self._ensure_logged_in(page, app_name)
+            if deep_links is not None:
+                # After settling, so client-side navigations have updated the URL
+                deep_links.observe(action, action_status, url_before, page)
+
+            step_events = self._events.since(events_mark) if events_mark is not None else {}
+            if step_events:
+                record.events = step_events
+            self._emit({"type": "step", "step": step_num, "action": record.to_dict()})
 
             # AFTER screenshot - store state for next iteration
             self._snap(page, outdir, f"after_{self._slug(label)}")
             last_after_state = page.inner_text("body")[:1500]
+            fp_after = self._dom_fingerprint(page)
+            self.diagnostics.record(page, step_num, label, action_status, fp_after, self._last_hints)
+            if action_status == "failed":
+                self._capture_diagnostics(outdir, f"step {step_num} ({label}) failed", step=step_num)
 
             # Check if goal is completed after this action (clicks, enter presses, etc., not fills)
-            action_type = action.get("type", "")
-            action_label = action.get("label", "").lower()
+            action_type = action.type
+            action_label = action.label.lower()
             
             # Skip completion check for fill/type actions and early intermediate steps
             is_fill_action = action_type in ["fill", "type"]
-            is_intermediate_click = action_type == "click" and any(word in action_label for word in ["open", "expand", "show", "menu", "dropdown"]) and len(action_history) < 3
+            is_intermediate_click = action_type == "click" and any(word in action_label for word in ["open", "expand", "show", "menu", "dropdown"]) and len(history) < 3
             
             # Only check completion after meaningful actions (submit clicks, press Enter, etc.)
             if not is_fill_action and not is_intermediate_click and step_num >= 2:
-                if self._check_goal_completion(goal, page):
+                filled_values = history.filled_values()
+                if self._check_goal_completion(goal, page, app_name=app_name, url_before=url_before, filled_values=filled_values, failed_writes=step_events.get("failed_writes", 0)):
                     print(f"[COMPLETE] Goal completed after step {step_num}")
                     return
 
+            # Stall detection: same failing action or page not changing → recover or abort early
+            strategy, reason = stall.record(fp_before, fp_after, action_dict, action_status)
+            if strategy:
+                recovery_note = self._recover_from_stall(page, stall, strategy, reason, step_num)
+
             step_num += 1
 
         raise RuntimeError(f"Max steps ({max_steps}) reached without completing goal.")
 
-    def _check_goal_completion(self, goal, page) -> bool:
-        """Ask the LLM: 'Is the goal completed based on current page state?'
+    def _recover_from_stall(self, page, stall: StallDetector, strategy: str, reason: str, step_num: int) -> str:
+        """Apply the stall detector's strategy (scroll, reload, abort); returns the recovery note for the next prompt."""
+        print(f"[STALL] {reason} → {strategy}")
+        if strategy == "abort":
+            raise RuntimeError(f"Stalled at step {step_num}: {reason}. Last steps: {stall.diagnostic()}")
+        try:
+            if strategy == "scroll":
+                scroll_container(page)
+                page.wait_for_timeout(500)
+            elif strategy == "reload":
+                page.reload(wait_until="domcontentloaded", timeout=60_000)
+                page.wait_for_timeout(1500)
+        except Exception:
+            pass
+        return (
+            f"The agent is STUCK: {reason}. "
+            f"{'The page was scrolled. ' if strategy == 'scroll' else ''}"
+            f"{'The page was reloaded. ' if strategy == 'reload' else ''}"
+            "Do NOT repeat the previous actions - choose a DIFFERENT element or approach."
+        )
+
+    def _check_goal_completion(self, goal, page, app_name: str = "unknown", url_before: str | None = None, filled_values: list | None = None, failed_writes: int = 0) -> bool:
+        """Decide obvious cases locally (toasts, URL transitions, new list rows),
+        otherwise ask the LLM: 'Is the goal completed based on current page state?'
         Returns True if goal is done, False otherwise.
         """
-        visible_text = page.inner_text("body")[:3000]
         hints = self._collect_dom_hints(page)
-        alerts_json = json.dumps(hints.get("alerts", [])[:5], ensure_ascii=False)
-
-        prompt = (
-            f"""
-            You are verifying if a task goal has been completed.
-
-            Goal: {goal}
-
-            Current page text (truncated):
-            {visible_text}
-
-            Detected alerts/toasts (success/error messages): {alerts_json}
-
-            Question: Has the goal been COMPLETED based on observable evidence?
+        verdict, reason = quick_completion_verdict(
+            goal,
+            app_name,
+            hints.get("alerts", []),
+            url_before=url_before,
+            url_after=page.url,
+            clickables=hints.get("buttons", []),
+            filled_values=filled_values,
+            failed_writes=failed_writes,
+        )
+        if verdict is True:
+            print(f"[PASS] Goal completion verified locally: {reason}")
+            return True
+        if verdict is False:
+            print(f"[INFO] Goal not completed yet (local check): {reason}")
+            return False
 
-            Return ONLY a JSON object:
-            {{{{
-              "completed": true|false,
-              "reasoning": "<brief explanation of why completed or not>"
-            }}}}
+        visible_text = page.inner_text("body")[:3000]
+        alerts_json = json.dumps(hints.get("alerts", [])[:5], ensure_ascii=False)
 
-            Evidence for completion (be strict):
-            - Success toast/alert messages indicating the action was performed (check alerts list)
-            - NEW items appearing in lists (project created, page added, task saved)
-            - Page navigation to success/confirmation screens after performing an action
-            - Visible confirmation messages in page text stating something was changed/updated NOW (not in the past)
-            - Observable page content changes that directly result from the action you performed and align with the goal
-            - For comments/posts: the comment must appear in the comment thread/history area, NOT just in the input field
-            
-            NOT evidence of completion:
-            - Just opening an item or navigating to a page (you must perform the actual action)
-            - Seeing a value that already exists (for "change" goals, you must see evidence that YOU changed it)
-            - No alerts/toasts/confirmation when the goal requires explicit confirmation (create, save, delete actions)
-            - Opening a menu or dialog without selecting/completing an option inside it
-            - Seeing options in an open dropdown menu (the option must be selected and results must update)
-            - Text typed in an input field but not yet submitted (for comments/posts, must see it in the posted history area)
-            - Seeing your typed text in a text editor or input box without clicking Submit/Post/Save button
-
-            Important: Some actions (filter, sort, search) don't show toasts but DO update the page content with the required task. If the page state matches the goal's expected outcome after performing the action, consider it complete. BUT seeing an option in a menu is NOT completion - you must see the actual results.
-
-            Output JSON only. No markdown. No commentary.
-            """
-        )
+        messages = COMPLETION_PROMPT.compile(app_name).messages(goal=goal, page_text=visible_text, alerts=alerts_json)
 
         try:
-            resp = self.llm.invoke([{"role": "user", "content": prompt}])
+            resp = self.llm.invoke(messages)
+            self.prompt_cache.record(resp)
             text = resp.content.strip()
             
-            # Extract JSON
-            start_idx = text.find('{')
-            if start_idx == -1:
-                return False
-            
-            result = None
-            for end_idx in range(start_idx + 1, len(text) + 1):
-                try:
-                    candidate = text[start_idx:end_idx]
-                    result = json.loads(candidate)
-                    break
-                except json.JSONDecodeError:
-                    continue
-            
+            result = extract_json(text)
             if result and result.get("completed"):
                 print(f"[PASS] Goal completion verified: {result.get('reasoning', '')}")
                 return True
@@ -529,6 +658,32 @@ class Navigator_AgentB:
         txt = action.get("text") or action.get("value")
         direction = action.get("direction", "down")
 
+        # Actions that need no element locator
+        if t == "goto":
+            url = action.get("url")
+            if not url:
+                print("[WARNING] goto action missing url")
+                return
+            page.goto(url, wait_until="domcontentloaded", timeout=60_000)
+            self._log_action(action)
+            return
+
+        if t == "scroll":
+            if not scroll_container(page, direction):
+                page.mouse.wheel(0, 800 if direction == "down" else -800)
+            self._log_action(action)
+            return
+
+        if t == "find":
+            target = txt or locator.get("text") or locator.get("name") or locator.get("aria-label")
+            if not target:
+                print("[WARNING] find action missing text")
+                return
+            if self._find_in_list(page, target) is None:
+                raise RuntimeError(f"'{target}' not found in the list")
+            self._log_action(action, status="found")
+            return
+
         # Build Playwright locator
         pw_locator = None
 
@@ -660,16 +815,7 @@ class Navigator_AgentB:
             return
 
         # Execute Playwright action based on type
-        if t == "goto":
-            url = action.get("url")
-            if not url:
-                print("[WARNING] goto action missing url")
-                return
-            page.goto(url, wait_until="domcontentloaded", timeout=60_000)
-            self._log_action(action)
-            return
-        
-        elif t == "click":
+        if t == "click":
             # Verify locator was found
             if pw_locator is None or pw_locator.count() == 0:
                 print(f"[ERROR] Could not find element to click: {locator}")
@@ -723,7 +869,14 @@ class Navigator_AgentB:
                                     except Exception:
                                         continue
                                 if pw_locator is None or pw_locator.count() == 0:
-                                    return
+                                    # Not rendered: the row may be further down a virtualized list.
+                                    # Only list-like targets qualify, and typing into the page's
+                                    # search box is left to an explicit "find" action.
+                                    if role not in ("link", "row", "gridcell", "listitem", "option", "treeitem"):
+                                        return
+                                    pw_locator = self._find_in_list(page, search_text, use_search=False)
+                                    if pw_locator is None:
+                                        return
                             except Exception:
                                 return
                     except Exception:
@@ -736,52 +889,11 @@ class Navigator_AgentB:
             # If value is provided, this is a dropdown - click the button, then select the option
             if action.get("value"):
                 option_value = action.get("value")
-                page.wait_for_timeout(500)  # Wait for dropdown menu to appear
-                
-                option_clicked = False
-                # Multiple strategies to find and click the option
-                try:
-                    # Strategy 1: Look for exact text match in menu items
-                    option = page.get_by_role("menuitem", name=option_value, exact=True).or_(
-                        page.get_by_role("option", name=option_value, exact=True)
-                    )
-                    if option.count() > 0:
-                        option.first.click()
-                        option_clicked = True
-                        self._log_action(action, status=f"selected '{option_value}'")
-                except Exception:
-                    pass
-                
-                if not option_clicked:
-                    try:
-                        # Strategy 2: Non-exact match for menu items
-                        option = page.get_by_role("menuitem", name=option_value).or_(
-                            page.get_by_role("option", name=option_value)
-                        )
-                        if option.count() > 0:
-                            option.first.click()
-                            option_clicked = True
-                            self._log_action(action, status=f"selected '{option_value}'")
-                    except Exception:
-                        pass
-                
-                if not option_clicked:
-                    try:
-                        # Strategy 3: Look for text anywhere (fallback)
-                        option = page.get_by_text(option_value, exact=True).first
-                        if option.count() > 0:
-                            option.click()
-                            option_clicked = True
-                            self._log_action(action, status=f"selected '{option_value}'")
-                    except Exception:
-                        pass
-                
-                if not option_clicked:
-                    print(f"[WARNING] Dropdown opened but could not find option '{option_value}'")
-                    self._log_action(action, status=f"opened dropdown (option '{option_value}' not found)")
-                
-                # Wait for UI to update after selecting option
-                page.wait_for_timeout(800)
+                selected, status = select_option(page, option_value)
+                if not selected:
+                    print(f"[WARNING] Dropdown opened but {status}")
+                    status = f"opened dropdown ({status})"
+                self._log_action(action, status=status)
             else:
                 self._log_action(action)
             return
@@ -838,8 +950,7 @@ class Navigator_AgentB:
                         is_contenteditable = False
 
                     if is_contenteditable:
-                        pw_locator.click()
-                        page.keyboard.type(cleaned_txt, delay=15)
+                        self._insert_text(page, pw_locator, cleaned_txt)
                     else:
                         pw_locator.fill(cleaned_txt)
                     self._log_action(action)
@@ -862,8 +973,7 @@ class Navigator_AgentB:
                     return
                 except Exception:
                     try:
-                        pw_locator.click()
-                        page.keyboard.type(cleaned_txt, delay=15)
+                        self._insert_text(page, pw_locator, cleaned_txt)
                         self._log_action(action)
                         # Attempt auto submit as above
                         try:
@@ -888,8 +998,7 @@ class Navigator_AgentB:
 
             if editable.count() > 0:
                 if self._should_fill(editable):
-                    editable.click()
-                    page.keyboard.type(txt, delay=15)
+                    self._insert_text(page, editable, txt)
                     self._log_action(action)
                     # Try to submit via common buttons or Enter
                     try:
@@ -926,36 +1035,12 @@ class Navigator_AgentB:
             except Exception:
                 pass 
 
-            # Custom dropdown fallback:
+            # Custom dropdown: open it, then resolve the option in-page
             pw_locator.click()
-            page.wait_for_timeout(400)
-            
-            # find the text node first
-            text_node = page.get_by_text(txt, exact=True).first
-
-            if text_node.count() > 0:
-                # climb to a clickable parent row
-                clickable = text_node.locator(
-                    "xpath=ancestor-or-self::*[@role='option' or @role='menuitem' or self::button or self::div][1]"
-                )
-
-                try:
-                    clickable.click(timeout=5000)
-                    self._log_action(action)
-                    return
-                except Exception:
-                    clickable.click(force=True)
-                    self._log_action(action, status="done (force click)")
-                    return
-
-            page.keyboard.type(txt, delay=15)
-            page.keyboard.press("Enter")
-            self._log_action(action, status="done (keyboard fallback)")
-            return
-
-        elif t == "scroll":
-            page.mouse.wheel(0, 800 if direction == "down" else -800)   
-            self._log_action(action)
+            selected, status = select_option(page, txt)
+            if not selected:
+                raise RuntimeError(f"Could not select '{txt}': {status}")
+            self._log_action(action, status=status)
             return
 
         elif t == "wait":
@@ -966,6 +1051,90 @@ class Navigator_AgentB:
         else:
             print(f"[WARNING] Unknown action type: {t}")
 
+    def _write_trace(self, task_folder: Path, question: str, app_name: str, success: bool, error: str = ""):
+        """Write trace.json for this run; AppStats learns budgets and settle times from these."""
+        steps = [st.to_dict() for st in getattr(self, "_trace_steps", [])]
+        failed = [st for st in steps if st.get("status") != "success"]
+        trace = {
+            "app": app_name,
+            "url": getattr(self, "_app_url", None),
+            "goal": question,
+            "success": success,
+            "steps_taken": len(steps),
+            "steps": steps,
+            "settle_timeouts": list(getattr(self, "_settle_timeouts", [])),
+            "error": error,
+            "failure_step": steps[-1]["step"] if steps and not success else None,
+            "failure_label": (failed[-1] if failed else steps[-1]).get("label") if steps and not success else None,
+            "console_errors": list(self._events.console_errors) if self._events is not None else [],
+            "prompt_cache": self.prompt_cache.since(getattr(self, "_prompt_mark", (0, 0, 0))),
+            "warm_start": getattr(self, "_warm_start", None),
+        }
+        cache = trace["prompt_cache"]
+        if cache["calls"]:
+            hit_rate = f"{cache['hit_rate']:.0%}" if cache["hit_rate"] is not None else "n/a"
+            print(f"[INFO] Prompt cache: {cache['cached_tokens']}/{cache['input_tokens']} input tokens cached over {cache['calls']} calls ({hit_rate})")
+        try:
+            (task_folder / "trace.json").write_text(json.dumps(trace, indent=2, ensure_ascii=False), encoding="utf-8")
+        except OSError:
+            pass
+        if getattr(self, "_run_id", None) is not None:
+            try:
+                self.store.finish_run(self._run_id, trace)
+            except Exception as e:
+                print(f"[WARNING] Could not index run: {e}")
+
+    def _insert_text(self, page, target, text: str) -> None:
+        """
+        Focus `target` and insert `text` with a single Input.insertText (CDP) call
+        instead of one key event per character. Verifies the editor picked it up and
+        falls back to per-key typing for editors that only react to key events.
+        """
+        target.click()
+        try:
+            editor = target.evaluate(
+                """el => {
+                    const host = el.closest('.ProseMirror, .ql-editor, .DraftEditor-root, [data-slate-editor], .cm-content, .monaco-editor');
+                    return location.host + '|' + (host ? host.className.split(' ')[0] || host.tagName : el.tagName);
+                }"""
+            )
+        except Exception:
+            editor = None
+
+        if editor not in self._key_event_editors:
+            read = "el => typeof el.value === 'string' ? el.value : el.innerText"
+            try:
+                before = target.evaluate(read)
+                page.keyboard.insert_text(text)
+                if self._text_inserted(page, target, text):
+                    return
+                if target.evaluate(read) != before:
+                    # Part of the insert landed (rewritten by the editor): drop it so retyping doesn't double it
+                    if (before or "").strip():
+                        page.keyboard.press("ControlOrMeta+z")
+                    else:
+                        page.keyboard.press("ControlOrMeta+a")
+                        page.keyboard.press("Delete")
+            except Exception:
+                pass
+            if editor is not None:
+                self._key_event_editors.add(editor)
+            print("[INFO] Editor ignored inserted text, falling back to key events")
+
+        page.keyboard.type(text, delay=15)
+
+    def _text_inserted(self, page, target, text: str) -> bool:
+        """True if `text` shows up in the target or the currently focused element."""
+        check = """(el, t) => {
+            const norm = s => (s || '').replace(/\\s+/g, ' ').trim();
+            const read = n => !n ? '' : (typeof n.value === 'string' ? n.value : n.innerText);
+            return [el, document.activeElement].some(n => norm(read(n)).includes(norm(t)));
+        }"""
+        try:
+            return bool(target.evaluate(check, text))
+        except Exception:
+            return False
+
     def _slug(self, s):
         return re.sub(r"[^a-z0-9]+", "_", s.lower())[:45]
 
@@ -1049,6 +1218,19 @@ class Navigator_AgentB:
         except Exception:
             return True 
         
+    def _find_in_list(self, page, text: str, use_search: bool = True):
+        """Locator for the list row showing `text` (searching/scrolling long lists), or None."""
+        try:
+            result = find_in_list(page, text, use_search=use_search)
+        except Exception as e:
+            print(f"[WARNING] List search for '{text}' failed: {e}")
+            return None
+        if not result["found"]:
+            print(f"  [INFO] '{text}' not in list ({result['rows']} rows via {result['via']}, {result.get('scrolls', 0)} scrolls)")
+            return None
+        print(f"  [INFO] Found '{result['text'][:40]}' via {result['via']} ({result.get('scrolls', 0)} scrolls, {result['ms']} ms)")
+        return page.locator(result["pick"])
+
     def _log_action(self, action, status="done"):
         t = action.get("type")
         loc = action.get("locator", {})
@@ -1110,7 +1292,7 @@ class Navigator_AgentB:
         with open(readme_path, "a", encoding="utf-8") as f:
             f.write(step_line)
     
-    def _finalize_readme(self, readme_path: Path, success: bool, reasoning: str = ""):
+    def _finalize_readme(self, readme_path: Path, success: bool, reasoning: str = "", diagnostics: Path | None = None):
         """Add completion summary to README"""
         status_line = "\n## Result\n\n"
         if success:
@@ -1120,6 +1302,8 @@ class Navigator_AgentB:
         
         if reasoning:
             status_line += f"**Details:** {reasoning}\n"
+        if diagnostics is not None:
+            status_line += f"**Diagnostics:** `{diagnostics.relative_to(readme_path.parent).as_posix()}/` (trace.zip: `playwright show-trace`, network.har, console.json, states.json)\n"
         
         with open(readme_path, "a", encoding="utf-8") as f:
             f.write(status_line)
@@ -0,0 +1,47 @@
+import contextlib
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+# Heavy assets are generated so blocking images/fonts has something to save
+ASSET_BYTES = {
+    ".png": 48 * 1024,
+    ".woff2": 96 * 1024,
+}
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """Serves benchmarks/fixtures/ plus synthetic /assets/* payloads."""
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path.startswith("/assets/"):
+            suffix = Path(path).suffix
+            body = b"\0" * ASSET_BYTES.get(suffix, 1024)
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png" if suffix == ".png" else "font/woff2")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextlib.contextmanager
+def serve_fixtures():
+    """Serve the fixture pages on a free local port; yields the base URL."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(FixtureHandler, directory=str(FIXTURES_DIR)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,78 @@
+"""
+Import-time / CLI startup benchmark.
+
+    python -m benchmarks.import_bench                 # all targets, 5 fresh interpreters each
+    python -m benchmarks.import_bench --top 15        # plus the slowest imports (-X importtime)
+
+Every sample runs in a fresh interpreter, so numbers include module
+discovery and bytecode loading the way a new worker or `python main.py` sees it.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+TARGETS = {
+    "python (baseline)": ["-c", "pass"],
+    "main --help": ["main.py", "--help"],
+    "agents.agent_a": ["-c", "import agents.agent_a"],
+    "agents.agent_b": ["-c", "import agents.agent_b"],
+    "helpers.webapp_info": ["-c", "import helpers.webapp_info"],
+    "helpers.task_service": ["-c", "import helpers.task_service"],
+    # What the first LLM call costs on top (langchain + provider SDK)
+    "first chat_model()": ["-c", "from helpers.llm_gateway import chat_model; chat_model('openai:gpt-4o-mini')"],
+}
+
+
+def time_target(argv: list, repeat: int) -> tuple[float | None, str]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, *argv], cwd=ROOT, capture_output=True, text=True,
+                              env={**os.environ, "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "sk-bench")})
+        elapsed = (time.perf_counter() - start) * 1000
+        if proc.returncode != 0:
+            return None, (proc.stderr.strip().splitlines() or ["failed"])[-1]
+        samples.append(elapsed)
+    return statistics.median(samples), ""
+
+
+def slowest_imports(module: str, top: int) -> list:
+    """(cumulative_us, module) of the slowest imports of `module`, from -X importtime."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT, capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        # "import time:   self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split(":", 1)[1].split("|")
+        rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=0, help="show the N slowest imports of --module")
+    parser.add_argument("--module", default="agents.agent_b")
+    args = parser.parse_args()
+
+    print(f"\n{'target':<24}{'median ms':>12}")
+    for name, argv in TARGETS.items():
+        ms, error = time_target(argv, args.repeat)
+        print(f"{name:<24}{ms:>12.1f}" if ms is not None else f"{name:<24}{'-':>12}  ({error})")
+
+    if args.top:
+        print(f"\nslowest imports of {args.module} (cumulative ms)")
+        for cumulative_us, name in slowest_imports(args.module, args.top):
+            print(f"{cumulative_us / 1000:>10.1f}  {name}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
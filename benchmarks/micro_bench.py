@@ -0,0 +1,304 @@
+"""
+Per-function latency and browser round trips of the per-step hot path.
+
+    python -m benchmarks.micro_bench                         # run, compare with benchmarks/baseline.json
+    python -m benchmarks.micro_bench --save-baseline         # run and store the numbers as the new baseline
+    python -m benchmarks.micro_bench --max-regression 10     # fail on >10% slowdown
+    python -m benchmarks.micro_bench --suite python -k slug  # only pure-Python cases matching "slug"
+
+Pure-Python helpers (slugs, goal cleanup, JSON extraction, query building)
+are timed in tight loops; the DOM helpers run against the fixture pages in
+benchmarks/fixtures/ served locally, with every call that goes to the browser
+counted. Exits 1 when a case's best time regresses by more than
+--max-regression percent or it needs more round trips than the baseline.
+Regressions are judged on the fastest sample (least disturbed by other load
+on the machine, as timeit does) and must reproduce once when re-measured;
+median and p95 are reported alongside. Baselines are machine-specific, so
+each machine keeps its own (ignored by git).
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from agents.agent_b import Navigator_AgentB
+from helpers.action_model import Action, StepHistory, StepRecord, extract_json
+from helpers.element_ranker import build_query
+from helpers.list_finder import find_in_list
+from helpers.menu_resolver import resolve_option
+from helpers.warm_start import task_template
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = ROOT / "benchmarks" / "baseline.json"
+SUITES = ("python", "dom")
+# Below this absolute slowdown a percentage is timer noise (microsecond helpers)
+MIN_DELTA_US = 1.0
+
+GOAL = "Create a project called 'Q3 roadmap' with priority High in Linear"
+REPLY = (
+    "The form is open, so the next step is to name the project.\n\n"
+    "```json\n"
+    '{"type": "fill", "label": "project name", "locator": {"role": "textbox", "placeholder": "Project name"}, '
+    '"text": "Q3 roadmap", "reasoning": "The {name} field is empty and focused"}\n'
+    "```"
+)
+# Braces in the prose before the object: the loop has to skip them
+NOISY_REPLY = "Looking at {the form} and {the sidebar} ... " * 20 + REPLY
+
+
+def _history(steps: int = 12) -> StepHistory:
+    history = StepHistory()
+    for i in range(1, steps + 1):
+        action = Action(type="click", label=f"step {i}", locator={"role": "button", "name": f"Button {i}"})
+        history.append(StepRecord.from_action(i, action, f"step {i}", "success" if i % 4 else "failed"))
+    return history
+
+
+def python_cases() -> dict:
+    # The helpers only use their arguments; skip __init__ (browser pool, run store)
+    nav = Navigator_AgentB.__new__(Navigator_AgentB)
+    history = _history()
+    cleaned = nav._remove_app_name_from_question(GOAL, "Linear")
+
+    def summary():
+        history._summary = None     # measure the rebuild, not the cached string
+        return history.summary()
+
+    return {
+        "slug": lambda: nav._slug(cleaned),
+        "remove_app_name": lambda: nav._remove_app_name_from_question(GOAL, "Linear"),
+        "extract_json": lambda: extract_json(REPLY),
+        "extract_json_noisy": lambda: extract_json(NOISY_REPLY),
+        "action_parse": lambda: Action.parse(REPLY),
+        "build_query": lambda: build_query(GOAL, history),
+        "task_template": lambda: task_template(GOAL, "Linear"),
+        "history_summary": summary,
+    }
+
+
+class RoundTrips:
+    """Counts calls that reach the browser through wrapped pages/locators."""
+
+    def __init__(self):
+        self.count = 0
+
+
+# Build a new locator without talking to the browser; wrapped so their calls are counted too
+CHAINERS = {
+    "locator", "first", "last", "nth", "filter", "and_", "or_", "keyboard", "mouse",
+    "get_by_role", "get_by_text", "get_by_label", "get_by_placeholder", "get_by_test_id", "get_by_title",
+}
+# Cached on the Python side
+LOCAL = {"url", "viewport_size", "context", "main_frame", "is_closed", "on", "once", "remove_listener"}
+
+
+class Counted:
+    """Proxy for a Playwright page or locator that counts its round trips."""
+
+    def __init__(self, target, trips: RoundTrips):
+        self._target = target
+        self._trips = trips
+
+    def __getattr__(self, name):
+        value = getattr(self._target, name)
+        if name in CHAINERS:
+            if callable(value):
+                return lambda *args, **kwargs: Counted(value(*args, **kwargs), self._trips)
+            return Counted(value, self._trips)
+        if name in LOCAL or name.startswith("_") or not callable(value):
+            return value
+
+        def call(*args, **kwargs):
+            self._trips.count += 1
+            return value(*args, **kwargs)
+        return call
+
+
+def dom_cases() -> list:
+    """(name, fixture path, fn(counted page), reset(raw page) or None); resets run outside the timer."""
+    nav = Navigator_AgentB.__new__(Navigator_AgentB)
+    query = build_query(GOAL, _history())
+    scroll_top = "() => { document.getElementById('scroller').scrollTop = 0; }"
+    return [
+        ("collect_dom_hints", "landing.html?rows=200", lambda page: nav._collect_dom_hints(page), None),
+        ("collect_dom_hints_ranked", "landing.html?rows=200", lambda page: nav._collect_dom_hints(page, query), None),
+        ("dom_fingerprint", "landing.html?rows=200", lambda page: nav._dom_fingerprint(page), None),
+        ("normalize_fill_text", "landing.html?rows=200",
+         lambda page: nav._normalize_fill_text(page.locator("textarea[name=description]"), "Add a description/Q3 goals"), None),
+        ("find_in_list_dom", "landing.html?rows=200", lambda page: find_in_list(page, "Project 142 roadmap", use_search=False), None),
+        ("find_in_list_scroll", "virtual_list.html?rows=2000", lambda page: find_in_list(page, "Customer 1500 account"),
+         lambda raw: raw.evaluate(scroll_top)),
+        ("resolve_option", "menu.html?options=300", lambda page: resolve_option(page, "Frontend 205"), None),
+        ("resolve_option_fuzzy", "menu.html?options=300", lambda page: resolve_option(page, "improvment"), None),
+    ]
+
+
+def measure(fn, number: int, repeat: int, trips: RoundTrips | None = None, reset=None) -> dict:
+    """Min/median/p95 microseconds per call over `repeat` samples of `number` calls, plus round trips per call."""
+    fn()
+    if trips is not None:
+        trips.count = 0
+    samples = []
+    for _ in range(repeat):
+        elapsed = 0.0
+        if reset is None:
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            elapsed = time.perf_counter() - start
+        else:
+            for _ in range(number):
+                reset()
+                start = time.perf_counter()
+                fn()
+                elapsed += time.perf_counter() - start
+        samples.append(elapsed / number * 1e6)
+    return {
+        "min_us": round(min(samples), 3),
+        "median_us": round(statistics.median(samples), 3),
+        "p95_us": round(statistics.quantiles(samples, n=20)[-1] if len(samples) > 1 else samples[0], 3),
+        "round_trips": round(trips.count / (number * repeat), 2) if trips is not None else 0,
+    }
+
+
+def run_python(names: dict, number: int, repeat: int) -> dict:
+    results = {}
+    for name, fn in names.items():
+        results[name] = measure(fn, number, repeat)
+    return results
+
+
+def run_dom(cases: list, number: int, repeat: int) -> dict:
+    try:
+        from helpers.browser_pool import BrowserPool
+        from benchmarks.fixture_server import serve_fixtures
+        import playwright  # noqa: F401
+    except ImportError as e:
+        print(f"[WARNING] Skipping DOM cases: {e}")
+        return {}
+    results = {}
+    pool = BrowserPool(mode="shared", profile="production")
+    try:
+        page, events = pool.new_page("bench", None)
+        try:
+            with serve_fixtures() as base:
+                loaded = None
+                for name, fixture, fn, reset in cases:
+                    if fixture != loaded:
+                        page.goto(f"{base}/{fixture}", wait_until="load", timeout=30_000)
+                        loaded = fixture
+                    trips = RoundTrips()
+                    counted = Counted(page, trips)
+                    try:
+                        results[name] = measure(lambda: fn(counted), number, repeat, trips,
+                                                (lambda: reset(page)) if reset else None)
+                    except Exception as e:
+                        print(f"[ERROR] {name} failed: {e}")
+        finally:
+            pool.release(page, events)
+    finally:
+        pool.close()
+    return results
+
+
+def compare(results: dict, baseline: dict, max_regression: float, min_delta_us: float = MIN_DELTA_US) -> list:
+    """[(case, message, is_timing)] for slowdowns (fastest sample) past the threshold and extra round trips."""
+    failures = []
+    for name, current in results.items():
+        base = baseline.get("cases", {}).get(name)
+        if not base or "min_us" not in base:
+            continue
+        delta = current["min_us"] - base["min_us"]
+        change = delta / base["min_us"] * 100 if base["min_us"] else 0.0
+        if change > max_regression and delta > min_delta_us:
+            failures.append((name, f"{name}: {base['min_us']:.2f} -> {current['min_us']:.2f} us (+{change:.0f}% > {max_regression:g}%)", True))
+        if current["round_trips"] > base["round_trips"]:
+            failures.append((name, f"{name}: round trips {base['round_trips']:g} -> {current['round_trips']:g}", False))
+    return failures
+
+
+def print_table(results: dict, baseline: dict | None):
+    cases = (baseline or {}).get("cases", {})
+    print(f"\n{'case':<28}{'min us':>10}{'median us':>12}{'p95 us':>12}{'trips':>8}{'baseline':>12}{'change':>9}")
+    for name, r in results.items():
+        base = cases.get(name)
+        row = f"{name:<28}{r['min_us']:>10.2f}{r['median_us']:>12.2f}{r['p95_us']:>12.2f}{r['round_trips']:>8g}"
+        if base and base.get("min_us"):
+            row += f"{base['min_us']:>12.2f}{(r['min_us'] / base['min_us'] - 1) * 100:>+8.0f}%"
+        else:
+            row += f"{'-':>12}{'-':>9}"
+        print(row)
+    print()
+
+
+def run_cases(args, selected) -> dict:
+    results = {}
+    if "python" in args.suite:
+        cases = {name: fn for name, fn in python_cases().items() if selected(name)}
+        if cases:
+            print(f"[BENCH] {len(cases)} pure-Python cases")
+            results.update(run_python(cases, args.number, args.repeat))
+    if "dom" in args.suite:
+        cases = [case for case in dom_cases() if selected(case[0])]
+        if cases:
+            print(f"[BENCH] {len(cases)} DOM cases on local fixtures")
+            results.update(run_dom(cases, args.dom_number, max(2, args.repeat // 3)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suite", choices=SUITES, nargs="+", default=list(SUITES))
+    parser.add_argument("-k", dest="match", default="", help="only cases whose name contains this")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline (merged into the existing file)")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="allowed slowdown in percent (default 20)")
+    parser.add_argument("--min-delta-us", type=float, default=MIN_DELTA_US, help="ignore slowdowns smaller than this many microseconds")
+    parser.add_argument("--number", type=int, default=2000, help="calls per sample for pure-Python cases")
+    parser.add_argument("--dom-number", type=int, default=10, help="calls per sample for DOM cases")
+    parser.add_argument("--repeat", type=int, default=15)
+    args = parser.parse_args()
+
+    results = run_cases(args, lambda name: args.match in name)
+    baseline = None
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline.get("machine") != platform.node() or baseline.get("python") != platform.python_version():
+            print(f"[WARNING] Baseline was recorded on {baseline.get('machine')} / Python {baseline.get('python')}")
+    print_table(results, baseline)
+
+    if args.save_baseline:
+        cases = {**((baseline or {}).get("cases", {})), **results}
+        args.baseline.write_text(json.dumps({
+            "machine": platform.node(),
+            "python": platform.python_version(),
+            "saved": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "cases": cases,
+        }, indent=2), encoding="utf-8")
+        print(f"[BENCH] Saved {len(results)} cases to {args.baseline}")
+        return
+    if baseline is None:
+        print(f"[INFO] No baseline at {args.baseline}; run with --save-baseline to record one")
+        return
+
+    failures = compare(results, baseline, args.max_regression, args.min_delta_us)
+    slow = {name for name, _, is_timing in failures if is_timing}
+    if slow:
+        # A real regression reproduces; a burst of load on the machine usually does not
+        print(f"[BENCH] Re-measuring {len(slow)} slower cases")
+        for name, result in run_cases(args, lambda name: name in slow).items():
+            if result["min_us"] < results[name]["min_us"]:
+                results[name] = result
+        failures = compare(results, baseline, args.max_regression, args.min_delta_us)
+    for _, failure, _ in failures:
+        print(f"[FAIL] {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"[PASS] No case regressed more than {args.max_regression:g}% or needs more round trips")
+
+
+if __name__ == "__main__":
+    main()
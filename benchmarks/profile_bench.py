@@ -0,0 +1,125 @@
+"""
+Per-step time and browser memory for each execution profile.
+
+    python -m benchmarks.profile_bench                     # local fixture page
+    python -m benchmarks.profile_bench --url https://... --repeat 5
+
+Runs the same scripted steps (no LLM) in every profile from
+helpers/exec_profiles.py and prints a comparison table.
+"""
+import argparse
+import statistics
+import time
+
+from helpers.browser_pool import BrowserPool
+from helpers.exec_profiles import EXECUTION_PROFILES
+
+STEPS = ("goto", "settle", "screenshot", "dom_scan", "click", "scroll")
+
+
+def run_steps(page, events, url: str) -> dict:
+    timings = {}
+
+    def timed(name, fn):
+        start = time.perf_counter()
+        try:
+            fn()
+        finally:
+            timings[name] = (time.perf_counter() - start) * 1000
+
+    timed("goto", lambda: page.goto(url, wait_until="domcontentloaded", timeout=60_000))
+    timed("settle", lambda: events.wait_for_quiet(page, timeout_ms=5000) if events else page.wait_for_timeout(1500))
+    timed("screenshot", lambda: page.screenshot(full_page=True))
+    timed("dom_scan", lambda: page.evaluate(
+        "() => document.querySelectorAll('input, textarea, button, a[href], [role=button], [role=link]').length"
+    ))
+
+    def click():
+        button = page.get_by_role("button").first
+        if button.count() > 0:
+            button.click(timeout=5000)
+        if events:
+            events.wait_for_quiet(page, timeout_ms=3000)
+
+    timed("click", click)
+
+    def scroll():
+        page.mouse.wheel(0, 800)
+        if events:
+            events.wait_for_quiet(page, timeout_ms=3000)
+
+    timed("scroll", scroll)
+    return timings
+
+
+def bench_profile(name: str, url: str, repeat: int) -> dict:
+    pool = BrowserPool(mode="shared", profile=name)
+    samples = {step: [] for step in STEPS}
+    requests = []
+    try:
+        for _ in range(repeat):
+            page, events = pool.new_page("bench", None)
+            try:
+                for step, ms in run_steps(page, events, url).items():
+                    samples[step].append(ms)
+                if events:
+                    requests.append(events.requests)
+            finally:
+                pool.release(page, events)
+        memory = pool.memory_mb()
+    finally:
+        pool.close()
+    return {
+        "steps": {step: statistics.median(v) for step, v in samples.items() if v},
+        "total_ms": sum(statistics.median(v) for v in samples.values() if v),
+        "memory_mb": memory,
+        "requests": statistics.median(requests) if requests else None,
+    }
+
+
+def print_table(results: dict):
+    names = list(results)
+    print(f"\n{'step (median ms)':<18}" + "".join(f"{n:>14}" for n in names))
+    for step in STEPS + ("total_ms",):
+        row = f"{step:<18}"
+        for n in names:
+            value = results[n]["total_ms"] if step == "total_ms" else results[n]["steps"].get(step)
+            row += f"{value:>14.1f}" if value is not None else f"{'-':>14}"
+        print(row)
+    for key in ("memory_mb", "requests"):
+        row = f"{key:<18}"
+        for n in names:
+            value = results[n][key]
+            row += f"{value:>14}" if value is not None else f"{'-':>14}"
+        print(row)
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=None, help="page to benchmark (default: local fixture)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--profiles", nargs="+", default=list(EXECUTION_PROFILES))
+    args = parser.parse_args()
+
+    def run(url):
+        results = {}
+        for name in args.profiles:
+            print(f"[BENCH] {name} profile on {url}")
+            try:
+                results[name] = bench_profile(name, url, args.repeat)
+            except Exception as e:
+                print(f"[ERROR] {name} profile failed: {e}")
+        if results:
+            print_table(results)
+
+    if args.url:
+        run(args.url)
+    else:
+        from benchmarks.fixture_server import serve_fixtures
+        with serve_fixtures() as base:
+            run(f"{base}/landing.html?rows=200")
+
+
+if __name__ == "__main__":
+    main()
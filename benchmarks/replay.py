@@ -0,0 +1,167 @@
+"""
+Re-execute a recorded run's actions through Navigator_AgentB._do_action,
+without the LLM, and compare per-step timings with the original run.
+
+    python -m benchmarks.replay screenshots/notion/add_a_page_1
+    python -m benchmarks.replay 42 --repeat 3          # run id from screenshots/runs.db
+    python -m benchmarks.replay 42 --skip-failed --json replay.json
+
+Uses the app's saved login (browser_profiles/<app>); the page must not hit
+a login wall. Actions run against live data, so replaying a "create" run
+creates another item.
+"""
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+
+from helpers.action_model import Action
+from helpers.app_stats import AppStats
+from helpers.browser_pool import BrowserPool, PROFILES_ROOT
+from helpers.login_wall import detect_login_wall
+from helpers.run_store import RunStore, RUNS_ROOT
+
+
+def load_trace(run: str, store: RunStore) -> tuple[dict, Path]:
+    """Trace of a run given its folder or its run id."""
+    folder = Path(run)
+    if run.isdigit() and not folder.exists():
+        folder = store.folder(int(run))
+        if folder is None:
+            raise SystemExit(f"[ERROR] No run with id {run} in {store.root / 'runs.db'}")
+    path = folder / "trace.json"
+    try:
+        return json.loads(path.read_text(encoding="utf-8")), folder
+    except (OSError, json.JSONDecodeError) as e:
+        raise SystemExit(f"[ERROR] Cannot read {path}: {e}")
+
+
+def replay_once(navigator, page, steps: list, app_stats: AppStats) -> list:
+    """Run the recorded steps in order on an opened page; returns per-step timings."""
+    results = []
+    for st in steps:
+        try:
+            action = Action.from_dict(st).as_dict()
+        except ValueError as e:
+            print(f"[WARNING] Step {st.get('step')}: not replayable ({e})")
+            results.append({"step": st.get("step"), "status": "skipped"})
+            continue
+        status = "success"
+        start = time.perf_counter()
+        try:
+            navigator._do_action(action, page)
+        except Exception as e:
+            status = "failed"
+            print(f"[FAIL] Step {st.get('step')}: {e}")
+        duration_ms = int((time.perf_counter() - start) * 1000)
+        try:
+            settle_ms = navigator._settle(page, app_stats.settle_timeout(action["type"]))
+        except Exception:
+            settle_ms = None
+        results.append({"step": st.get("step"), "status": status, "duration_ms": duration_ms, "settle_ms": settle_ms})
+    return results
+
+
+def replay(trace: dict, url: str, profile: str, repeat: int, skip_failed: bool, store: RunStore | None = None) -> list:
+    """Replay `repeat` times in fresh pages; returns one result list per repetition."""
+    from agents.agent_b import Navigator_AgentB
+
+    app = trace["app"]
+    steps = [st for st in trace.get("steps", []) if not (skip_failed and st.get("status") != "success")]
+    navigator = Navigator_AgentB(name="Replay", interactive=False, pool=BrowserPool(profile=profile), store=store)
+    app_stats = AppStats.load(app, navigator.store.root, store=navigator.store)
+    runs = []
+    try:
+        for i in range(repeat):
+            page, navigator._events = navigator.pool.new_page(app, PROFILES_ROOT / app)
+            try:
+                page.goto(url, wait_until="domcontentloaded", timeout=60_000)
+                navigator._settle(page, 3000)
+                reason = detect_login_wall(page, app)
+                if reason:
+                    raise SystemExit(f"[ERROR] {app} shows a login wall ({reason}); log in with python main.py first")
+                print(f"[REPLAY] {app}: {len(steps)} steps (run {i + 1}/{repeat})")
+                runs.append(replay_once(navigator, page, steps, app_stats))
+            finally:
+                navigator.pool.release(page, navigator._events)
+                navigator._events = None
+    finally:
+        navigator.close()
+    return runs
+
+
+def merge_runs(runs: list) -> list:
+    """Median timings per step over repetitions; status from the last repetition."""
+    merged = []
+    for per_step in zip(*runs):
+        last = per_step[-1]
+        row = {"step": last["step"], "status": last["status"]}
+        for key in ("duration_ms", "settle_ms"):
+            values = [r[key] for r in per_step if r.get(key) is not None]
+            row[key] = int(statistics.median(values)) if values else None
+        merged.append(row)
+    return merged
+
+
+def diff(original: list, replayed: list) -> list:
+    by_step = {st.get("step"): st for st in original}
+    rows = []
+    for r in replayed:
+        orig = by_step.get(r["step"], {})
+        row = {
+            "step": r["step"],
+            "type": orig.get("type"),
+            "label": orig.get("label"),
+            "status": f"{orig.get('status')} -> {r['status']}" if orig.get("status") != r["status"] else r["status"],
+        }
+        for key in ("duration_ms", "settle_ms"):
+            before, after = orig.get(key), r.get(key)
+            row[key] = (before, after, after - before if before is not None and after is not None else None)
+        rows.append(row)
+    return rows
+
+
+def print_diff(rows: list):
+    def fmt(v):
+        return f"{v:>8}" if v is not None else f"{'-':>8}"
+
+    print(f"\n{'step':>4}  {'action':<28}{'act orig':>8}{'replay':>8}{'delta':>8}  {'settle':>8}{'replay':>8}{'delta':>8}  status")
+    totals = [0, 0, 0, 0]
+    for row in rows:
+        act, settle = row["duration_ms"], row["settle_ms"]
+        label = f"{row['type']} {row['label'] or ''}"[:27]
+        print(f"{row['step']:>4}  {label:<28}{fmt(act[0])}{fmt(act[1])}{fmt(act[2])}  {fmt(settle[0])}{fmt(settle[1])}{fmt(settle[2])}  {row['status']}")
+        for i, v in enumerate((act[0], act[1], settle[0], settle[1])):
+            totals[i] += v or 0
+    print(f"{'':>4}  {'total':<28}{fmt(totals[0])}{fmt(totals[1])}{fmt(totals[1] - totals[0])}  "
+          f"{fmt(totals[2])}{fmt(totals[3])}{fmt(totals[3] - totals[2])}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("run", help="run folder (screenshots/<app>/<task>) or run id")
+    parser.add_argument("--url", default=None, help="start URL (default: the URL recorded with the run)")
+    parser.add_argument("--profile", choices=["interactive", "production"], default="production")
+    parser.add_argument("--repeat", type=int, default=1, help="replay N times and report median timings")
+    parser.add_argument("--skip-failed", action="store_true", help="leave out steps that failed in the original run")
+    parser.add_argument("--json", type=Path, default=None, help="also write the diff as JSON")
+    parser.add_argument("--root", type=Path, default=RUNS_ROOT)
+    args = parser.parse_args()
+
+    store = RunStore(args.root)
+    trace, folder = load_trace(args.run, store)
+    url = args.url or trace.get("url")
+    if not url:
+        raise SystemExit("[ERROR] The run has no recorded URL; pass --url")
+    print(f"[INFO] Replaying {folder} ({trace.get('goal')!r})")
+
+    runs = replay(trace, url, args.profile, max(1, args.repeat), args.skip_failed, store=store)
+    rows = diff(trace.get("steps", []), merge_runs(runs))
+    print_diff(rows)
+    if args.json:
+        args.json.write_text(json.dumps({"run": str(folder), "url": url, "steps": rows}, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
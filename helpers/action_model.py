@@ -0,0 +1,197 @@
+import json
+from collections import deque
+from dataclasses import dataclass, field
+
+ACTION_TYPES = ("goto", "click", "fill", "type", "select", "press", "scroll", "find", "wait", "done")
+LOCATOR_KEYS = ("role", "name", "aria-label", "placeholder", "text", "css", "id", "label", "selector")
+
+_decoder = json.JSONDecoder()
+
+
+def extract_json(text: str) -> dict | None:
+    """First JSON object in an LLM reply (tolerates prose/markdown around it), or None.
+    Single O(n) decode from the first '{' instead of re-parsing growing prefixes."""
+    start = text.find("{")
+    while start != -1:
+        try:
+            obj, _ = _decoder.raw_decode(text, start)
+            if isinstance(obj, dict):
+                return obj
+        except json.JSONDecodeError:
+            pass
+        start = text.find("{", start + 1)
+    return None
+
+
+def _str(value) -> str:
+    if value is None:
+        return ""
+    return value.strip() if isinstance(value, str) else str(value)
+
+
+@dataclass(slots=True)
+class Action:
+    """One next-step decision from the LLM, validated against the prompt's schema."""
+    type: str
+    label: str = ""
+    locator: dict = field(default_factory=dict)
+    text: str = ""
+    value: str = ""
+    key: str = ""
+    direction: str = "down"
+    url: str = ""
+    reasoning: str = ""
+    candidates: list = field(default_factory=list)   # other plausible link texts when the model is unsure
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Action":
+        """Validate a decoded action; raises ValueError on schema violations."""
+        if not isinstance(data, dict):
+            raise ValueError(f"Action must be a JSON object, got {type(data).__name__}")
+        action_type = _str(data.get("type")).lower()
+        if action_type not in ACTION_TYPES:
+            raise ValueError(f"Unknown action type {data.get('type')!r} (expected one of {', '.join(ACTION_TYPES)})")
+        raw_locator = data.get("locator") or {}
+        if not isinstance(raw_locator, dict):
+            raise ValueError(f"'locator' must be an object, got {raw_locator!r}")
+        # Drop empty/placeholder entries so locator resolution only sees real hints
+        locator = {k: _str(v) for k, v in raw_locator.items() if k in LOCATOR_KEYS and _str(v) not in ("", "...")}
+        direction = _str(data.get("direction")).lower() or "down"
+        if direction not in ("down", "up"):
+            direction = "down"
+        if action_type == "goto" and not _str(data.get("url")):
+            raise ValueError("goto action is missing 'url'")
+        raw_candidates = data.get("candidates") or []
+        candidates = [_str(c) for c in raw_candidates if _str(c)] if isinstance(raw_candidates, list) else []
+        return cls(
+            type=action_type,
+            label=_str(data.get("label")),
+            locator=locator,
+            text=_str(data.get("text")),
+            value=_str(data.get("value")),
+            key=_str(data.get("key")),
+            direction=direction,
+            url=_str(data.get("url")),
+            reasoning=_str(data.get("reasoning")),
+            candidates=candidates[:3],
+        )
+
+    @classmethod
+    def parse(cls, text: str) -> "Action":
+        """Parse and validate an LLM reply; raises ValueError when it holds no valid action."""
+        data = extract_json(text)
+        if data is None:
+            raise ValueError(f"LLM did not return JSON for next action: {text}")
+        return cls.from_dict(data)
+
+    def as_dict(self) -> dict:
+        """Plain dict in the shape _do_action and the logs expect (empty fields omitted)."""
+        data = {"type": self.type, "label": self.label, "locator": self.locator}
+        for name in ("text", "value", "key", "url", "reasoning"):
+            value = getattr(self, name)
+            if value:
+                data[name] = value
+        if self.type == "scroll":
+            data["direction"] = self.direction
+        return data
+
+    def target(self) -> str:
+        loc = self.locator
+        return loc.get("aria-label") or loc.get("placeholder") or loc.get("text") or loc.get("name") or "unknown"
+
+
+@dataclass(slots=True)
+class StepRecord:
+    """One executed step; its prompt line is rendered once and reused every later step."""
+    step: int
+    type: str
+    label: str
+    locator: dict
+    text: str
+    status: str
+    params: dict | None = None          # value/key/url/direction when the action used them (for replay)
+    duration_ms: int | None = None
+    settle_ms: int | None = None
+    decide_ms: int | None = None
+    events: dict | None = None
+    _line: str | None = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def from_action(cls, step: int, action: Action, label: str, status: str, duration_ms: int | None = None) -> "StepRecord":
+        params = {k: v for k, v in action.as_dict().items() if k in ("value", "key", "url", "direction")}
+        return cls(step, action.type, label, action.locator, action.text, status, params or None, duration_ms)
+
+    def prompt_line(self) -> str:
+        if self._line is None:
+            text_str = f" with text '{self.text}'" if self.text else ""
+            status_marker = "✓" if self.status == "success" else "✗ FAILED"
+            self._line = f"Step {self.step}: {status_marker} {self.type} on [{self.target()}]{text_str}\n"
+        return self._line
+
+    def target(self) -> str:
+        loc = self.locator
+        return loc.get("aria-label") or loc.get("placeholder") or loc.get("text") or loc.get("name") or "unknown"
+
+    def to_dict(self) -> dict:
+        data = {
+            "step": self.step,
+            "type": self.type,
+            "label": self.label,
+            "locator": self.locator,
+            "text": self.text,
+            "status": self.status,
+        }
+        if self.params:
+            data.update(self.params)
+        for name in ("decide_ms", "duration_ms", "settle_ms", "events"):
+            value = getattr(self, name)
+            if value is not None:
+                data[name] = value
+        return data
+
+
+class StepHistory:
+    """
+    Bounded ring of StepRecords. The prompt summary of the last `window`
+    steps is cached and only rebuilt when a step is appended.
+    """
+    __slots__ = ("records", "window", "_summary")
+
+    def __init__(self, window: int = 5, capacity: int = 100):
+        self.records = deque(maxlen=capacity)
+        self.window = window
+        self._summary = None
+
+    def append(self, record: StepRecord):
+        self.records.append(record)
+        self._summary = None
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __bool__(self):
+        return bool(self.records)
+
+    @property
+    def last(self) -> StepRecord | None:
+        return self.records[-1] if self.records else None
+
+    def summary(self) -> str:
+        """'Actions taken so far' block for the next-action prompt."""
+        if self._summary is None:
+            if not self.records:
+                self._summary = ""
+            else:
+                start = max(0, len(self.records) - self.window)
+                recent = [self.records[i].prompt_line() for i in range(start, len(self.records))]
+                self._summary = "\n\nActions taken so far:\n" + "".join(recent)
+        return self._summary
+
+    def filled_values(self) -> list:
+        return [r.text for r in self.records if r.type in ("fill", "type") and r.status == "success" and r.text]
+
+    def to_list(self) -> list:
+        return [r.to_dict() for r in self.records]
@@ -0,0 +1,128 @@
+import json
+import math
+from collections import Counter
+from pathlib import Path
+
+DEFAULT_MAX_STEPS = 10
+MIN_MAX_STEPS = 4
+MAX_MAX_STEPS = 20
+
+# Worst-case settle waits used until an app has history (ms)
+DEFAULT_SETTLE_MS = {"click": 2000, "other": 900}
+MIN_SETTLE_MS = 300
+MAX_SETTLE_MS = 5000
+
+# Error of a run that used up its step budget (agents/agent_b.py)
+BUDGET_EXHAUSTED_PREFIX = "Max steps ("
+
+# Runs needed before learned values replace the defaults
+MIN_RUNS = 5
+MIN_SETTLE_SAMPLES = 10
+
+# Prior knowledge used until an app has enough history of its own
+DEFAULT_HINTS = {
+    "asana": "ASANA COMPLEXITY: Asana has a complex UI with nested menus, modal dialogs, and multi-step workflows. Expect to take more steps than usual. Be patient and verify each action completes before moving to the next.",
+}
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile; 0 for an empty list."""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    idx = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[idx]
+
+
+class AppStats:
+    """
+    Per-app statistics built from past run traces (screenshots/<app>/*/trace.json).
+    Provides step budgets, settle timeouts and prompt hints for the next run.
+    """
+
+    def __init__(self, app_name: str, traces: list):
+        self.app_name = (app_name or "unknown").lower()
+        self.traces = traces
+
+        successes = [t for t in traces if t.get("success")]
+        self.steps_to_success = [t.get("steps_taken", 0) for t in successes if t.get("steps_taken")]
+        # Runs cut off by the budget needed more steps than they got: without them the
+        # budget learns only from runs that fit and can only ever shrink
+        self.steps_needed = self.steps_to_success + [
+            t["steps_taken"] + 1 for t in traces
+            if not t.get("success") and t.get("steps_taken") and (t.get("error") or "").startswith(BUDGET_EXHAUSTED_PREFIX)
+        ]
+
+        self.settle_samples = {"click": [], "other": []}
+        failed_locators = Counter()
+        failure_points = Counter()
+        for t in traces:
+            timed_out = set(t.get("settle_timeouts") or [])
+            for st in t.get("steps", []):
+                kind = "click" if st.get("type") == "click" else "other"
+                if st.get("settle_ms") is not None:
+                    # A settle cut off by its timeout only says "at least this long"
+                    self.settle_samples[kind].append(MAX_SETTLE_MS if st.get("step") in timed_out else st["settle_ms"])
+                if st.get("status") != "success":
+                    loc = st.get("locator") or {}
+                    name = loc.get("name") or loc.get("aria-label") or loc.get("text") or loc.get("placeholder")
+                    if name:
+                        failed_locators[f"{st.get('type')} [{name}]"] += 1
+            if not t.get("success") and t.get("failure_step"):
+                failure_points[t.get("failure_label") or f"step {t['failure_step']}"] += 1
+        self.failed_locators = failed_locators
+        self.failure_points = failure_points
+
+    @classmethod
+    def load(cls, app_name: str, screenshots_root: Path = Path("screenshots"), limit: int = 200, store=None):
+        """Load the most recent `limit` traces for an app, from the run store when given."""
+        if store is not None:
+            traces = store.recent_traces(app_name or "unknown", limit)
+            if traces:
+                return cls(app_name, traces)
+        # No index yet (or nothing indexed for this app) → scan trace.json files
+        app_folder = screenshots_root / (app_name or "unknown")
+        paths = sorted(app_folder.glob("*/trace.json"), key=lambda p: p.stat().st_mtime, reverse=True)[:limit]
+        traces = []
+        for path in paths:
+            try:
+                traces.append(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, json.JSONDecodeError):
+                continue
+        return cls(app_name, traces)
+
+    def step_budget(self) -> int:
+        """p90 of steps needed (successes, plus budget-exhausted runs) plus slack, or the default without enough history."""
+        if len(self.steps_needed) < MIN_RUNS:
+            return DEFAULT_MAX_STEPS
+        budget = math.ceil(percentile(self.steps_needed, 90)) + 2
+        return max(MIN_MAX_STEPS, min(MAX_MAX_STEPS, budget))
+
+    def settle_timeout(self, action_type: str) -> int:
+        """Upper bound (ms) to wait for the page to settle after an action."""
+        kind = "click" if action_type == "click" else "other"
+        samples = self.settle_samples[kind]
+        if len(samples) < MIN_SETTLE_SAMPLES:
+            return DEFAULT_SETTLE_MS[kind]
+        timeout = int(percentile(samples, 90) * 1.5)
+        return max(MIN_SETTLE_MS, min(MAX_SETTLE_MS, timeout))
+
+    def prompt_hint(self) -> str:
+        """App-specific guidance for the next-action prompt."""
+        if len(self.steps_to_success) < MIN_RUNS:
+            hints = [DEFAULT_HINTS[self.app_name]] if self.app_name in DEFAULT_HINTS else []
+        else:
+            hints = []
+            median = percentile(self.steps_to_success, 50)
+            if median >= 6:
+                hints.append(
+                    f"{self.app_name.upper()} COMPLEXITY: tasks in this app usually take about {int(median)} steps. "
+                    "Verify each action completes before moving to the next."
+                )
+        if self.failed_locators:
+            common = ", ".join(name for name, _ in self.failed_locators.most_common(3))
+            hints.append(f"Locators that often FAIL in {self.app_name} (prefer alternatives): {common}.")
+        if self.failure_points:
+            common = ", ".join(name for name, _ in self.failure_points.most_common(2))
+            hints.append(f"Past runs in {self.app_name} often got stuck at: {common}.")
+        return " ".join(hints)
@@ -0,0 +1,270 @@
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from helpers.exec_profiles import get_profile, launch_kwargs, context_kwargs, install_blocking
+from helpers.login_wall import is_profile_stale
+from helpers.page_events import PageEventBuffer
+
+PROFILES_ROOT = Path("browser_profiles")
+STORAGE_STATE_FILE = "storage_state.json"
+
+# One export at a time per app profile: the persistent profile dir is locked while open
+_export_locks = {}
+_export_locks_guard = threading.Lock()
+
+
+def _export_lock(app: str) -> threading.Lock:
+    with _export_locks_guard:
+        return _export_locks.setdefault(app, threading.Lock())
+
+
+def profile_processes_rss_kb(user_data_dirs) -> int:
+    """
+    Resident memory (KB) of the Chrome processes running on these profile dirs,
+    from /proc: the browser processes launched with --user-data-dir=<dir> plus
+    all their descendants (renderers, GPU, utility). 0 when /proc is unavailable.
+    """
+    wanted = {f"--user-data-dir={Path(d).resolve()}" for d in user_data_dirs}
+    if not wanted:
+        return 0
+    procs = {}   # pid -> (ppid, rss_kb)
+    roots = []
+    try:
+        entries = [e for e in Path("/proc").iterdir() if e.name.isdigit()]
+    except OSError:
+        return 0
+    for entry in entries:
+        try:
+            ppid, rss = 0, 0
+            for line in (entry / "status").read_text().splitlines():
+                if line.startswith("PPid:"):
+                    ppid = int(line.split()[1])
+                elif line.startswith("VmRSS:"):
+                    rss = int(line.split()[1])
+            procs[int(entry.name)] = (ppid, rss)
+            args = (entry / "cmdline").read_bytes().split(b"\0")
+            if any(a.decode(errors="ignore") in wanted for a in args):
+                roots.append(int(entry.name))
+        except (OSError, ValueError):
+            continue
+    children = {}
+    for pid, (ppid, _) in procs.items():
+        children.setdefault(ppid, []).append(pid)
+    total, stack, seen = 0, list(roots), set()
+    while stack:
+        pid = stack.pop()
+        if pid in seen or pid not in procs:
+            continue
+        seen.add(pid)
+        total += procs[pid][1]
+        stack.extend(children.get(pid, []))
+    return total
+
+
+class BrowserPool:
+    """
+    Keeps browser contexts warm across tasks, one per app, so repeated tasks
+    for the same app skip the Chrome launch and profile load. Least-recently
+    used contexts are closed past `max_contexts`.
+
+    Modes:
+      - "persistent": each app runs in its own Chrome on browser_profiles/<app>
+        (locks the profile; needed for the interactive first login).
+      - "shared": the logged-in state (cookies, localStorage, IndexedDB) is
+        exported once from the persistent profile to storage_state.json, and
+        every app context is a lightweight non-persistent context built from
+        it inside a single browser. Profiles are never locked, so several
+        workers can run the same app at once.
+
+    Playwright's sync API is bound to the thread that started it, so each
+    worker thread owns its own pool (and, in shared mode, its own browser).
+    Pass `cdp_endpoint` to make every pool attach to one externally launched
+    Chrome instead.
+
+    `profile` is an execution profile from helpers/exec_profiles.py
+    ("interactive" headed Chrome, or "production" headless with asset blocking).
+    """
+
+    def __init__(self, max_contexts: int = 3, mode: str = "persistent", cdp_endpoint: str | None = None, profile="interactive"):
+        if mode not in ("persistent", "shared"):
+            raise ValueError(f"Unknown browser pool mode: {mode}")
+        self.max_contexts = max_contexts
+        self.mode = mode
+        self.profile = get_profile(profile)
+        self.cdp_endpoint = cdp_endpoint
+        self.contexts = OrderedDict()       # app -> BrowserContext (LRU order)
+        self.state_paths = {}               # app -> storage_state.json the context was built from
+        self.profile_dirs = {}              # app -> user data dir of its persistent context
+        self.launches = 0
+        self._playwright = None
+        self._browser = None
+
+    def _ensure_started(self):
+        if self._playwright is None:
+            from playwright.sync_api import sync_playwright
+            self._playwright = sync_playwright().start()
+        return self._playwright
+
+    def _shared_browser(self):
+        if self._browser is None or not self._browser.is_connected():
+            p = self._ensure_started()
+            if self.cdp_endpoint:
+                self._browser = p.chromium.connect_over_cdp(self.cdp_endpoint)
+            else:
+                self._browser = p.chromium.launch(**launch_kwargs(self.profile))
+        return self._browser
+
+    def warm_apps(self) -> set:
+        return set(self.contexts)
+
+    def export_storage_state(self, app: str, profile_dir: Path, refresh: bool = False) -> Path:
+        """
+        Export the logged-in state of the persistent profile once
+        (browser_profiles/<app>/storage_state.json) and return its path.
+        """
+        path = Path(profile_dir) / STORAGE_STATE_FILE
+        with _export_lock(app):
+            if path.exists() and not refresh:
+                return path
+            p = self._ensure_started()
+            ctx = p.chromium.launch_persistent_context(user_data_dir=str(profile_dir), headless=True, channel="chrome")
+            try:
+                try:
+                    ctx.storage_state(path=str(path), indexed_db=True)
+                except TypeError:
+                    # Playwright < 1.51 has no IndexedDB export
+                    ctx.storage_state(path=str(path))
+            finally:
+                ctx.close()
+            print(f"[INFO] Exported logged-in state for {app} to {path}")
+        return path
+
+    def context(self, app: str, profile_dir: Path):
+        """Warm context for `app`, creating it if needed."""
+        ctx = self.contexts.get(app)
+        if ctx is not None:
+            self.contexts.move_to_end(app)
+            return ctx
+
+        while len(self.contexts) >= self.max_contexts:
+            self.close(next(iter(self.contexts)))
+
+        if self.mode == "shared":
+            # No profile → anonymous context (benchmarks, public pages)
+            state_path = self.export_storage_state(app, profile_dir) if profile_dir is not None else None
+            state = {"storage_state": str(state_path)} if state_path is not None else {}
+            ctx = self._shared_browser().new_context(**state, **context_kwargs(self.profile))
+            if state_path is not None:
+                self.state_paths[app] = state_path
+        else:
+            p = self._ensure_started()
+            ctx = p.chromium.launch_persistent_context(
+                user_data_dir=str(profile_dir),
+                **launch_kwargs(self.profile, persistent=True),
+            )
+            self.profile_dirs[app] = profile_dir
+        install_blocking(ctx, self.profile)
+        self.contexts[app] = ctx
+        self.launches += 1
+        print(f"[INFO] Opened {self.mode} browser context for {app} ({self.profile.get('name', 'custom')} profile, {len(self.contexts)} warm)")
+        return ctx
+
+    def new_page(self, app: str, profile_dir: Path):
+        """Open a fresh page in the app's warm context with a CDP event collector attached.
+
+        Returns (page, events); events is None when CDP is unavailable.
+        """
+        ctx = self.context(app, profile_dir)
+        try:
+            page = ctx.new_page()
+        except Exception:
+            # Context died (browser closed by hand, crash) → relaunch once
+            self.close(app)
+            ctx = self.context(app, profile_dir)
+            page = ctx.new_page()
+        return page, PageEventBuffer.attach(page)
+
+    def memory_mb(self) -> float | None:
+        """Resident memory of this pool's browser processes (Linux /proc; CDP process list for
+        launched/connected browsers, profile-dir process trees for persistent contexts),
+        or JS heap as a fallback."""
+        browsers = {id(ctx.browser): ctx.browser for ctx in self.contexts.values() if ctx.browser is not None}
+        if self._browser is not None:
+            browsers[id(self._browser)] = self._browser
+        total_kb = 0
+        heap_bytes = 0
+        for browser in browsers.values():
+            try:
+                session = browser.new_browser_cdp_session()
+                info = session.send("SystemInfo.getProcessInfo")
+                session.detach()
+            except Exception:
+                info = {"processInfo": []}
+            for proc in info.get("processInfo", []):
+                try:
+                    with open(f"/proc/{proc['id']}/status") as f:
+                        for line in f:
+                            if line.startswith("VmRSS:"):
+                                total_kb += int(line.split()[1])
+                                break
+                except (OSError, KeyError, ValueError):
+                    continue
+        if not total_kb and self.profile_dirs:
+            # Persistent contexts have no Browser object (ctx.browser is None): find their processes
+            total_kb = profile_processes_rss_kb(self.profile_dirs.values())
+        if total_kb:
+            return round(total_kb / 1024, 1)
+        for ctx in self.contexts.values():
+            for page in ctx.pages:
+                try:
+                    heap_bytes += page.evaluate("() => performance.memory ? performance.memory.usedJSHeapSize : 0")
+                except Exception:
+                    continue
+        return round(heap_bytes / 1024 / 1024, 1) if heap_bytes else None
+
+    def release(self, page, events=None):
+        """Close a task's page but keep its context warm."""
+        if events is not None:
+            events.detach()
+        try:
+            page.close()
+        except Exception:
+            pass
+
+    def close(self, app: str | None = None, save_state: bool = True):
+        """Close one app's context, or everything (including Playwright) when app is None.
+
+        Pass save_state=False when the context's session expired: its logged-out
+        cookies must not overwrite the exported login.
+        """
+        apps = [app] if app is not None else list(self.contexts)
+        for name in apps:
+            ctx = self.contexts.pop(name, None)
+            if ctx is None:
+                continue
+            state_path = self.state_paths.pop(name, None)
+            self.profile_dirs.pop(name, None)
+            try:
+                if state_path is not None and save_state:
+                    # Carry refreshed cookies/tokens back so the next clone starts from them,
+                    # unless the profile was flagged stale or its export deleted meanwhile
+                    with _export_lock(name):
+                        if state_path.exists() and not is_profile_stale(state_path.parent):
+                            ctx.storage_state(path=str(state_path))
+                ctx.close()
+            except Exception:
+                pass
+        if app is None:
+            if self._browser is not None:
+                try:
+                    self._browser.close()
+                except Exception:
+                    pass
+                self._browser = None
+            if self._playwright is not None:
+                try:
+                    self._playwright.stop()
+                except Exception:
+                    pass
+                self._playwright = None
@@ -0,0 +1,141 @@
+import re
+
+from helpers.element_ranker import LIVE_REGION_SELECTOR
+
+# Goal intents we can verify without the LLM, keyed by the verbs that express them
+GOAL_INTENTS = {
+    "create": ("create", "add", "new", "make", "start"),
+    "comment": ("comment", "reply", "post"),
+    "update": ("change", "update", "set", "rename", "edit", "modify", "assign", "move", "mark"),
+    "delete": ("delete", "remove", "archive", "trash"),
+}
+
+# Generic toast wording per intent (used for every app)
+DEFAULT_TOAST_PATTERNS = {
+    "create": [r"\b(created|added)\b", r"\bnew .+ (created|added)\b"],
+    "comment": [r"\bcomment (added|posted|sent)\b", r"\b(posted|replied)\b"],
+    "update": [r"\b(updated|changed|saved|renamed|assigned|moved|marked)\b"],
+    "delete": [r"\b(deleted|removed|archived|moved to trash)\b"],
+}
+
+ERROR_TOAST_PATTERNS = [
+    r"\b(error|failed|failure|couldn'?t|could not|unable to|something went wrong|try again)\b",
+]
+
+# Per-app patterns: extra toast wording and URLs of freshly opened items
+APP_RULES = {
+    "linear": {
+        "toast": {
+            "create": [r"\b(issue|project|cycle|view) created\b"],
+        },
+        "item_url": [r"/issue/[A-Z][A-Z0-9]*-\d+", r"/project/[^/?#]+"],
+    },
+    "notion": {
+        "toast": {},
+        "item_url": [r"notion\.so/(?:[^/?#]+/)?(?:[^/?#]*-)?[0-9a-f]{32}"],
+    },
+    "asana": {
+        "toast": {
+            "create": [r"\b(task|project|section) (was )?created\b"],
+            "update": [r"\b(task|project) (was )?(updated|moved)\b", r"\bmarked (as )?complete\b"],
+        },
+        "item_url": [r"/\d+/project/\d+", r"/0/\d+/\d+", r"/task/\d+"],
+    },
+}
+
+# Remembers the live-region texts on the page before an action, so the scan
+# after it can tell new toasts from persistent chrome ("Saved", "Updated 2h ago")
+ALERT_MARK_SCRIPT = """
+(sel) => {
+    window.__stAlertMark = Array.from(document.querySelectorAll(sel))
+        .map(el => (el.innerText || '').trim()).filter(Boolean);
+}
+"""
+
+_compiled = {}
+
+
+def mark_alerts(page) -> None:
+    """Call right before an action whose result may be judged by a success toast."""
+    try:
+        page.evaluate(ALERT_MARK_SCRIPT, LIVE_REGION_SELECTOR)
+    except Exception:
+        pass
+
+
+def _patterns(raw: list) -> list:
+    key = tuple(raw)
+    if key not in _compiled:
+        _compiled[key] = [re.compile(p, re.I) for p in raw]
+    return _compiled[key]
+
+
+def goal_intent(goal: str) -> str | None:
+    """Map a goal sentence to one of GOAL_INTENTS, or None if no verb matches."""
+    words = re.findall(r"[a-z]+", (goal or "").lower())
+    if not words:
+        return None
+    # The leading verb decides ("add a comment" is a comment, not a create)
+    if "comment" in words or "reply" in words:
+        return "comment"
+    for word in words[:3]:
+        for intent, verbs in GOAL_INTENTS.items():
+            if word in verbs:
+                return intent
+    return None
+
+
+def quick_completion_verdict(
+        goal: str,
+        app_name: str,
+        alerts: list,
+        url_before: str | None = None,
+        url_after: str | None = None,
+        clickables: list | None = None,
+        filled_values: list | None = None,
+        failed_writes: int = 0,
+    ) -> tuple[bool | None, str]:
+    """
+    Decide the obvious completion cases locally.
+    Returns (True, reason) / (False, reason) when the page state is conclusive,
+    or (None, "") when the LLM verifier should decide.
+    """
+    intent = goal_intent(goal)
+    rules = APP_RULES.get((app_name or "").lower(), {})
+    # Only live regions that appeared after the action (mark_alerts) count as toasts:
+    # page chrome like "Created 3 days ago" or a stale "Failed to sync" banner is not one
+    fresh_texts = [(a.get("text") or "").strip() for a in (alerts or []) if a.get("text") and a.get("live") and a.get("fresh")]
+
+    # 1) Failed write requests or error toasts: the action obviously did not go through
+    if failed_writes:
+        return False, f"{failed_writes} write request(s) failed"
+    for text in fresh_texts:
+        if any(p.search(text) for p in _patterns(ERROR_TOAST_PATTERNS)):
+            return False, f"error toast present: '{text[:80]}'"
+
+    if intent is None:
+        return None, ""
+
+    # 2) Success toast that matches the goal's intent
+    toast_raw = DEFAULT_TOAST_PATTERNS.get(intent, []) + rules.get("toast", {}).get(intent, [])
+    for text in fresh_texts:
+        if any(p.search(text) for p in _patterns(toast_raw)):
+            return True, f"success toast: '{text[:80]}'"
+
+    # 3) URL switched to a freshly created item's page
+    if intent == "create" and url_after and url_before and url_after != url_before:
+        item_patterns = _patterns(rules.get("item_url", []))
+        if any(p.search(url_after) for p in item_patterns) and not any(p.search(url_before) for p in item_patterns):
+            return True, f"navigated to new item page: {url_after}"
+
+    # 4) New list row / link carrying a value we typed earlier
+    if intent == "create" and filled_values and clickables:
+        labels = [(c.get("text") or c.get("title") or "") for c in clickables]
+        for value in filled_values:
+            value = (value or "").strip()
+            if len(value) < 6:
+                continue
+            if any(value in label for label in labels):
+                return True, f"new item '{value}' visible in list"
+
+    return None, ""
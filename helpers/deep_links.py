@@ -0,0 +1,138 @@
+import re
+from urllib.parse import urlsplit, urlunsplit
+
+from helpers.action_model import Action
+from helpers.element_ranker import tokenize
+from helpers.menu_resolver import POPUP_SELECTOR
+
+# Linear/Jira-style issue keys (ENG-42)
+ISSUE_ID = re.compile(r"\b[A-Z][A-Z0-9]{1,9}-\d+\b")
+# Where a page's own key appears: its issue path segment (/issue/ENG-42/..., /browse/ENG-42)
+# and the start of its title ("ENG-42 Fix login", "[ENG-42] ..."); other keys are mentions
+ISSUE_PATH = re.compile(r"/(?:issue|issues|browse)/([A-Za-z][A-Za-z0-9]{1,9}-\d+)(?=/|$)")
+TITLE_KEY = re.compile(r"^\W*([A-Z][A-Z0-9]{1,9}-\d+)\b")
+# Buttons that do something rather than open something; a URL change after them is a side effect
+ACTION_WORDS = {
+    "create", "new", "add", "save", "delete", "remove", "submit", "post", "send", "update", "edit",
+    "archive", "duplicate", "share", "invite", "move", "copy", "publish", "done", "confirm", "ok", "back",
+}
+MIN_ENTITY_LEN = 4
+# Clicks that open something; options, menu items and checkboxes pick a value in a form instead
+REWRITE_ROLES = ("link", "row", "gridcell", "listitem")
+# A half-filled form or an open picker would be thrown away by navigating
+OVERLAY_SELECTOR = f"[role='dialog'], [role='alertdialog'], [aria-modal='true'], dialog[open], {POPUP_SELECTOR}"
+OVERLAY_SCRIPT = "(sel) => Array.from(document.querySelectorAll(sel)).some(el => el.getClientRects().length > 0)"
+NEW_NAME = re.compile(r"\b(called|named|titled)\s+[\"'“‘]?$")
+
+
+def _norm(text: str) -> str:
+    return " ".join((text or "").lower().split())
+
+
+def _clean_url(url: str) -> str:
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, parts.query, ""))
+
+
+def same_page(a: str, b: str) -> bool:
+    return _clean_url(a).rstrip("/") == _clean_url(b).rstrip("/")
+
+
+def issue_keys(url: str, title: str) -> set:
+    """The page's own issue key(s), lowercased: from the issue path segment and the title's leading key."""
+    keys = {m.lower() for m in ISSUE_PATH.findall(urlsplit(url).path)}
+    m = TITLE_KEY.match(title or "")
+    if m:
+        keys.add(m.group(1).lower())
+    return keys
+
+
+def _about(entity: str, url: str, title: str) -> bool:
+    """Does the page at `url` titled `title` show `entity`? Most of its words must be in the title or path."""
+    words = tokenize(entity)
+    if not words:
+        return False
+    page_words = set(tokenize(title)) | set(tokenize(urlsplit(url).path.replace("-", " ")))
+    return sum(w in page_words for w in words) * 2 >= len(words)
+
+
+class DeepLinkIndex:
+    """
+    Per-app index of entity -> URL learned from clicks that opened a page about
+    the clicked item. Known entities are opened with a direct goto instead of
+    clicking through lists.
+    """
+
+    def __init__(self, store, app: str):
+        self.store = store
+        self.app = app
+        self.urls = store.entity_urls(app)
+
+    def lookup(self, label: str) -> str | None:
+        return self.urls.get(_norm(label))
+
+    def match_goal(self, goal: str, current_url: str) -> tuple[str, str] | None:
+        """Longest known entity named in the goal whose page is not already open."""
+        text = f" {_norm(goal)} "
+        best = None
+        for entity, url in self.urls.items():
+            if len(entity) < MIN_ENTITY_LEN and not ISSUE_ID.fullmatch(entity.upper()):
+                continue
+            m = re.search(rf"(?<!\w){re.escape(entity)}(?!\w)", text)
+            # "a project called Apollo" names something to create, not something to open
+            if not m or NEW_NAME.search(text, 0, m.start()) or same_page(url, current_url):
+                continue
+            if best is None or len(entity) > len(best[0]):
+                best = (entity, url)
+        return best
+
+    def rewrite(self, action: Action, page) -> Action:
+        """A link/row click on a known entity becomes a goto to its URL, unless a dialog or
+        menu is open; anything else is returned unchanged."""
+        if action.type != "click" or action.value or action.locator.get("role") not in REWRITE_ROLES:
+            return action
+        entity = _norm(action.target())
+        url = self.urls.get(entity)
+        if not url or same_page(url, page.url):
+            return action
+        try:
+            if page.evaluate(OVERLAY_SCRIPT, OVERLAY_SELECTOR):
+                return action
+        except Exception:
+            return action
+        print(f"[DEEPLINK] click [{action.target()}] -> goto {url}")
+        return Action(type="goto", label=action.label, locator=action.locator, url=url, reasoning=action.reasoning)
+
+    def goto(self, entity: str, url: str) -> Action:
+        """Action opening a known entity directly (step 1 when the goal names it)."""
+        print(f"[DEEPLINK] Goal names '{entity}' -> goto {url}")
+        return Action(type="goto", label=f"open {entity}", url=url)
+
+    def observe(self, action: Action, status: str, url_before: str, page):
+        """Learn from a click that opened an entity page; forget links that no longer lead there."""
+        try:
+            url = page.url
+            if action.type == "goto":
+                stale = [e for e, u in self.urls.items() if u == action.url]
+                if stale and (status != "success" or not urlsplit(url).path.startswith(urlsplit(action.url).path.rstrip("/"))):
+                    print(f"[DEEPLINK] {action.url} no longer opens {', '.join(stale)}; forgetting it")
+                    for entity in stale:
+                        self.urls.pop(entity, None)
+                        self.store.drop_entity_url(self.app, entity)
+                return
+            if action.type != "click" or status != "success" or same_page(url, url_before):
+                return
+            entity = _norm(action.target())
+            words = entity.split()
+            if not words or entity == "unknown" or words[0] in ACTION_WORDS:
+                return
+            title = page.title()
+            if urlsplit(url).path.strip("/") == "" or not _about(entity, url, title):
+                return
+            url = _clean_url(url)
+            entities = {entity} | issue_keys(url, title)
+            for name in entities:
+                self.urls[name] = url
+                self.store.save_entity_url(self.app, name, url)
+        except Exception as e:
+            print(f"[WARNING] Deep-link index not updated: {e}")
@@ -0,0 +1,180 @@
+import base64
+import json
+import time
+from collections import deque
+from pathlib import Path
+
+# "full": before/after full-page screenshots every step (the classic trail)
+# "failures": only the in-memory ring buffer; artifacts are written when something fails
+ARTIFACT_MODES = ("full", "failures")
+RING_SIZE = 8
+THUMB_SCALE = 0.25
+THUMB_QUALITY = 40
+MAX_BUNDLES = 3            # failure bundles per run; later failures are only counted
+HAR_MAX_ENTRIES = 300
+DIAGNOSTICS_DIR = "diagnostics"
+
+
+def har_slice(entries, since_ts: float | None = None, limit: int = HAR_MAX_ENTRIES) -> dict:
+    """HAR 1.2 document from PageEventBuffer.network entries started at or after `since_ts` (monotonic)."""
+    rows = [e for e in list(entries) if since_ts is None or e.get("ts", 0) >= since_ts][-limit:]
+    har_entries = []
+    for e in rows:
+        started = e.get("started") or time.time()
+        har_entries.append({
+            "startedDateTime": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(started)) + f".{int(started % 1 * 1000):03d}Z",
+            "time": e.get("duration_ms") if e.get("duration_ms") is not None else -1,
+            "request": {"method": e.get("method", "GET"), "url": e.get("url", ""), "httpVersion": "HTTP/1.1",
+                        "headers": [], "queryString": [], "cookies": [], "headersSize": -1, "bodySize": -1},
+            "response": {"status": e.get("status") or 0, "statusText": e.get("error", ""), "httpVersion": "HTTP/1.1",
+                         "headers": [], "cookies": [], "content": {"size": -1, "mimeType": e.get("mime", "")},
+                         "redirectURL": "", "headersSize": -1, "bodySize": -1},
+            "cache": {},
+            "timings": {"send": 0, "wait": e.get("duration_ms") if e.get("duration_ms") is not None else -1, "receive": 0},
+            "_resourceType": e.get("type", ""),
+            "_pending": e.get("duration_ms") is None,
+        })
+    return {"log": {"version": "1.2", "creator": {"name": "screentrail", "version": "1"}, "entries": har_entries}}
+
+
+class DiagnosticsRecorder:
+    """
+    Per-run failure diagnostics. Every step adds a cheap state to a ring buffer
+    (URL, DOM fingerprint, top hints, small viewport JPEG) kept in memory; when
+    a step fails or the run aborts, a bundle is written to
+    <task folder>/diagnostics/: the Playwright trace chunk of the run so far,
+    a full-page screenshot, the HAR slice and console errors since the run
+    started, and the ring buffer. Successful runs write nothing.
+    """
+
+    def __init__(self, mode: str = "failures", size: int = RING_SIZE):
+        if mode not in ARTIFACT_MODES:
+            raise ValueError(f"Unknown artifact mode: {mode} (choose from {', '.join(ARTIFACT_MODES)})")
+        self.mode = mode
+        self.states = deque(maxlen=size)
+        self.bundles = 0
+        self._page = None
+        self._events = None
+        self._tracing = False
+        self._since_ts = None
+        self._since_wall = None
+        self._viewport = None
+
+    def begin(self, page, events=None):
+        """Start a run: clear the ring and open a trace chunk on the page's context."""
+        self.states.clear()
+        self.bundles = 0
+        self._page = page
+        self._events = events
+        self._since_ts = time.monotonic()
+        self._since_wall = time.time()
+        self._viewport = page.viewport_size
+        tracing = page.context.tracing
+        try:
+            # Once per context; DOM snapshots only (screenshots are what the ring is for)
+            tracing.start(snapshots=True, screenshots=False)
+        except Exception:
+            pass  # already tracing from an earlier run in this warm context
+        try:
+            tracing.start_chunk()
+            self._tracing = True
+        except Exception as e:
+            print(f"[WARNING] Playwright tracing unavailable: {e}")
+            self._tracing = False
+
+    def end(self):
+        """Finish a run: drop the trace chunk if no failure exported it."""
+        if self._tracing:
+            try:
+                self._page.context.tracing.stop_chunk()
+            except Exception:
+                pass
+        self._tracing = False
+        self._page = None
+        self._events = None
+
+    def _thumbnail(self, page) -> bytes | None:
+        try:
+            if self._events is not None:
+                if self._viewport is None:
+                    self._viewport = page.evaluate("() => ({width: innerWidth, height: innerHeight})")
+                shot = self._events.session.send("Page.captureScreenshot", {
+                    "format": "jpeg",
+                    "quality": THUMB_QUALITY,
+                    "clip": {"x": 0, "y": 0, **self._viewport, "scale": THUMB_SCALE},
+                })
+                return base64.b64decode(shot["data"])
+            return page.screenshot(type="jpeg", quality=THUMB_QUALITY // 2)
+        except Exception:
+            return None
+
+    def record(self, page, step: int, label: str, status: str, fingerprint: str, hints: dict | None = None):
+        """Push one lightweight page state (one CDP screenshot call, no disk I/O)."""
+        hints = hints or {}
+        self.states.append({
+            "step": step,
+            "label": label,
+            "status": status,
+            "ts": time.time(),
+            "url": page.url,
+            "fingerprint": fingerprint,
+            "buttons": [b.get("text") or b.get("aria-label") for b in hints.get("buttons", [])[:10]],
+            "inputs": [i.get("aria-label") or i.get("placeholder") or i.get("name") for i in hints.get("inputs", [])[:10]],
+            "alerts": [a.get("text") for a in hints.get("alerts", [])[:5]],
+            "thumb": self._thumbnail(page),
+        })
+
+    def capture(self, folder: Path, reason: str, step: int | None = None, store=None, run_id: int | None = None) -> Path | None:
+        """Write the failure bundle; returns its folder (None once MAX_BUNDLES were written)."""
+        page = self._page
+        if page is None:
+            return None
+        self.bundles += 1
+        if self.bundles > MAX_BUNDLES:
+            return None
+        tag = f"step_{step:02d}" if step is not None else "abort"
+        out = Path(folder) / DIAGNOSTICS_DIR / tag
+        out.mkdir(parents=True, exist_ok=True)
+        seq = 1000 + (step or 0)     # artifact rows after the screenshots of the run
+        written = []
+
+        def register(kind: str, path: Path):
+            written.append(path.name)
+            if store is not None and run_id is not None:
+                try:
+                    store.add_artifact(run_id, seq, kind, path, size=path.stat().st_size)
+                except Exception:
+                    pass
+
+        if self._tracing:
+            try:
+                page.context.tracing.stop_chunk(path=str(out / "trace.zip"))
+                register("trace", out / "trace.zip")
+                page.context.tracing.start_chunk()
+            except Exception as e:
+                print(f"[WARNING] Could not export trace: {e}")
+                self._tracing = False
+        try:
+            (out / "page.png").write_bytes(page.screenshot(full_page=True))
+            register("failure_screenshot", out / "page.png")
+        except Exception:
+            pass
+        if self._events is not None:
+            (out / "network.har").write_text(json.dumps(har_slice(self._events.network, self._since_ts)), encoding="utf-8")
+            register("har", out / "network.har")
+            (out / "console.json").write_text(json.dumps([c for c in self._events.console_errors if c["ts"] >= self._since_wall], indent=2, ensure_ascii=False), encoding="utf-8")
+            register("console", out / "console.json")
+
+        states = []
+        for state in self.states:
+            state = dict(state)
+            thumb = state.pop("thumb", None)
+            if thumb:
+                name = f"state_{state['step']:02d}.jpg"
+                (out / name).write_bytes(thumb)
+                state["thumb"] = name
+            states.append(state)
+        (out / "states.json").write_text(json.dumps({"reason": reason, "url": page.url, "states": states}, indent=2, ensure_ascii=False), encoding="utf-8")
+        register("states", out / "states.json")
+        print(f"[DIAG] Wrote {len(written)} diagnostics files to {out}")
+        return out
@@ -0,0 +1,170 @@
+import re
+
+# Words that never help tell one element from another
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "to", "in", "on", "for", "with", "by", "at", "from", "as",
+    "is", "it", "its", "this", "that", "be", "into", "my", "me", "i", "we", "our", "your", "new",
+    "please", "can", "you", "then", "set", "make", "called", "named",
+}
+
+# Weights of query terms by source
+GOAL_WEIGHT = 1.0
+PHRASE_WEIGHT = 3.0        # quoted values in the goal ('Done', "Q3 roadmap")
+HISTORY_WEIGHT = 0.4       # labels the agent recently looked for
+MIN_TOKEN_LEN = 2
+# ARIA live regions: toasts and status messages the app announces
+LIVE_REGION_SELECTOR = '[role="alert"], [role="status"], [aria-live="polite"], [aria-live="assertive"]'
+PREFIX_LEN = 4             # fuzzy match: shared 4-char prefix ("priorit" ~ "priority")
+
+_token_re = re.compile(r"\w+", re.U)
+_quoted_re = re.compile(r"[\"'“‘]([^\"'”’]{2,60})[\"'”’]")
+
+
+def tokenize(text: str) -> list:
+    return [t for t in _token_re.findall((text or "").lower()) if len(t) >= MIN_TOKEN_LEN and t not in STOPWORDS]
+
+
+def build_query(goal: str, history=None) -> dict:
+    """
+    Weighted query for SCAN_SCRIPT from the goal and recent steps.
+    Elements the agent already used successfully are down-ranked (no need to
+    click/fill them again); failed ones are down-ranked harder.
+    """
+    terms = {}
+    for token in tokenize(goal):
+        terms[token] = max(terms.get(token, 0), GOAL_WEIGHT)
+    phrases = [p.strip().lower() for p in _quoted_re.findall(goal or "") if p.strip()]
+    used, failed = [], []
+    for record in list(history or [])[-5:]:
+        target = record.target().lower() if record.target() != "unknown" else ""
+        if not target:
+            continue
+        for token in tokenize(target):
+            terms.setdefault(token, HISTORY_WEIGHT)
+        (used if record.status == "success" else failed).append(target)
+    return {"terms": terms, "phrases": phrases, "used": used, "failed": failed, "prefixLen": PREFIX_LEN, "phraseWeight": PHRASE_WEIGHT}
+
+
+# One round-trip scan + rank. A single compiled regex prefilters precomputed
+# lowercase labels, candidates get a few native indexOf calls, and a bounded
+# top-K pass replaces sorting, so ranking stays under a millisecond for
+# thousands of elements; only the top-K cross the CDP boundary.
+SCAN_SCRIPT = """
+({query, topInputs, topButtons, topAlerts, maxText, liveSel}) => {
+    const t0 = performance.now();
+    const visible = el => {
+        if (!el.getClientRects().length) return false;
+        return getComputedStyle(el).visibility !== 'hidden';
+    };
+    const clip = s => (s || '').trim().slice(0, maxText);
+    const attr = (el, n) => (el.getAttribute(n) || '').trim();
+
+    const inputs = [], inputLabels = [];
+    for (const el of document.querySelectorAll('input, textarea, [contenteditable="true"], [role="textbox"]')) {
+        const tag = el.tagName.toLowerCase();
+        const value = clip(tag === 'input' || tag === 'textarea' ? el.value : el.innerText);
+        inputs.push({
+            'aria-label': attr(el, 'aria-label'), name: attr(el, 'name'), id: attr(el, 'id'),
+            placeholder: attr(el, 'placeholder'), tag, value, empty: !value,
+        });
+        const i = inputs[inputs.length - 1];
+        inputLabels.push(`${i['aria-label']} ${i.name} ${i.id} ${i.placeholder}`.toLowerCase());
+    }
+
+    const buttons = [], buttonLabels = [];
+    const sel = 'button, [role="button"], a[onclick], input[type="button"], input[type="submit"], a[href], [role="link"]';
+    for (const el of document.querySelectorAll(sel)) {
+        const text = clip(el.innerText);
+        const aria = attr(el, 'aria-label');
+        const title = attr(el, 'title');
+        if (!(text || aria || title) || !visible(el)) continue;
+        const role = (el.getAttribute('role') || el.tagName.toLowerCase()).trim();
+        const info = {
+            text, 'aria-label': text ? '' : aria, title, id: attr(el, 'id'), name: attr(el, 'name'),
+            role: ['button', 'link', 'a'].includes(role) ? role : 'button',
+        };
+        if (!text && (aria || title)) info.type = 'icon';
+        buttons.push(info);
+        buttonLabels.push(`${text} ${aria} ${title} ${info.name}`.toLowerCase());
+    }
+
+    // Live regions are where apps announce results; `fresh` ones were not there
+    // before the action (window.__stAlertMark, see completion_rules.mark_alerts)
+    const alerts = [];
+    const alertSel = `${liveSel}, .toast, .notification, .message, [class*="toast"], [class*="alert"], [class*="message"], [class*="notification"]`;
+    const before = window.__stAlertMark;
+    for (const el of document.querySelectorAll(alertSel)) {
+        const text = (el.innerText || '').trim();
+        if (!text) continue;
+        const alert = {text, type: 'alert/toast/notification'};
+        if (el.closest(liveSel)) {
+            alert.live = true;
+            if (before && !before.includes(text)) alert.fresh = true;
+        }
+        alerts.push(alert);
+    }
+    const t1 = performance.now();
+
+    if (!query) {
+        return {inputs, buttons, alerts, stats: {inputs: inputs.length, buttons: buttons.length, scan_ms: t1 - t0, rank_ms: 0}};
+    }
+
+    // Ranking: whole-word term hits, shared-prefix fuzzy hits, quoted-phrase hits.
+    // Labels are lowercased once; one compiled regex over every term/prefix
+    // rejects non-matching labels natively, so only candidates get scored,
+    // and only the top-K survive a bounded insertion pass (no full sort).
+    const T = Object.keys(query.terms), W = T.map(t => query.terms[t]);
+    const P = T.map(t => t.length >= query.prefixLen ? t.slice(0, query.prefixLen) : null);
+    const esc = s => s.replace(/[.*+?^${}()|[\\]\\\\]/g, '\\\\$&');
+    const needles = T.map((t, j) => P[j] || t).concat(query.phrases).filter(Boolean).map(esc);
+    const any = needles.length ? new RegExp(needles.join('|')) : null;
+    const isWord = k => (k >= 48 && k <= 57) || (k >= 97 && k <= 122) || k === 95 || k > 127;
+    const score = (label, bonus) => {
+        if (any === null || !any.test(label)) return bonus;
+        let s = bonus;
+        for (let j = 0; j < T.length; j++) {
+            const at = label.indexOf(T[j]);
+            if (at !== -1 && !(at > 0 && isWord(label.charCodeAt(at - 1))) && !isWord(label.charCodeAt(at + T[j].length))) s += W[j];
+            else if (P[j] !== null && label.indexOf(P[j]) !== -1) s += W[j] * 0.5;
+        }
+        for (let j = 0; j < query.phrases.length; j++) if (label.indexOf(query.phrases[j]) !== -1) s += query.phraseWeight;
+        for (let j = 0; j < query.failed.length; j++) if (label.indexOf(query.failed[j]) !== -1) s *= 0.3;
+        for (let j = 0; j < query.used.length; j++) if (label.indexOf(query.used[j]) !== -1) s *= 0.6;
+        return s;
+    };
+    const rank = (items, labels, bonusOf, k) => {
+        const top = [];   // [score, index], best first; ties keep DOM order
+        for (let i = 0; i < items.length; i++) {
+            const s = score(labels[i], bonusOf(items[i]));
+            if (top.length === k && s <= top[k - 1][0]) continue;
+            let j = top.length < k ? top.length : k - 1;
+            while (j > 0 && top[j - 1][0] < s) { top[j] = top[j - 1]; j--; }
+            top[j] = [s, i];
+        }
+        return top.map(([s, i]) => Object.assign(items[i], {score: Math.round(s * 100) / 100}));
+    };
+    const rankedInputs = rank(inputs, inputLabels, e => e.empty ? 0.25 : 0, topInputs);
+    const rankedButtons = rank(buttons, buttonLabels, () => 0, topButtons);
+    const t2 = performance.now();
+    return {
+        inputs: rankedInputs, buttons: rankedButtons, alerts: alerts.slice(0, topAlerts),
+        stats: {inputs: inputs.length, buttons: buttons.length, scan_ms: t1 - t0, rank_ms: t2 - t1},
+    };
+}
+"""
+
+
+def scan_elements(page, query: dict | None = None, top_inputs: int = 20, top_buttons: int = 15, top_alerts: int = 10, max_text: int = 300) -> dict:
+    """
+    Scan inputs, buttons/links and alerts in one evaluate. With a `query`
+    (see build_query) the inputs and buttons come back ranked, best first,
+    cut to the top-K; without one everything is returned in DOM order.
+    """
+    return page.evaluate(SCAN_SCRIPT, {
+        "query": query,
+        "topInputs": top_inputs,
+        "topButtons": top_buttons,
+        "topAlerts": top_alerts,
+        "maxText": max_text,
+        "liveSel": LIVE_REGION_SELECTOR,
+    })
@@ -0,0 +1,94 @@
+from urllib.parse import urlparse
+
+# Third-party analytics/telemetry hosts that never matter for driving the UI
+TRACKER_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "segment.io",
+    "segment.com",
+    "mixpanel.com",
+    "amplitude.com",
+    "heap.io",
+    "hotjar.com",
+    "fullstory.com",
+    "intercom.io",
+    "intercomcdn.com",
+    "sentry.io",
+    "browser-intake-datadoghq.com",
+    "clarity.ms",
+)
+
+EXECUTION_PROFILES = {
+    # Headed Chrome with slow-mo: first-time login, debugging, demos
+    "interactive": {
+        "headless": False,
+        "channel": "chrome",
+        "slow_mo": 200,
+        "viewport": None,
+        "block_resources": (),
+        "block_trackers": False,
+        "artifacts": "full",
+    },
+    # Throughput: headless Chromium, no slow-mo, smaller viewport, no heavy assets.
+    # Persistent profiles keep channel="chrome" (Chrome-encrypted cookies are not
+    # readable by bundled Chromium); cloned contexts use bundled Chromium.
+    "production": {
+        "headless": True,
+        "channel": None,
+        "slow_mo": 0,
+        "viewport": {"width": 1280, "height": 800},
+        "block_resources": ("image", "media", "font"),
+        "block_trackers": True,
+        # Screenshots/traces only when a step fails (helpers/diagnostics.py)
+        "artifacts": "failures",
+    },
+}
+
+
+def get_profile(name_or_profile) -> dict:
+    """Resolve a profile name (or pass a dict through), raising on unknown names."""
+    if isinstance(name_or_profile, dict):
+        return name_or_profile
+    try:
+        return {"name": name_or_profile, **EXECUTION_PROFILES[name_or_profile]}
+    except KeyError:
+        raise ValueError(f"Unknown execution profile: {name_or_profile} (choose from {', '.join(EXECUTION_PROFILES)})")
+
+
+def launch_kwargs(profile: dict, persistent: bool = False) -> dict:
+    """Keyword arguments for chromium.launch / launch_persistent_context."""
+    kwargs = {"headless": profile["headless"], "slow_mo": profile["slow_mo"]}
+    channel = "chrome" if persistent else profile["channel"]
+    if channel:
+        kwargs["channel"] = channel
+    if persistent and profile["viewport"]:
+        kwargs["viewport"] = profile["viewport"]
+    return kwargs
+
+
+def context_kwargs(profile: dict) -> dict:
+    """Keyword arguments for browser.new_context."""
+    return {"viewport": profile["viewport"]} if profile["viewport"] else {}
+
+
+def is_tracker(url: str) -> bool:
+    host = urlparse(url).hostname or ""
+    return any(host == t or host.endswith("." + t) for t in TRACKER_HOSTS)
+
+
+def install_blocking(context, profile: dict) -> None:
+    """Abort requests for blocked resource types and tracker hosts on this context."""
+    blocked_types = set(profile["block_resources"])
+    block_trackers = profile["block_trackers"]
+    if not blocked_types and not block_trackers:
+        return
+
+    def handler(route):
+        request = route.request
+        if request.resource_type in blocked_types or (block_trackers and is_tracker(request.url)):
+            route.abort()
+        else:
+            route.continue_()
+
+    context.route("**/*", handler)
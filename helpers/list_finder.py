@@ -0,0 +1,231 @@
+import itertools
+
+# Rows of lists, tables, trees and boards in the common UI kits
+ROW_SELECTOR = (
+    "[role='row'], [role='listitem'], [role='option'], [role='treeitem'], [role='gridcell'], "
+    "[role='link'], li, tr, a[href]"
+)
+# The app's own search/filter box (never a command palette that first needs a shortcut)
+SEARCH_SELECTOR = (
+    "input[type='search'], [role='searchbox'], input[placeholder*='search' i], input[placeholder*='filter' i], "
+    "input[aria-label*='search' i], input[aria-label*='filter' i]"
+)
+PICK_ATTR = "data-st-list-pick"
+MAX_SCROLLS = 40
+TIMEOUT_MS = 8000
+
+_pick_ids = itertools.count(1)
+
+# Finds `text` among list rows, scrolling the list's own scroll container when
+# it is not rendered. One evaluate runs the whole loop:
+#   - container: the largest visible scrollable element holding >= 3 rows
+#     (falls back to the document scroller)
+#   - step starts at 85% of the viewport; it grows while consecutive scans
+#     overlap (no row skipped) and shrinks with a step back when they don't,
+#     since virtualized lists only render the viewport plus a small overscan
+#   - after each scroll it waits two frames, and up to 250 ms for mutations
+#     when nothing new rendered (lazy loading), then scans only unseen rows
+#   - at the bottom it wraps to the top once if it did not start there
+# It stops at the first scan with a match; the best row of that scan (exact >
+# prefix > word > substring), or the link/button inside it, is tagged with
+# PICK_ATTR and scrolled to the middle of the container.
+FIND_SCRIPT = """
+async ({text, rowSel, pickAttr, pickId, maxScrolls, timeoutMs}) => {
+    const started = performance.now();
+    const norm = s => (s || '').normalize('NFKD').replace(/[\\u0300-\\u036f]/g, '').toLowerCase().replace(/\\s+/g, ' ').trim();
+    const visible = el => !!el.getClientRects().length && getComputedStyle(el).visibility !== 'hidden';
+    const target = norm(text);
+    const frame = () => new Promise(r => requestAnimationFrame(() => requestAnimationFrame(r)));
+    const score = label => {
+        if (!label) return 0;
+        if (label === target) return 1;
+        if (label.startsWith(target)) return 0.9;
+        if ((' ' + label + ' ').includes(' ' + target + ' ')) return 0.8;
+        return label.includes(target) ? 0.7 : 0;
+    };
+
+    const scrollables = [];
+    for (const el of document.querySelectorAll('*')) {
+        if (el.scrollHeight <= el.clientHeight + 4 || el.clientHeight < 80) continue;
+        if (!/(auto|scroll)/.test(getComputedStyle(el).overflowY) || !visible(el)) continue;
+        if (el.querySelectorAll(rowSel).length >= 3) scrollables.push(el);
+    }
+    scrollables.sort((a, b) => b.clientHeight * b.clientWidth - a.clientHeight * a.clientWidth);
+    const box = scrollables[0] || document.scrollingElement || document.documentElement;
+    const isDoc = box === document.scrollingElement || box === document.documentElement;
+    const root = isDoc ? document : box;
+
+    const seen = new Set();
+    let best = null, bestLabel = null, bestScore = 0, scanned = 0;
+    const labelOf = el => norm(el.getAttribute('aria-label')) || norm((el.innerText || '').split('\\n')[0]);
+    const scan = () => {
+        let fresh = 0, overlap = 0;
+        for (const el of root.querySelectorAll(rowSel)) {
+            const label = labelOf(el);
+            if (!label) continue;
+            if (seen.has(label)) { overlap++; continue; }
+            seen.add(label); fresh++; scanned++;
+            const s = Math.max(score(label), score(norm(el.innerText)) * 0.95);
+            if (s > bestScore) { best = el; bestLabel = label; bestScore = s; }
+        }
+        return {fresh, overlap};
+    };
+    const done = (found, extra) => {
+        if (found && !best.isConnected) {
+            // Unmounted by a later scroll of a virtualized list: take its re-rendered row, if any
+            best = Array.from(root.querySelectorAll(rowSel)).find(el => labelOf(el) === bestLabel) || null;
+            found = !!best;
+        }
+        if (found) {
+            // A row's link/button is what actually responds to clicks
+            const inner = best.querySelector('a[href], button, [role=link], [role=button]');
+            if (inner && norm(inner.innerText).includes(target)) best = inner;
+            best.setAttribute(pickAttr, String(pickId));
+            best.scrollIntoView({block: 'center'});
+        }
+        return Object.assign({found, score: bestScore, text: found ? (best.innerText || best.getAttribute('aria-label') || '').trim().slice(0, 80) : null,
+                              rows: seen.size, scanned, container: isDoc ? 'document' : (box.getAttribute('role') || box.tagName.toLowerCase()),
+                              scrollable: box.scrollHeight > box.clientHeight + 4, ms: Math.round(performance.now() - started)}, extra);
+    };
+
+    scan();
+    if (best || !maxScrolls) return done(!!best, {scrolls: 0});
+
+    const startTop = box.scrollTop;
+    let step = box.clientHeight * 0.85, scrolls = 0, wrapped = startTop <= 0, atEnd = false;
+    while (scrolls < maxScrolls && performance.now() - started < timeoutMs) {
+        const before = box.scrollTop, height = box.scrollHeight;
+        box.scrollTop = before + step;
+        scrolls++;
+        await frame();
+        let r = scan();
+        if (!r.fresh) {
+            await new Promise(resolve => {
+                const mo = new MutationObserver(() => { mo.disconnect(); resolve(); });
+                mo.observe(box, {childList: true, subtree: true});
+                setTimeout(() => { mo.disconnect(); resolve(); }, 250);
+            });
+            await frame();
+            r = scan();
+        }
+        if (best) break;
+        if (!r.overlap && scrolls > 1) {
+            // Gap between scans: rows may have been skipped, step back and slow down
+            box.scrollTop = box.scrollTop - step / 2;
+            step = Math.max(box.clientHeight * 0.3, step * 0.6);
+            await frame();
+            scan();
+            if (best) break;
+        } else if (r.overlap > 2) {
+            step = Math.min(box.clientHeight * 1.5, step * 1.25);
+        }
+        if (box.scrollTop <= before + 1 && box.scrollHeight <= height) {
+            if (wrapped) { atEnd = true; break; }
+            box.scrollTop = 0; wrapped = true; step = box.clientHeight * 0.85;
+            await frame();
+            scan();
+            if (best) break;
+        } else if (wrapped && startTop > 0 && box.scrollTop >= startTop) {
+            atEnd = true; break;
+        }
+    }
+    return done(!!best, {scrolls, atEnd});
+}
+"""
+
+
+def _find(page, text: str, max_scrolls: int, timeout_ms: int) -> dict:
+    pick_id = next(_pick_ids)
+    result = page.evaluate(FIND_SCRIPT, {
+        "text": text,
+        "rowSel": ROW_SELECTOR,
+        "pickAttr": PICK_ATTR,
+        "pickId": pick_id,
+        "maxScrolls": max_scrolls,
+        "timeoutMs": timeout_ms,
+    })
+    result["pick"] = f"[{PICK_ATTR}='{pick_id}']" if result.get("found") else None
+    return result
+
+
+def search_box(page):
+    """The app's visible search/filter input, or None."""
+    candidates = page.locator(SEARCH_SELECTOR)
+    try:
+        for i in range(min(candidates.count(), 5)):
+            if candidates.nth(i).is_visible():
+                return candidates.nth(i)
+    except Exception:
+        pass
+    return None
+
+
+def _search(page, box, text: str, timeout_ms: int) -> dict | None:
+    """Type into the app's filter box and wait for a matching row; clears it again on a miss."""
+    previous = ""
+    try:
+        previous = box.input_value()
+        box.fill(text)
+        page.wait_for_function(
+            "([sel, v]) => Array.from(document.querySelectorAll(sel)).some(el => (el.innerText || '').toLowerCase().includes(v))",
+            arg=[ROW_SELECTOR, text.lower()],
+            timeout=timeout_ms,
+        )
+    except Exception:
+        try:
+            box.fill(previous)
+        except Exception:
+            pass
+        return None
+    return _find(page, text, 0, timeout_ms)
+
+
+def find_in_list(page, text: str, use_search: bool = True, max_scrolls: int = MAX_SCROLLS, timeout_ms: int = TIMEOUT_MS) -> dict:
+    """
+    Bring the list row showing `text` into the DOM and into view.
+    Tries, in order: rows already rendered, the app's search/filter box,
+    then scrolling the list container. Returns the FIND_SCRIPT result plus
+    `via` ("dom", "search", "scroll") and `pick` (a selector for the row).
+    """
+    result = _find(page, text, 0, timeout_ms)
+    if result["found"]:
+        result["via"] = "dom"
+        return result
+
+    box = search_box(page) if use_search else None
+    if box is not None:
+        searched = _search(page, box, text, min(timeout_ms, 3000))
+        if searched and searched["found"]:
+            searched["via"] = "search"
+            return searched
+
+    if not result["scrollable"]:
+        result["via"] = "dom"
+        return result
+    result = _find(page, text, max_scrolls, timeout_ms)
+    result["via"] = "scroll"
+    return result
+
+
+# Scrolls the main scroll container (largest visible scrollable element) by
+# most of its height; mouse.wheel only scrolls whatever is under the pointer.
+SCROLL_SCRIPT = """
+({direction}) => {
+    let box = null, area = 0;
+    for (const el of document.querySelectorAll('*')) {
+        if (el.scrollHeight <= el.clientHeight + 4 || el.clientHeight < 80) continue;
+        if (!/(auto|scroll)/.test(getComputedStyle(el).overflowY) || !el.getClientRects().length) continue;
+        const a = el.clientHeight * el.clientWidth;
+        if (a > area) { box = el; area = a; }
+    }
+    box = box || document.scrollingElement || document.documentElement;
+    const before = box.scrollTop;
+    box.scrollTop = before + (direction === 'up' ? -1 : 1) * box.clientHeight * 0.85;
+    return box.scrollTop !== before;
+}
+"""
+
+
+def scroll_container(page, direction: str = "down") -> bool:
+    """Scroll the page's main list/content container; False when it did not move."""
+    return page.evaluate(SCROLL_SCRIPT, {"direction": direction})
@@ -0,0 +1,292 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from helpers.app_stats import percentile
+
+# Per-model limits (requests / tokens per minute); anything else uses DEFAULT_LIMITS
+MODEL_LIMITS = {
+    "openai:gpt-4o-mini": {"rpm": 500, "tpm": 200_000},
+    "openai:gpt-4.1-mini": {"rpm": 500, "tpm": 200_000},
+}
+DEFAULT_LIMITS = {"rpm": 300, "tpm": 150_000}
+
+MAX_RETRIES = 4
+BACKOFF_BASE_S = 0.5
+BACKOFF_CAP_S = 20.0
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRY_ERRORS = {"RateLimitError", "APITimeoutError", "APIConnectionError", "InternalServerError", "ConnectError", "ReadTimeout"}
+
+# Hedging: duplicate a call still running past the model's recent p95 latency
+HEDGE_MIN_SAMPLES = 20
+HEDGE_PERCENTILE = 95
+HEDGE_MIN_DELAY_S = 1.0
+LATENCY_WINDOW = 200
+
+# Keep-alive HTTP pool shared by every OpenAI client
+HTTP_LIMITS = {"max_connections": 50, "max_keepalive_connections": 20, "keepalive_expiry": 60.0}
+
+
+class TokenBucket:
+    """Refills `rate` units per second up to `capacity`. Balance may go negative
+    when a call used more than estimated; later callers then wait it off."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, amount: float = 1) -> bool:
+        with self.lock:
+            self._refill()
+            if self.tokens >= min(amount, self.capacity):
+                self.tokens -= amount
+                return True
+            return False
+
+    def acquire(self, amount: float = 1) -> float:
+        """Block until `amount` is available; returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill()
+                need = min(amount, self.capacity)
+                if self.tokens >= need:
+                    self.tokens -= amount
+                    return waited
+                delay = (need - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def adjust(self, amount: float):
+        """Charge (positive) or refund (negative) after the real cost is known."""
+        with self.lock:
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class ModelMetrics:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.throttled_s = 0.0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cached_tokens = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.lock = threading.Lock()
+
+    def add(self, **counts):
+        with self.lock:
+            for key, value in counts.items():
+                setattr(self, key, getattr(self, key) + value)
+
+    def record(self, latency_s: float, usage: dict):
+        with self.lock:
+            self.calls += 1
+            self.latencies.append(latency_s)
+            self.input_tokens += usage.get("input_tokens", 0) or 0
+            self.output_tokens += usage.get("output_tokens", 0) or 0
+            self.cached_tokens += (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            lat = list(self.latencies)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "throttled_s": round(self.throttled_s, 2),
+            "latency_p50_ms": round(percentile(lat, 50) * 1000) if lat else None,
+            "latency_p95_ms": round(percentile(lat, 95) * 1000) if lat else None,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cached_tokens": self.cached_tokens,
+        }
+
+
+def _estimate_tokens(messages) -> int:
+    text = messages if isinstance(messages, str) else " ".join(
+        str(m.get("content", "")) if isinstance(m, dict) else str(getattr(m, "content", m)) for m in messages
+    )
+    return len(text) // 4 + 16
+
+
+def _retryable(error: Exception) -> bool:
+    return getattr(error, "status_code", None) in RETRY_STATUS or type(error).__name__ in RETRY_ERRORS
+
+
+def _retry_after(error: Exception) -> float | None:
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class LLMGateway:
+    """
+    Single path for every LLM call: one client per model on a shared keep-alive
+    HTTP pool, per-model request/token buckets, jittered exponential retries
+    (honouring Retry-After), hedged duplicates for slow tail calls, and
+    latency/token metrics.
+    """
+
+    def __init__(self, limits: dict | None = None, max_retries: int = MAX_RETRIES, hedging: bool = True):
+        self.limits = limits or MODEL_LIMITS
+        self.max_retries = max_retries
+        self.hedging = hedging
+        self._clients = {}
+        self._buckets = {}
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._http_client = None
+        self._pool = None
+
+    # --- setup -------------------------------------------------------------
+
+    def _client(self, name: str):
+        client = self._clients.get(name)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(name)
+                if client is None:
+                    # langchain/provider SDKs are imported on first use (slow to import)
+                    from langchain.chat_models import init_chat_model
+                    kwargs = {}
+                    if name.startswith("openai:"):
+                        # Retries live here, not in the SDK, so they respect the shared buckets
+                        kwargs = {"max_retries": 0, "http_client": self._shared_http_client()}
+                    client = self._clients[name] = init_chat_model(name, **kwargs)
+        return client
+
+    def _shared_http_client(self):
+        if self._http_client is None:
+            import httpx
+            self._http_client = httpx.Client(limits=httpx.Limits(**HTTP_LIMITS), timeout=httpx.Timeout(60.0, connect=10.0))
+        return self._http_client
+
+    def _state(self, name: str):
+        with self._lock:
+            if name not in self._metrics:
+                limits = self.limits.get(name, DEFAULT_LIMITS)
+                self._buckets[name] = (
+                    TokenBucket(limits["rpm"] / 60, max(1, limits["rpm"] / 10)),
+                    TokenBucket(limits["tpm"] / 60, limits["tpm"] / 10),
+                )
+                self._metrics[name] = ModelMetrics()
+            return self._buckets[name], self._metrics[name]
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm")
+        return self._pool
+
+    # --- calls -------------------------------------------------------------
+
+    def invoke(self, name: str, messages, **kwargs):
+        """Rate-limited, retried (and possibly hedged) `invoke` on model `name`."""
+        client = self._client(name)
+        (requests, tokens), metrics = self._state(name)
+        estimate = _estimate_tokens(messages)
+        attempt = 0
+        while True:
+            metrics.add(throttled_s=requests.acquire(1) + tokens.acquire(estimate))
+            start = time.perf_counter()
+            try:
+                resp = self._call(client, name, messages, kwargs, requests, tokens, estimate, metrics)
+            except Exception as e:
+                metrics.add(errors=1)
+                if attempt >= self.max_retries or not _retryable(e):
+                    raise
+                attempt += 1
+                metrics.add(retries=1)
+                delay = _retry_after(e) or random.uniform(0, min(BACKOFF_CAP_S, BACKOFF_BASE_S * 2 ** attempt))
+                print(f"[LLM] {name}: {type(e).__name__}, retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            usage = getattr(resp, "usage_metadata", None) or {}
+            metrics.record(time.perf_counter() - start, usage)
+            if usage.get("total_tokens"):
+                tokens.adjust(usage["total_tokens"] - estimate)
+            return resp
+
+    def _hedge_delay(self, metrics: ModelMetrics) -> float | None:
+        if not self.hedging or len(metrics.latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        with metrics.lock:
+            latencies = list(metrics.latencies)
+        return max(HEDGE_MIN_DELAY_S, percentile(latencies, HEDGE_PERCENTILE))
+
+    def _call(self, client, name, messages, kwargs, requests, tokens, estimate, metrics):
+        delay = self._hedge_delay(metrics)
+        if delay is None:
+            return client.invoke(messages, **kwargs)
+
+        pool = self._executor()
+        primary = pool.submit(client.invoke, messages, **kwargs)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        # Only hedge when the buckets have room right now; never queue behind real traffic
+        if not requests.try_acquire(1):
+            return primary.result()
+        if not tokens.try_acquire(estimate):
+            requests.adjust(-1)     # give back the request slot the skipped hedge took
+            return primary.result()
+        metrics.add(hedges=1)
+        hedge = pool.submit(client.invoke, messages, **kwargs)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        metrics.add(hedge_wins=1)
+                    # The slower duplicate finishes in the background and is dropped
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    # --- reporting ---------------------------------------------------------
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {name: m.to_dict() for name, m in self._metrics.items()}
+
+
+class GatewayModel:
+    """Drop-in for a LangChain chat model: `.invoke(messages)` goes through the gateway."""
+    __slots__ = ("gateway", "name")
+
+    def __init__(self, gateway: LLMGateway, name: str):
+        self.gateway = gateway
+        self.name = name
+
+    def invoke(self, messages, **kwargs):
+        return self.gateway.invoke(self.name, messages, **kwargs)
+
+
+# Process-wide gateway shared by every agent and worker thread
+GATEWAY = LLMGateway()
+
+
+def chat_model(name: str) -> GatewayModel:
+    """Chat model `name` routed through the shared gateway (client created on first call)."""
+    return GatewayModel(GATEWAY, name)
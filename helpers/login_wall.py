@@ -0,0 +1,100 @@
+import re
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+STALE_FLAG = "stale.flag"
+
+# Paths of login / SSO pages for any app, anchored at the path start
+# (/settings/oauth or /account/sso is an in-app settings page, not a wall)
+LOGIN_URL_PATTERNS = [
+    r"^/(-/)?log-?in\b",
+    r"^/(-/)?sign-?in\b",
+    r"^/sso\b",
+    r"^/oauth\b",
+]
+# Identity providers: being on their hosts means we were sent to log in
+LOGIN_HOSTS = ("accounts.google.com", "login.microsoftonline.com")
+
+# Per-app login walls: URL patterns and page text seen only when logged out
+APP_LOGIN_PATTERNS = {
+    "linear": {
+        "url": [r"linear\.app/login"],
+        "text": [r"log in to linear", r"continue with (google|email|saml)"],
+    },
+    "notion": {
+        "url": [r"notion\.so/login", r"notion\.com/login"],
+        "text": [r"log in to (your )?notion", r"continue with (google|apple|email)"],
+    },
+    "asana": {
+        "url": [r"asana\.com/-/login", r"app\.asana\.com/-/login"],
+        "text": [r"log in to asana", r"welcome to asana", r"continue with google"],
+    },
+}
+
+_url_patterns = [re.compile(p, re.I) for p in LOGIN_URL_PATTERNS]
+
+
+class SessionExpired(Exception):
+    """The app's saved session is gone (the page shows a login wall)."""
+
+    def __init__(self, app_name: str, reason: str):
+        super().__init__(f"Session for {app_name} expired ({reason}); re-authentication required")
+        self.app_name = app_name
+        self.reason = reason
+
+
+def detect_login_wall(page, app_name: str) -> str | None:
+    """
+    Cheap login-wall check. The app's own login URL or logged-out text decides
+    on its own (some login pages only have "Continue with ..." buttons); the
+    generic login paths and identity-provider hosts also need a visible auth
+    form (password or email field). A password field alone is not a wall
+    (change-password settings, in-app re-auth).
+    Returns a short reason when the page is a login wall, otherwise None.
+    """
+    rules = APP_LOGIN_PATTERNS.get((app_name or "").lower(), {})
+    url = page.url or ""
+    if any(re.search(p, url, re.I) for p in rules.get("url", [])):
+        return f"login URL {url}"
+    parts = urlsplit(url)
+    generic_url = (parts.hostname or "") in LOGIN_HOSTS or any(p.search(parts.path) for p in _url_patterns)
+
+    try:
+        state = page.evaluate(
+            """() => {
+                const visible = el => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+                const q = sel => Array.from(document.querySelectorAll(sel)).filter(visible).length;
+                return {
+                    passwords: q('input[type=password]'),
+                    emails: q('input[type=email], input[name*=email i], input[autocomplete=username]'),
+                    text: document.body ? document.body.innerText.slice(0, 2000) : '',
+                };
+            }"""
+        )
+    except Exception:
+        return None
+
+    text = state["text"].lower()
+    for pattern in rules.get("text", []):
+        if re.search(pattern, text):
+            return f"login page ('{pattern}')"
+    if generic_url and (state["passwords"] or state["emails"]):
+        return f"login URL {url}"
+    return None
+
+
+def is_profile_stale(profile_dir: Path) -> bool:
+    return (Path(profile_dir) / STALE_FLAG).exists()
+
+
+def mark_profile_stale(profile_dir: Path, reason: str) -> None:
+    """Flag the profile so no worker uses it until someone logs in again."""
+    (Path(profile_dir) / STALE_FLAG).write_text(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {reason}\n", encoding="utf-8")
+
+
+def clear_profile_stale(profile_dir: Path) -> None:
+    try:
+        (Path(profile_dir) / STALE_FLAG).unlink()
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,156 @@
+import itertools
+
+# Open dropdowns, menus, comboboxes and command palettes across common UI kits
+POPUP_SELECTOR = (
+    "[role='listbox'], [role='menu'], [role='tree'], [role='grid'][aria-multiselectable], "
+    "[cmdk-list], [data-radix-popper-content-wrapper], [data-headlessui-state~='open']"
+)
+OPTION_SELECTOR = (
+    "[role='option'], [role='menuitem'], [role='menuitemradio'], [role='menuitemcheckbox'], "
+    "[role='treeitem'], [cmdk-item]"
+)
+PICK_ATTR = "data-st-menu-pick"
+MIN_SCORE = 0.55
+
+_pick_ids = itertools.count(1)
+
+# Finds the best option for `value` in one pass: options inside visible popups
+# first (whole document if none), scored exact > prefix > word > substring >
+# bigram similarity. The winner is tagged with PICK_ATTR so Playwright can do a
+# real click on it. Also reports whether the list is virtualized (scrollable or
+# aria-setsize larger than what is rendered) and whether it has a filter box.
+RESOLVE_SCRIPT = """
+({value, optionSel, popupSel, pickAttr, pickId, minScore}) => {
+    const norm = s => (s || '').normalize('NFKD').replace(/[\\u0300-\\u036f]/g, '').toLowerCase().replace(/\\s+/g, ' ').trim();
+    const visible = el => !!el.getClientRects().length && getComputedStyle(el).visibility !== 'hidden';
+    const bigrams = s => { const out = new Map(); for (let i = 0; i < s.length - 1; i++) { const b = s.slice(i, i + 2); out.set(b, (out.get(b) || 0) + 1); } return out; };
+    const target = norm(value);
+    const tb = bigrams(target);
+    const dice = s => {
+        const sb = bigrams(s); let hit = 0, total = 0;
+        for (const n of sb.values()) total += n;
+        for (const [b, n] of tb) { total += n; hit += Math.min(n, sb.get(b) || 0); }
+        return total ? (2 * hit) / total : 0;
+    };
+    const score = text => {
+        if (!text) return 0;
+        if (text === target) return 1;
+        if (text.startsWith(target)) return 0.92;
+        if ((' ' + text + ' ').includes(' ' + target + ' ')) return 0.85;
+        if (text.includes(target)) return 0.75;
+        return dice(text) * 0.7;
+    };
+
+    const popups = Array.from(document.querySelectorAll(popupSel)).filter(visible);
+    const roots = popups.length ? popups : [document];
+    let options = [];
+    for (const root of roots) options.push(...root.querySelectorAll(optionSel));
+    if (!options.length && popups.length) {
+        // Unlabelled menus: any leaf-ish clickable row inside the popup
+        for (const root of popups) options.push(...root.querySelectorAll('li, button, a, [tabindex], div:not(:has(div))'));
+    }
+    options = options.filter(visible);
+
+    let best = null, bestScore = 0;
+    for (const el of options) {
+        const label = norm(el.getAttribute('aria-label')) || norm((el.innerText || '').split('\\n')[0]);
+        const full = norm(el.innerText);
+        const s = Math.max(score(label), score(full) * 0.95);
+        if (s > bestScore) { best = el; bestScore = s; }
+    }
+
+    const list = popups[popups.length - 1] || null;
+    let virtualized = false, filter = false;
+    if (list) {
+        let scroller = list;
+        for (const el of [list, ...list.querySelectorAll('*')]) {
+            if (el.scrollHeight > el.clientHeight + 4 && /(auto|scroll)/.test(getComputedStyle(el).overflowY)) { scroller = el; virtualized = true; break; }
+        }
+        const setsize = Math.max(0, ...Array.from(list.querySelectorAll('[aria-setsize]')).map(e => +e.getAttribute('aria-setsize') || 0));
+        if (setsize > options.length) virtualized = true;
+        const wrapper = list.closest('[role=dialog], [data-radix-popper-content-wrapper], [cmdk-root]') || list.parentElement;
+        filter = !!(wrapper && wrapper.querySelector('input, [contenteditable=true]'));
+    }
+    const active = document.activeElement;
+    if (active && (active.isContentEditable || ['INPUT', 'TEXTAREA'].includes(active.tagName))) filter = true;
+
+    if (best && bestScore >= minScore) {
+        best.setAttribute(pickAttr, String(pickId));
+        return {found: true, score: bestScore, text: (best.innerText || best.getAttribute('aria-label') || '').trim().slice(0, 80),
+                popup: popups.length > 0, options: options.length, virtualized, filter};
+    }
+    return {found: false, score: bestScore, popup: popups.length > 0, options: options.length, virtualized, filter};
+}
+"""
+
+
+def wait_for_popup(page, timeout_ms: int = 1500) -> bool:
+    """Wait (event-driven, no fixed sleep) for a menu/listbox to become visible."""
+    try:
+        page.locator(POPUP_SELECTOR).last.wait_for(state="visible", timeout=timeout_ms)
+        return True
+    except Exception:
+        return False
+
+
+def resolve_option(page, value: str) -> dict:
+    """One in-page query for the best option matching `value`; tags it for clicking."""
+    pick_id = next(_pick_ids)
+    result = page.evaluate(RESOLVE_SCRIPT, {
+        "value": value,
+        "optionSel": OPTION_SELECTOR,
+        "popupSel": POPUP_SELECTOR,
+        "pickAttr": PICK_ATTR,
+        "pickId": pick_id,
+        "minScore": MIN_SCORE,
+    })
+    result["pick"] = f"[{PICK_ATTR}='{pick_id}']" if result.get("found") else None
+    return result
+
+
+def type_to_filter(page, text: str) -> None:
+    """A focused filter box takes inserted text; list typeahead needs real key events."""
+    try:
+        focused_editable = page.evaluate(
+            "() => { const el = document.activeElement; return !!el && (el.isContentEditable || ['INPUT', 'TEXTAREA'].includes(el.tagName)); }"
+        )
+    except Exception:
+        focused_editable = False
+    if focused_editable:
+        page.keyboard.insert_text(text)
+    else:
+        page.keyboard.type(text, delay=15)
+
+
+def select_option(page, value: str, timeout_ms: int = 1500) -> tuple[bool, str]:
+    """
+    Pick `value` from the menu/listbox the previous click opened.
+    Returns (selected, status). Type-to-filter is only used when the option
+    is not rendered and the list is virtualized.
+    """
+    wait_for_popup(page, timeout_ms)
+    result = resolve_option(page, value)
+    if not result["found"] and result["virtualized"]:
+        type_to_filter(page, value)
+        try:
+            # Re-resolve as soon as the filtered list renders a match
+            page.wait_for_function(
+                "([sel, v]) => Array.from(document.querySelectorAll(sel)).some(el => (el.innerText || '').toLowerCase().includes(v))",
+                arg=[OPTION_SELECTOR, value.lower()],
+                timeout=timeout_ms,
+            )
+        except Exception:
+            pass
+        result = resolve_option(page, value)
+        if not result["found"] and result["options"] == 1:
+            # The filter left a single (differently labelled) option: Enter picks the highlighted one
+            page.keyboard.press("Enter")
+            return True, f"filtered for '{value}' to one option + Enter"
+    if not result["found"]:
+        return False, f"option '{value}' not found ({result['options']} options, best score {result['score']:.2f})"
+    try:
+        page.locator(result["pick"]).click(timeout=3000)
+    except Exception:
+        # Covered by an overlay/animation: the element is the right one, click it anyway
+        page.locator(result["pick"]).click(force=True, timeout=2000)
+    return True, f"selected '{result['text']}' (score {result['score']:.2f})"
@@ -0,0 +1,210 @@
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+from helpers.exec_profiles import is_tracker
+
+# Installed in every document: counts DOM mutations and reports them to the
+# CDP binding at most every 100 ms, so the page pushes instead of us polling.
+MUTATION_SCRIPT = """
+(() => {
+  if (window.__stObserver || typeof window.__stMutations !== 'function') return;
+  let pending = 0, timer = null;
+  const flush = () => { timer = null; if (pending) { window.__stMutations(String(pending)); pending = 0; } };
+  const start = () => {
+    window.__stObserver = new MutationObserver(records => {
+      pending += records.length;
+      if (!timer) timer = setTimeout(flush, 100);
+    });
+    window.__stObserver.observe(document.documentElement, {subtree: true, childList: true, attributes: true, characterData: true});
+  };
+  if (document.documentElement) start(); else document.addEventListener('DOMContentLoaded', start);
+})();
+"""
+
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+
+def _site(url: str) -> str:
+    """Registrable part of the host: api.linear.app -> linear.app, app.example.co.uk -> example.co.uk."""
+    labels = (urlparse(url).hostname or "").split(".")
+    keep = 3 if len(labels) >= 3 and len(labels[-1]) == 2 and len(labels[-2]) <= 3 else 2
+    return ".".join(labels[-keep:])
+
+
+def first_party(url: str, page_url: str) -> bool:
+    """Is a request to `url` the app's own (same site as the page), not telemetry or a third party?"""
+    return bool(_site(url)) and _site(url) == _site(page_url) and not is_tracker(url)
+
+
+class PageEventBuffer:
+    """
+    Passive page-state collector on a background CDP session.
+    Tracks in-flight requests, navigations, DOM mutation counts and console
+    errors as they happen; every read is O(1) on counters or a bounded ring.
+    """
+
+    def __init__(self, page, capacity: int = 500):
+        self.page = page
+        self.events = deque(maxlen=capacity)        # (ts, kind, detail)
+        self.network = deque(maxlen=capacity)       # request entries, updated in place (HAR slices)
+        self.console_errors = deque(maxlen=50)
+        self.inflight = {}                          # requestId -> entry
+        self.requests = 0
+        self.failed_writes = 0
+        self.mutations = 0
+        self.navigations = 0
+        self.errors = 0
+        self.url = page.url
+        self.last_activity = time.monotonic()
+
+        self.session = page.context.new_cdp_session(page)
+        self.session.on("Network.requestWillBeSent", self._on_request)
+        self.session.on("Network.responseReceived", self._on_response)
+        self.session.on("Network.loadingFinished", self._on_finished)
+        self.session.on("Network.loadingFailed", self._on_failed)
+        self.session.on("Page.frameNavigated", self._on_navigated)
+        self.session.on("Page.navigatedWithinDocument", self._on_navigated)
+        self.session.on("Runtime.consoleAPICalled", self._on_console)
+        self.session.on("Runtime.exceptionThrown", self._on_exception)
+        self.session.on("Runtime.bindingCalled", self._on_binding)
+        self.session.send("Network.enable")
+        self.session.send("Page.enable")
+        self.session.send("Runtime.enable")
+        self.session.send("Runtime.addBinding", {"name": "__stMutations"})
+        self.session.send("Page.addScriptToEvaluateOnNewDocument", {"source": MUTATION_SCRIPT})
+        self.session.send("Runtime.evaluate", {"expression": MUTATION_SCRIPT})
+
+    @classmethod
+    def attach(cls, page, capacity: int = 500):
+        """Attach to a page, or return None when CDP is unavailable (non-Chromium)."""
+        try:
+            return cls(page, capacity)
+        except Exception as e:
+            print(f"[WARNING] Could not attach CDP event collector: {e}")
+            return None
+
+    def detach(self):
+        try:
+            self.session.detach()
+        except Exception:
+            pass
+
+    # ----------------------------- CDP handlers -----------------------------
+
+    def _touch(self, kind: str, detail):
+        self.last_activity = time.monotonic()
+        self.events.append((self.last_activity, kind, detail))
+
+    def _on_request(self, params):
+        req = params.get("request", {})
+        entry = {
+            "id": params.get("requestId"),
+            "url": req.get("url", ""),
+            "method": req.get("method", "GET"),
+            "type": params.get("type", ""),
+            "started": params.get("wallTime"),
+            "ts": time.monotonic(),
+            "status": None,
+            "mime": "",
+            "duration_ms": None,
+            "error": "",
+        }
+        self.inflight[entry["id"]] = entry
+        self.network.append(entry)
+        self.requests += 1
+        self._touch("request", entry["url"])
+
+    def _on_response(self, params):
+        entry = self.inflight.get(params.get("requestId"))
+        if entry is not None:
+            resp = params.get("response", {})
+            entry["status"] = resp.get("status")
+            entry["mime"] = resp.get("mimeType", "")
+
+    def _finish(self, params, error: str = ""):
+        entry = self.inflight.pop(params.get("requestId"), None)
+        if entry is None:
+            return
+        entry["duration_ms"] = int((time.monotonic() - entry["ts"]) * 1000)
+        entry["error"] = error
+        # Only the app's own writes decide completion: canceled/blocked requests (including
+        # trackers the production profile aborts) and third-party beacons are not the action failing
+        skipped = params.get("canceled") or params.get("blockedReason")
+        if (entry["method"] in WRITE_METHODS and not skipped and (error or (entry["status"] or 0) >= 400)
+                and first_party(entry["url"], self.url)):
+            self.failed_writes += 1
+        self._touch("failed" if error else "finished", entry["url"])
+
+    def _on_finished(self, params):
+        self._finish(params)
+
+    def _on_failed(self, params):
+        self._finish(params, error=params.get("errorText") or "failed")
+
+    def _on_navigated(self, params):
+        frame = params.get("frame")
+        if frame is not None and frame.get("parentId"):
+            return  # only the main frame counts
+        self.url = (frame or params).get("url", self.url)
+        self.navigations += 1
+        self._touch("navigation", self.url)
+
+    def _on_console(self, params):
+        if params.get("type") in ("error", "assert"):
+            text = " ".join(str(a.get("value", a.get("description", ""))) for a in params.get("args", []))
+            self.console_errors.append({"ts": time.time(), "text": text[:500]})
+            self.errors += 1
+
+    def _on_exception(self, params):
+        details = params.get("exceptionDetails", {})
+        text = (details.get("exception") or {}).get("description") or details.get("text", "")
+        self.console_errors.append({"ts": time.time(), "text": text[:500]})
+        self.errors += 1
+
+    def _on_binding(self, params):
+        if params.get("name") == "__stMutations":
+            try:
+                self.mutations += int(params.get("payload") or 0)
+            except ValueError:
+                return
+            self._touch("mutations", params.get("payload"))
+
+    # ------------------------------- readers --------------------------------
+
+    def active_requests(self, max_age_s: float = 5.0) -> int:
+        """In-flight requests, ignoring long-polls older than `max_age_s`."""
+        now = time.monotonic()
+        return sum(1 for e in self.inflight.values() if now - e["ts"] < max_age_s)
+
+    def quiet_ms(self) -> int:
+        """Milliseconds since the last network, navigation or DOM activity."""
+        return int((time.monotonic() - self.last_activity) * 1000)
+
+    def mark(self) -> dict:
+        """Counter snapshot; pass to `since()` to get per-step deltas."""
+        return {
+            "requests": self.requests,
+            "failed_writes": self.failed_writes,
+            "mutations": self.mutations,
+            "navigations": self.navigations,
+            "console_errors": self.errors,
+        }
+
+    def since(self, mark: dict) -> dict:
+        now = self.mark()
+        return {k: now[k] - mark.get(k, 0) for k in now}
+
+    def wait_for_quiet(self, page, quiet_ms: int = 300, timeout_ms: int = 2000, interval_ms: int = 50) -> int:
+        """
+        Let Playwright pump events until there are no active requests and no
+        activity for `quiet_ms`, or `timeout_ms` passes. Returns elapsed ms.
+        """
+        start = time.monotonic()
+        while True:
+            page.wait_for_timeout(interval_ms)
+            elapsed = int((time.monotonic() - start) * 1000)
+            if elapsed >= timeout_ms:
+                return elapsed
+            if self.active_requests() == 0 and min(self.quiet_ms(), elapsed) >= quiet_ms:
+                return elapsed
@@ -0,0 +1,189 @@
+import threading
+from textwrap import dedent
+
+# Static instructions go first and never change between steps, tasks or apps, so
+# the provider can reuse its cached prefix (OpenAI caches prompts >= 1024 tokens
+# by prefix). Everything that varies per step is appended at the very end.
+
+NEXT_ACTION_RULES = dedent("""
+    You are a browser automation agent with expert knowledge of modern web applications and their typical UI patterns.
+
+    Each user message describes the current state of the browser: the goal, the actions taken so far, the current page text, detected inputs, buttons/links and alerts/toasts.
+
+    IMPORTANT: Use your knowledge of how web apps typically work to make intelligent decisions:
+    - Understand which apps use explicit Create/Save buttons vs. auto-save behavior
+    - Recognize when a task is complete based on app-specific patterns (toasts, redirects, auto-save, list updates)
+    - Adapt your strategy based on the app you're automating
+    - After clicking a button that opens a dropdown/menu, the next action should typically be clicking an option from that menu (look for the specific value in the page text), NOT clicking another button or textbox.
+    - If you just clicked something and now see a dropdown menu with options, your next action MUST be clicking one of those options - completely ignore any search/filter textboxes and their placeholders that appear alongside the dropdown.
+
+    CRITICAL - Read the current page first:
+    - Before deciding your action, carefully examine "Current page text" and "Detected buttons and links" to understand WHERE you are
+    - Goals often require multiple steps. Break them down: navigate → interact → confirm
+    - Don't assume you're already at the right place. If the goal requires opening an item, check if you need to navigate to a list first.
+    - Take one logical step at a time based on what's actually visible on the current page
+
+    Decide the NEXT SINGLE ACTION to take toward the goal. Return ONLY valid JSON with this schema:
+    {
+      "type": "goto|click|fill|select|press|scroll|find|wait|done",
+      "label": "<short human label for logs>",
+      "locator": {"role":"...","name":"...","aria-label":"...","placeholder":"...","text":"...","css":"..."},
+      "text": "<for fill - use short unique values (12-16 chars) with random suffix; for find - the item's title>",
+      "value": "<for select>",
+      "key": "<for press>",
+      "direction": "down|up",
+      "url": "<for goto>",
+      "candidates": ["<for click, only when unsure: other link texts that could be the right one>"]
+    }
+
+    Rules:
+    - Review "Actions taken so far" to see what you've already done. DO NOT repeat actions you've already completed.
+    - If a previous step shows "✗ FAILED", do NOT retry the same locator - try a different approach or different element.
+    - If you filled a field in a previous step, DO NOT fill it again. Move to the next action.
+    - When filling text inputs (project names, issue titles, labels, comments, etc.), generate SHORT UNIQUE values between 12-16 characters with a random suffix. This prevents duplicate name errors on repeated test runs.
+    - Use your app knowledge to determine the correct workflow (explicit save button vs. auto-save, etc.)
+    - NEVER return type: "done" just because fields are filled. Consider if the app requires an explicit action button click.
+    - Return type: "done" ONLY when goal is completed based on observable evidence appropriate for the app type.
+    - Locator preference: 1) role + VISIBLE TEXT (the label users see), 2) role + aria-label/name (accessible name), 3) placeholder (for empty inputs), 4) text, 5) css (last resort).
+    - To click table/list items, prefer using role: "link" with the item text rather than role: "row". Links are clickable, rows may not be.
+    - If several links could be the right one and the page does not tell them apart, click your best guess and list up to 2 other plausible link texts in "candidates". Leave "candidates" out when you are sure.
+    - Long lists only render the rows on screen. If the item you need is not in the page text, use type: "find" with "text" set to the item's title instead of "scroll"; it searches and scrolls the list until the item is visible.
+    - When selecting from dropdowns/menus: placeholders in filter/search boxes are just hints - ignore them and directly click the actual option you need from the visible list.
+    - CRITICAL RULE: Only suggest "fill" actions for inputs where "empty": true. Do NOT re-fill inputs that already have a value ("empty": false).
+    - ACTION PRIORITY: 1) Fill ONLY empty required fields that you haven't filled yet, 2) Click action buttons if needed by the app, 3) Wait and verify completion, 4) Return done when truly completed.
+    - When all required fields are filled (empty: false or already_filled: true), immediately look for and click relevant action buttons from the Detected buttons list.
+    - CRITICAL: Do NOT invent button names or aria-labels. ONLY use elements you can see in "Detected buttons and links" or "Current page text". If you can't find an exact button, look for visible text that represents the current state (e.g., the current status value might itself be clickable to change it).
+    - When you need to interact with something but can't find a dedicated button, examine the page text for the actual current value or label that might be interactive.
+    - If the goal mentions an action (e.g., "change", "update", "modify") but you can't find that exact word, look for synonyms or related terms in the detected buttons (e.g., "Set", "Edit", "Configure") or click the current value directly if it's interactive.
+    - When changing/updating a value (status, priority, assignee, etc.), select an option that is DIFFERENT from the current value. Don't click the same value that's already set.
+    - Output JSON only. No markdown. No commentary.
+""").strip()
+
+NEXT_ACTION_STATE = dedent("""
+    Goal: {goal}
+    Current Step: {step_num}{history}
+
+    Current page text (truncated):
+    {page_text}
+
+    Detected input hints (top 20 by relevance to the goal, include aria-labels, placeholders, and current values): {inputs}
+    Detected buttons and links (top 15 by relevance to the goal, available actions - includes links to items in lists/tables): {buttons}
+    Detected alerts/toasts (success/error messages): {alerts}
+""").strip()
+
+COMPLETION_RULES = dedent("""
+    You are verifying if a task goal has been completed.
+
+    Each user message gives the goal, the current page text and the detected alerts/toasts.
+
+    Question: Has the goal been COMPLETED based on observable evidence?
+
+    Return ONLY a JSON object:
+    {
+      "completed": true|false,
+      "reasoning": "<brief explanation of why completed or not>"
+    }
+
+    Evidence for completion (be strict):
+    - Success toast/alert messages indicating the action was performed (check alerts list)
+    - NEW items appearing in lists (project created, page added, task saved)
+    - Page navigation to success/confirmation screens after performing an action
+    - Visible confirmation messages in page text stating something was changed/updated NOW (not in the past)
+    - Observable page content changes that directly result from the action you performed and align with the goal
+    - For comments/posts: the comment must appear in the comment thread/history area, NOT just in the input field
+
+    NOT evidence of completion:
+    - Just opening an item or navigating to a page (you must perform the actual action)
+    - Seeing a value that already exists (for "change" goals, you must see evidence that YOU changed it)
+    - No alerts/toasts/confirmation when the goal requires explicit confirmation (create, save, delete actions)
+    - Opening a menu or dialog without selecting/completing an option inside it
+    - Seeing options in an open dropdown menu (the option must be selected and results must update)
+    - Text typed in an input field but not yet submitted (for comments/posts, must see it in the posted history area)
+    - Seeing your typed text in a text editor or input box without clicking Submit/Post/Save button
+
+    Important: Some actions (filter, sort, search) don't show toasts but DO update the page content with the required task. If the page state matches the goal's expected outcome after performing the action, consider it complete. BUT seeing an option in a menu is NOT completion - you must see the actual results.
+
+    Output JSON only. No markdown. No commentary.
+""").strip()
+
+COMPLETION_STATE = dedent("""
+    Goal: {goal}
+
+    Current page text (truncated):
+    {page_text}
+
+    Detected alerts/toasts (success/error messages): {alerts}
+""").strip()
+
+
+class CompiledPrompt:
+    """A template bound to one app: the system message is built once and reused verbatim."""
+    __slots__ = ("system_message", "state_template")
+
+    def __init__(self, system: str, state_template: str):
+        self.system_message = {"role": "system", "content": system}
+        self.state_template = state_template
+
+    def messages(self, **state) -> list:
+        return [self.system_message, {"role": "user", "content": self.state_template.format(**state)}]
+
+
+class PromptTemplate:
+    """
+    Static rules + per-step state. `compile(app, hint)` appends the app name and
+    learned hints to the rules (after them, so the shared prefix stays identical
+    across apps) and caches the result. Only the latest hint is kept per app:
+    hints change as run history grows, and old ones are never asked for again.
+    """
+
+    def __init__(self, rules: str, state_template: str):
+        self.rules = rules
+        self.state_template = state_template
+        self._compiled = {}             # app -> (hint, CompiledPrompt)
+        self._lock = threading.Lock()
+
+    def compile(self, app_name: str = "unknown", app_hint: str = "") -> CompiledPrompt:
+        cached = self._compiled.get(app_name)
+        if cached is not None and cached[0] == app_hint:
+            return cached[1]
+        system = f"{self.rules}\n\nApplication: {app_name}"
+        if app_hint:
+            system += f"\n{app_hint}"
+        compiled = CompiledPrompt(system, self.state_template)
+        with self._lock:
+            self._compiled[app_name] = (app_hint, compiled)
+        return compiled
+
+
+NEXT_ACTION_PROMPT = PromptTemplate(NEXT_ACTION_RULES, NEXT_ACTION_STATE)
+COMPLETION_PROMPT = PromptTemplate(COMPLETION_RULES, COMPLETION_STATE)
+
+
+class PromptCacheStats:
+    """
+    Provider prompt-cache usage from LangChain's usage_metadata
+    (input_token_details.cache_read). Use mark()/since() for per-task numbers.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.input_tokens = 0
+        self.cached_tokens = 0
+
+    def record(self, resp) -> None:
+        usage = getattr(resp, "usage_metadata", None) or {}
+        self.calls += 1
+        self.input_tokens += usage.get("input_tokens", 0) or 0
+        self.cached_tokens += (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+
+    def mark(self) -> tuple:
+        return (self.calls, self.input_tokens, self.cached_tokens)
+
+    def since(self, mark: tuple) -> dict:
+        calls, input_tokens, cached_tokens = (now - then for now, then in zip(self.mark(), mark))
+        return {
+            "calls": calls,
+            "input_tokens": input_tokens,
+            "cached_tokens": cached_tokens,
+            "hit_rate": round(cached_tokens / input_tokens, 3) if input_tokens else None,
+        }
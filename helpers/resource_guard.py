@@ -0,0 +1,97 @@
+import time
+
+DEFAULT_LIMITS = {
+    "max_browser_mb": 1500,     # browser RSS above which all warm contexts are recycled
+    "max_pages": 6,             # open pages across contexts (tasks close theirs; more means leaks)
+    "max_runs_mb": 4096,        # disk budget for screenshots/ (runs.db, blobs, run folders)
+    "keep_runs_days": 30,       # runs older than this are pruned
+}
+PRUNE_INTERVAL_S = 600          # disk walk + prune at most this often
+
+
+def process_rss_mb() -> float | None:
+    """Resident memory of this Python process (Linux /proc, else peak RSS)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    try:
+        import resource
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    except Exception:
+        return None
+
+
+class ResourceGuard:
+    """
+    Worker-level resource limits, checked between tasks: recycles the browser
+    (all contexts) when its RSS passes `max_browser_mb`, closes leaked pages,
+    and prunes old runs from the run store (by age, then by disk budget).
+    `metrics()` is what the task service exposes under GET /metrics.
+    """
+
+    def __init__(self, navigator, limits: dict | None = None):
+        self.navigator = navigator
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self.tasks = 0
+        self.recycles = 0
+        self.closed_pages = 0
+        self.pruned_runs = 0
+        self.last = {}
+        self._last_prune = 0.0
+
+    def after_task(self) -> dict:
+        """Measure, enforce the limits, and return the current metrics."""
+        self.tasks += 1
+        pool = self.navigator.pool
+        if sum(len(ctx.pages) for ctx in list(pool.contexts.values())) > self.limits["max_pages"]:
+            self._close_leaked_pages(pool)
+
+        browser_mb = pool.memory_mb()
+        if browser_mb is not None and browser_mb > self.limits["max_browser_mb"]:
+            print(f"[GUARD] Browser RSS {browser_mb:.0f} MB > {self.limits['max_browser_mb']} MB; recycling {len(pool.contexts)} contexts")
+            # Everything, so a shared browser process goes too; the pool relaunches on the next task
+            pool.close()
+            self.recycles += 1
+            browser_mb = pool.memory_mb()
+
+        store = self.navigator.store
+        now = time.monotonic()
+        if now - self._last_prune >= PRUNE_INTERVAL_S:
+            self._last_prune = now
+            try:
+                pruned = store.prune(self.limits["keep_runs_days"], self.limits["max_runs_mb"])
+                self.pruned_runs += pruned["runs"]
+                self.last["runs_disk_mb"] = store.disk_usage_mb()
+            except Exception as e:
+                print(f"[GUARD] Could not prune runs: {e}")
+
+        self.last.update({
+            "tasks": self.tasks,
+            "browser_mb": browser_mb,
+            "process_mb": process_rss_mb(),
+            "contexts": len(pool.contexts),
+            "pages": sum(len(ctx.pages) for ctx in pool.contexts.values()),
+            "history_steps": len(getattr(self.navigator, "_trace_steps", [])),
+            "recycles": self.recycles,
+            "closed_pages": self.closed_pages,
+            "pruned_runs": self.pruned_runs,
+        })
+        return self.metrics()
+
+    def _close_leaked_pages(self, pool):
+        """Tasks release their page; keep one page per context (persistent contexts need it)."""
+        for ctx in list(pool.contexts.values()):
+            for page in ctx.pages[1:]:
+                try:
+                    page.close()
+                    self.closed_pages += 1
+                except Exception:
+                    pass
+        print(f"[GUARD] Closed leaked pages ({self.closed_pages} so far)")
+
+    def metrics(self) -> dict:
+        return {**self.last, "limits": self.limits}
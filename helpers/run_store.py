@@ -0,0 +1,551 @@
+"""
+Run store: an SQLite index (screenshots/runs.db) over every task run, plus
+content-addressed screenshot blobs (screenshots/.blobs/<sha[:2]>/<sha>.png)
+hard-linked into the human-readable run folders. Also holds the warm-start
+cache (first action per app and task template, see helpers/warm_start.py)
+and the deep-link index (entity -> URL, see helpers/deep_links.py).
+
+    python -m helpers.run_store runs --app notion --since 7d
+    python -m helpers.run_store slowest --app notion --since 7d
+    python -m helpers.run_store failed-locators --app linear
+    python -m helpers.run_store summary
+    python -m helpers.run_store import        # index runs written before the store existed
+    python -m helpers.run_store prune --days 14 --max-mb 2048
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+RUNS_ROOT = Path("screenshots")
+DB_FILE = "runs.db"
+BLOBS_DIR = ".blobs"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    app TEXT NOT NULL,
+    goal TEXT,
+    folder TEXT NOT NULL UNIQUE,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    success INTEGER,
+    steps_taken INTEGER,
+    error TEXT,
+    failure_step INTEGER,
+    failure_label TEXT,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS steps (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    step INTEGER NOT NULL,
+    type TEXT,
+    label TEXT,
+    status TEXT,
+    events TEXT,
+    PRIMARY KEY (run_id, step)
+);
+CREATE TABLE IF NOT EXISTS actions (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    step INTEGER NOT NULL,
+    type TEXT,
+    locator TEXT,
+    locator_key TEXT,
+    text TEXT,
+    PRIMARY KEY (run_id, step)
+);
+CREATE TABLE IF NOT EXISTS timings (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    step INTEGER NOT NULL,
+    phase TEXT NOT NULL,
+    ms INTEGER NOT NULL,
+    PRIMARY KEY (run_id, step, phase)
+);
+CREATE TABLE IF NOT EXISTS artifacts (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    path TEXT NOT NULL,
+    sha256 TEXT,
+    bytes INTEGER,
+    PRIMARY KEY (run_id, seq, kind)
+);
+CREATE TABLE IF NOT EXISTS warm_starts (
+    app TEXT NOT NULL,
+    template TEXT NOT NULL,
+    landing TEXT NOT NULL,
+    action TEXT NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (app, template)
+);
+CREATE TABLE IF NOT EXISTS entity_urls (
+    app TEXT NOT NULL,
+    entity TEXT NOT NULL,
+    url TEXT NOT NULL,
+    visits INTEGER NOT NULL DEFAULT 1,
+    last_seen REAL NOT NULL,
+    PRIMARY KEY (app, entity)
+);
+CREATE INDEX IF NOT EXISTS runs_app_started ON runs(app, started_at);
+CREATE INDEX IF NOT EXISTS actions_locator ON actions(locator_key);
+CREATE INDEX IF NOT EXISTS timings_phase_ms ON timings(phase, ms);
+CREATE INDEX IF NOT EXISTS artifacts_sha ON artifacts(sha256);
+"""
+
+# Step fields stored as timing rows (trace key -> phase)
+TIMING_FIELDS = {"decide_ms": "decide", "duration_ms": "action", "settle_ms": "settle"}
+
+
+def locator_key(step_type: str, locator: dict | None) -> str | None:
+    """Human-readable locator identity used for grouping, e.g. 'click [New issue]'."""
+    loc = locator or {}
+    name = loc.get("name") or loc.get("aria-label") or loc.get("text") or loc.get("placeholder")
+    return f"{step_type} [{name}]" if name else None
+
+
+def parse_since(value: str | None) -> float | None:
+    """'7d', '12h', '30m' -> epoch seconds; None passes through."""
+    if not value:
+        return None
+    m = re.fullmatch(r"(\d+)([dhm])", value.strip())
+    if not m:
+        raise ValueError(f"Bad --since value {value!r} (use e.g. 7d, 12h, 30m)")
+    seconds = int(m.group(1)) * {"d": 86400, "h": 3600, "m": 60}[m.group(2)]
+    return time.time() - seconds
+
+
+class RunStore:
+    """
+    Index of runs, steps, actions, timings and artifacts. Safe to share
+    between worker threads (one connection, serialized by a lock).
+    """
+
+    def __init__(self, root: Path = RUNS_ROOT):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.blobs = self.root / BLOBS_DIR
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.root / DB_FILE), timeout=30, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA foreign_keys=ON")
+            self._db.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _query(self, sql: str, params=()) -> list:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    # --- writing -----------------------------------------------------------
+
+    def new_run(self, app: str, slug: str, goal: str) -> tuple[int, Path]:
+        """Register a run and create its folder screenshots/<app>/<slug>[_n]; returns (run_id, folder)."""
+        app_folder = self.root / app
+        app_folder.mkdir(parents=True, exist_ok=True)
+        prefix = f"{app}/{slug}"
+        # Next free suffix from the index instead of probing the filesystem
+        rows = self._query("SELECT folder FROM runs WHERE folder = ? OR folder GLOB ?", (prefix, f"{prefix}_[0-9]*"))
+        n = 0
+        for row in rows:
+            m = re.fullmatch(re.escape(prefix) + r"(?:_(\d+))?", row["folder"])
+            if m:
+                n = max(n, int(m.group(1) or 0) + 1)
+        while True:
+            name = slug if n == 0 else f"{slug}_{n}"
+            folder = app_folder / name
+            try:
+                # Folders from before the index existed are still respected
+                folder.mkdir()
+                break
+            except FileExistsError:
+                n += 1
+        with self._lock, self._db:
+            cur = self._db.execute(
+                "INSERT INTO runs (app, goal, folder, started_at) VALUES (?, ?, ?, ?)",
+                (app, goal, f"{app}/{name}", time.time()),
+            )
+        return cur.lastrowid, folder
+
+    def put_blob(self, data: bytes, suffix: str = ".png") -> tuple[str, Path]:
+        """Store bytes content-addressed (written once); returns (sha256, blob path)."""
+        sha = hashlib.sha256(data).hexdigest()
+        path = self.blobs / sha[:2] / f"{sha}{suffix}"
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        return sha, path
+
+    def add_screenshot(self, run_id: int | None, seq: int, dest: Path, data: bytes) -> str:
+        """Store a screenshot blob and hard-link it to `dest` in the run folder (copy if links fail)."""
+        sha, blob = self.put_blob(data, Path(dest).suffix or ".png")
+        dest = Path(dest)
+        try:
+            if dest.exists():
+                dest.unlink()
+            os.link(blob, dest)
+        except OSError:
+            dest.write_bytes(data)
+        if run_id is not None:
+            self.add_artifact(run_id, seq, "screenshot", dest, sha, len(data))
+        return sha
+
+    def add_artifact(self, run_id: int, seq: int, kind: str, path: Path, sha256: str | None = None, size: int | None = None):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO artifacts (run_id, seq, kind, path, sha256, bytes) VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, seq, kind, self._rel(path), sha256, size),
+            )
+
+    def finish_run(self, run_id: int, trace: dict):
+        """Write the run's outcome and steps (same shape as trace.json)."""
+        steps = trace.get("steps", [])
+        extra = {k: v for k, v in trace.items() if k not in (
+            "app", "goal", "success", "steps_taken", "steps", "error", "failure_step", "failure_label")}
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE runs SET finished_at = ?, success = ?, steps_taken = ?, error = ?, failure_step = ?, "
+                "failure_label = ?, extra = ? WHERE id = ?",
+                (time.time(), int(bool(trace.get("success"))), trace.get("steps_taken", len(steps)), trace.get("error") or "",
+                 trace.get("failure_step"), trace.get("failure_label"), json.dumps(extra, ensure_ascii=False), run_id),
+            )
+            self._insert_steps(run_id, steps)
+
+    def _insert_steps(self, run_id: int, steps: list):
+        self._db.execute("DELETE FROM steps WHERE run_id = ?", (run_id,))
+        self._db.execute("DELETE FROM actions WHERE run_id = ?", (run_id,))
+        self._db.execute("DELETE FROM timings WHERE run_id = ?", (run_id,))
+        for st in steps:
+            step = st.get("step")
+            self._db.execute(
+                "INSERT OR REPLACE INTO steps (run_id, step, type, label, status, events) VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, step, st.get("type"), st.get("label"), st.get("status"),
+                 json.dumps(st["events"], ensure_ascii=False) if st.get("events") else None),
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO actions (run_id, step, type, locator, locator_key, text) VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, step, st.get("type"), json.dumps(st.get("locator") or {}, ensure_ascii=False),
+                 locator_key(st.get("type"), st.get("locator")), st.get("text") or ""),
+            )
+            for field, phase in TIMING_FIELDS.items():
+                if st.get(field) is not None:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO timings (run_id, step, phase, ms) VALUES (?, ?, ?, ?)",
+                        (run_id, step, phase, int(st[field])),
+                    )
+
+    def save_warm_start(self, app: str, template: str, landing: dict, action: dict):
+        """Remember the landing snapshot and first action for (app, task template); keeps the hit count if unchanged."""
+        action_json = json.dumps(action, ensure_ascii=False, sort_keys=True)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO warm_starts (app, template, landing, action, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (app, template) DO UPDATE SET landing = excluded.landing, updated_at = excluded.updated_at, "
+                "hits = CASE WHEN action = excluded.action THEN hits ELSE 0 END, action = excluded.action",
+                (app, template, json.dumps(landing, ensure_ascii=False), action_json, time.time()),
+            )
+
+    def warm_start_hit(self, app: str, template: str):
+        with self._lock, self._db:
+            self._db.execute("UPDATE warm_starts SET hits = hits + 1 WHERE app = ? AND template = ?", (app, template))
+
+    def drop_warm_start(self, app: str, template: str):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM warm_starts WHERE app = ? AND template = ?", (app, template))
+
+    def save_entity_url(self, app: str, entity: str, url: str):
+        """Record that `entity` (project name, issue id, page title) lives at `url`."""
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO entity_urls (app, entity, url, last_seen) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (app, entity) DO UPDATE SET last_seen = excluded.last_seen, "
+                "visits = CASE WHEN url = excluded.url THEN visits + 1 ELSE 1 END, url = excluded.url",
+                (app, entity, url, time.time()),
+            )
+
+    def drop_entity_url(self, app: str, entity: str):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM entity_urls WHERE app = ? AND entity = ?", (app, entity))
+
+    def disk_usage_mb(self) -> float:
+        """Bytes under the runs root in MB; hard-linked screenshots count once."""
+        seen, total = set(), 0
+        for dirpath, _, files in os.walk(self.root):
+            for name in files:
+                try:
+                    st = os.stat(os.path.join(dirpath, name))
+                except OSError:
+                    continue
+                if (st.st_dev, st.st_ino) not in seen:
+                    seen.add((st.st_dev, st.st_ino))
+                    total += st.st_size
+        return round(total / 1024 / 1024, 1)
+
+    def prune(self, max_age_days: float | None = None, max_mb: float | None = None) -> dict:
+        """
+        Delete finished runs older than `max_age_days`, then the oldest ones
+        until the runs root is back under 90% of `max_mb`: index rows, run
+        folders, and blobs no longer referenced. Returns {"runs", "freed_mb"}.
+        """
+        doomed = []
+        if max_age_days is not None:
+            cutoff = time.time() - max_age_days * 86400
+            doomed = [r["id"] for r in self._query(
+                "SELECT id FROM runs WHERE finished_at IS NOT NULL AND started_at < ? ORDER BY started_at", (cutoff,))]
+        usage_mb = self.disk_usage_mb() if max_mb is not None else 0.0
+        freed = sum(self._run_bytes(run_id) for run_id in doomed)
+        if max_mb is not None and usage_mb - freed / 1048576 > max_mb:
+            target = max_mb * 0.9
+            for row in self._query("SELECT id FROM runs WHERE finished_at IS NOT NULL ORDER BY started_at"):
+                if usage_mb - freed / 1048576 <= target:
+                    break
+                if row["id"] not in doomed:
+                    doomed.append(row["id"])
+                    freed += self._run_bytes(row["id"])
+        if not doomed:
+            return {"runs": 0, "freed_mb": 0.0}
+
+        for run_id in doomed:
+            folder = self.folder(run_id)
+            with self._lock, self._db:
+                # steps/actions/timings/artifacts go with it (ON DELETE CASCADE)
+                self._db.execute("DELETE FROM runs WHERE id = ?", (run_id,))
+            if folder is not None:
+                shutil.rmtree(folder, ignore_errors=True)
+        live = {r["sha256"] for r in self._query("SELECT DISTINCT sha256 FROM artifacts WHERE sha256 IS NOT NULL")}
+        for blob in self.blobs.glob("*/*"):
+            if blob.stem not in live and not blob.name.endswith(".tmp"):
+                try:
+                    blob.unlink()
+                except OSError:
+                    pass
+        print(f"[INFO] Pruned {len(doomed)} runs (~{freed / 1048576:.1f} MB)")
+        return {"runs": len(doomed), "freed_mb": round(freed / 1048576, 1)}
+
+    def _run_bytes(self, run_id: int) -> int:
+        """Approximate bytes freed by deleting a run: its artifacts whose blobs no other run shares."""
+        rows = self._query(
+            "SELECT a.bytes FROM artifacts a WHERE a.run_id = ? AND (a.sha256 IS NULL OR NOT EXISTS "
+            "(SELECT 1 FROM artifacts b WHERE b.sha256 = a.sha256 AND b.run_id != a.run_id))",
+            (run_id,),
+        )
+        return sum(r["bytes"] or 0 for r in rows)
+
+    def import_folders(self) -> int:
+        """Index run folders that have a trace.json but no row yet; returns how many were added."""
+        known = {r["folder"] for r in self._query("SELECT folder FROM runs")}
+        added = 0
+        for path in sorted(self.root.glob("*/*/trace.json")):
+            folder = self._rel(path.parent)
+            if folder in known:
+                continue
+            try:
+                trace = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError):
+                continue
+            mtime = path.stat().st_mtime
+            with self._lock, self._db:
+                cur = self._db.execute(
+                    "INSERT INTO runs (app, goal, folder, started_at) VALUES (?, ?, ?, ?)",
+                    (trace.get("app") or path.parent.parent.name, trace.get("goal"), folder, mtime),
+                )
+            self.finish_run(cur.lastrowid, trace)
+            with self._lock, self._db:
+                self._db.execute("UPDATE runs SET finished_at = ? WHERE id = ?", (mtime, cur.lastrowid))
+            added += 1
+        return added
+
+    def _rel(self, path: Path) -> str:
+        try:
+            return Path(path).resolve().relative_to(self.root.resolve()).as_posix()
+        except ValueError:
+            return str(path)
+
+    # --- reading -----------------------------------------------------------
+
+    def folder(self, run_id: int) -> Path | None:
+        """Absolute folder of a run, or None for unknown ids."""
+        rows = self._query("SELECT folder FROM runs WHERE id = ?", (run_id,))
+        return self.root / rows[0]["folder"] if rows else None
+
+    def warm_start(self, app: str, template: str) -> dict | None:
+        """Cached {"landing", "action", "hits"} for (app, task template), or None."""
+        rows = self._query("SELECT landing, action, hits FROM warm_starts WHERE app = ? AND template = ?", (app, template))
+        if not rows:
+            return None
+        return {"landing": json.loads(rows[0]["landing"]), "action": json.loads(rows[0]["action"]), "hits": rows[0]["hits"]}
+
+    def entity_urls(self, app: str) -> dict:
+        """{entity: url} of every entity visited in `app`."""
+        return {r["entity"]: r["url"] for r in self._query("SELECT entity, url FROM entity_urls WHERE app = ?", (app,))}
+
+    def recent_traces(self, app: str, limit: int = 200) -> list:
+        """Finished runs of `app`, newest first, as trace.json-shaped dicts (for AppStats)."""
+        runs = self._query(
+            "SELECT * FROM runs WHERE app = ? AND finished_at IS NOT NULL ORDER BY started_at DESC LIMIT ?",
+            (app, limit),
+        )
+        if not runs:
+            return []
+        ids = [r["id"] for r in runs]
+        marks = ",".join("?" * len(ids))
+        steps = {}
+        for row in self._query(
+            f"SELECT s.run_id, s.step, s.type, s.label, s.status, a.locator, a.text FROM steps s "
+            f"LEFT JOIN actions a ON a.run_id = s.run_id AND a.step = s.step WHERE s.run_id IN ({marks}) "
+            f"ORDER BY s.run_id, s.step",
+            ids,
+        ):
+            steps.setdefault(row["run_id"], {})[row["step"]] = {
+                "step": row["step"], "type": row["type"], "label": row["label"], "status": row["status"],
+                "locator": json.loads(row["locator"] or "{}"), "text": row["text"] or "",
+            }
+        for row in self._query(f"SELECT run_id, step, phase, ms FROM timings WHERE run_id IN ({marks})", ids):
+            st = steps.get(row["run_id"], {}).get(row["step"])
+            if st is not None:
+                field = next(f for f, p in TIMING_FIELDS.items() if p == row["phase"])
+                st[field] = row["ms"]
+        return [{
+            "app": r["app"],
+            "goal": r["goal"],
+            "success": bool(r["success"]),
+            "steps_taken": r["steps_taken"],
+            "steps": list(steps.get(r["id"], {}).values()),
+            "settle_timeouts": json.loads(r["extra"] or "{}").get("settle_timeouts", []),
+            "error": r["error"],
+            "failure_step": r["failure_step"],
+            "failure_label": r["failure_label"],
+            "folder": r["folder"],
+        } for r in runs]
+
+    def runs(self, app: str | None = None, since: float | None = None, failed: bool = False, limit: int = 20) -> list:
+        sql = "SELECT id, app, goal, folder, started_at, success, steps_taken, error FROM runs WHERE finished_at IS NOT NULL"
+        params = []
+        if app:
+            sql += " AND app = ?"
+            params.append(app)
+        if since:
+            sql += " AND started_at >= ?"
+            params.append(since)
+        if failed:
+            sql += " AND success = 0"
+        sql += " ORDER BY started_at DESC LIMIT ?"
+        return [dict(r) for r in self._query(sql, params + [limit])]
+
+    def slowest_steps(self, app: str | None = None, since: float | None = None, phase: str | None = None, limit: int = 20) -> list:
+        """Steps with the largest total (or single-phase) time."""
+        where, params = self._filters(app, since)
+        if phase:
+            where += " AND t.phase = ?"
+            params.append(phase)
+        sql = (
+            "SELECT r.app, r.goal, r.folder, t.step, s.type, s.label, s.status, SUM(t.ms) AS ms, "
+            "group_concat(t.phase || '=' || t.ms, ' ') AS phases "
+            "FROM timings t JOIN runs r ON r.id = t.run_id "
+            "JOIN steps s ON s.run_id = t.run_id AND s.step = t.step "
+            f"WHERE 1 {where} GROUP BY t.run_id, t.step ORDER BY ms DESC LIMIT ?"
+        )
+        return [dict(r) for r in self._query(sql, params + [limit])]
+
+    def failed_locators(self, app: str | None = None, since: float | None = None, limit: int = 20) -> list:
+        where, params = self._filters(app, since)
+        sql = (
+            "SELECT r.app, a.locator_key, COUNT(*) AS failures, COUNT(DISTINCT a.run_id) AS runs "
+            "FROM actions a JOIN steps s ON s.run_id = a.run_id AND s.step = a.step "
+            "JOIN runs r ON r.id = a.run_id "
+            f"WHERE s.status != 'success' AND a.locator_key IS NOT NULL {where} "
+            "GROUP BY r.app, a.locator_key ORDER BY failures DESC LIMIT ?"
+        )
+        return [dict(r) for r in self._query(sql, params + [limit])]
+
+    def summary(self, since: float | None = None) -> list:
+        where, params = self._filters(None, since)
+        sql = (
+            "SELECT r.app, COUNT(*) AS runs, SUM(r.success) AS succeeded, "
+            "ROUND(AVG(r.steps_taken), 1) AS avg_steps, "
+            "(SELECT COUNT(DISTINCT sha256) FROM artifacts x JOIN runs y ON y.id = x.run_id WHERE y.app = r.app AND x.kind = 'screenshot') AS blobs, "
+            "(SELECT COUNT(*) FROM artifacts x JOIN runs y ON y.id = x.run_id WHERE y.app = r.app AND x.kind = 'screenshot') AS screenshots "
+            f"FROM runs r WHERE r.finished_at IS NOT NULL {where} GROUP BY r.app ORDER BY runs DESC"
+        )
+        return [dict(r) for r in self._query(sql, params)]
+
+    @staticmethod
+    def _filters(app: str | None, since: float | None) -> tuple[str, list]:
+        where, params = "", []
+        if app:
+            where += " AND r.app = ?"
+            params.append(app)
+        if since:
+            where += " AND r.started_at >= ?"
+            params.append(since)
+        return where, params
+
+
+def _print_rows(rows: list):
+    if not rows:
+        print("(no rows)")
+        return
+    cols = list(rows[0])
+    for row in rows:
+        if "started_at" in row:
+            row["started_at"] = time.strftime("%Y-%m-%d %H:%M", time.localtime(row["started_at"]))
+    widths = {c: min(60, max(len(c), *(len(str(r[c])) for r in rows))) for c in cols}
+    print("  ".join(c.ljust(widths[c]) for c in cols))
+    for row in rows:
+        print("  ".join(str(row[c] if row[c] is not None else "-")[:60].ljust(widths[c]) for c in cols))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", type=Path, default=RUNS_ROOT)
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("runs", "slowest", "failed-locators", "summary"):
+        p = sub.add_parser(name)
+        p.add_argument("--since", default=None, help="e.g. 7d, 12h, 30m")
+        if name != "summary":
+            p.add_argument("--app", default=None)
+            p.add_argument("--limit", type=int, default=20)
+        if name == "runs":
+            p.add_argument("--failed", action="store_true")
+        if name == "slowest":
+            p.add_argument("--phase", choices=sorted(set(TIMING_FIELDS.values())), default=None)
+    sub.add_parser("import")
+    p = sub.add_parser("prune")
+    p.add_argument("--days", type=float, default=None, help="delete runs older than this")
+    p.add_argument("--max-mb", type=float, default=None, help="then delete the oldest runs until the root is under this size")
+    args = parser.parse_args()
+
+    store = RunStore(args.root)
+    if args.command == "import":
+        print(f"[INFO] Indexed {store.import_folders()} run folders")
+        return
+    if args.command == "prune":
+        store.prune(args.days, args.max_mb)
+        print(f"[INFO] {store.root} now uses {store.disk_usage_mb()} MB")
+        return
+    since = parse_since(args.since)
+    if args.command == "runs":
+        rows = store.runs(args.app, since, args.failed, args.limit)
+    elif args.command == "slowest":
+        rows = store.slowest_steps(args.app, since, args.phase, args.limit)
+    elif args.command == "failed-locators":
+        rows = store.failed_locators(args.app, since, args.limit)
+    else:
+        rows = store.summary(since)
+    _print_rows(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import hashlib
+import json
+
+# Escalation ladder applied each time a new stall is detected
+RECOVERY_STRATEGIES = ["reprompt", "scroll", "reload", "abort"]
+
+
+class StallDetector:
+    """
+    Tracks the DOM fingerprint after every step together with the action that
+    produced it, and reports when the loop stops making progress:
+      - the same action signature keeps failing, or
+      - the page fingerprint stays unchanged for `max_unchanged` steps.
+    Each detection escalates through RECOVERY_STRATEGIES.
+    """
+
+    def __init__(self, max_unchanged: int = 3, max_repeats: int = 2):
+        self.max_unchanged = max_unchanged
+        self.max_repeats = max_repeats
+        self.history = []           # [(fingerprint_before, fingerprint_after, signature, status)]
+        self.failed = set()         # {(fingerprint, signature)}
+        self.level = 0
+        self.unchanged = 0
+
+    @staticmethod
+    def fingerprint(raw: str) -> str:
+        return hashlib.sha1((raw or "").encode("utf-8", "ignore")).hexdigest()
+
+    @staticmethod
+    def signature(action: dict) -> str:
+        locator = action.get("locator") or {}
+        key = {
+            "type": action.get("type"),
+            "locator": {k: v for k, v in sorted(locator.items()) if v},
+            "value": action.get("value") or "",
+            "key": action.get("key") or "",
+            "url": action.get("url") or "",
+        }
+        return json.dumps(key, sort_keys=True, ensure_ascii=False)
+
+    def is_known_failure(self, fingerprint: str, action: dict) -> bool:
+        """True if this exact action already failed on this exact page state."""
+        return (fingerprint, self.signature(action)) in self.failed
+
+    def record(self, fp_before: str, fp_after: str, action: dict, status: str) -> tuple[str | None, str]:
+        """
+        Record one executed step. Returns (strategy, reason) when a stall is
+        detected, otherwise (None, "").
+        """
+        sig = self.signature(action)
+        self.history.append((fp_before, fp_after, sig, status))
+        if status != "success" or fp_after == fp_before:
+            # Actions with no visible effect count as failures for this page state
+            self.failed.add((fp_before, sig))
+
+        progressed = fp_after != fp_before and status == "success"
+        self.unchanged = 0 if progressed else self.unchanged + 1
+        if progressed:
+            self.level = 0
+            return None, ""
+
+        repeats = sum(1 for before, after, s, st in self.history if s == sig and (st != "success" or before == after))
+        if repeats >= self.max_repeats:
+            reason = f"action {action.get('type')} on {action.get('locator') or {}} failed or had no effect {repeats} times"
+        elif self.unchanged >= self.max_unchanged:
+            reason = f"page unchanged for {self.unchanged} steps"
+        else:
+            return None, ""
+
+        strategy = RECOVERY_STRATEGIES[min(self.level, len(RECOVERY_STRATEGIES) - 1)]
+        self.level += 1
+        self.unchanged = 0
+        return strategy, reason
+
+    def diagnostic(self, last_n: int = 5) -> str:
+        """Short human-readable summary of the last steps for the abort error."""
+        lines = []
+        for i, (before, after, sig, status) in enumerate(self.history[-last_n:], 1):
+            changed = "changed" if before != after else "unchanged"
+            lines.append(f"{i}) {status} {sig} -> page {changed}")
+        return "; ".join(lines)
@@ -0,0 +1,104 @@
+from helpers.completion_rules import quick_completion_verdict
+
+MAX_TABS = 3
+TAB_TIMEOUT_MS = 8000
+TAB_SETTLE_MS = 1500
+COMPLETION_BONUS = 1.0
+
+# href of the visible link best matching each candidate name (exact text first,
+# then prefix/substring); one evaluate for all names
+HREF_SCRIPT = """
+(names) => {
+    const norm = s => (s || '').toLowerCase().replace(/\\s+/g, ' ').trim();
+    const links = [];
+    for (const el of document.querySelectorAll('a[href], [role=link][href], [role=link] a[href]')) {
+        if (!el.getClientRects().length) continue;
+        const href = el.href;
+        if (!href || href.startsWith('javascript:') || href.split('#')[0] === location.href.split('#')[0]) continue;
+        links.push({label: norm(el.getAttribute('aria-label')) || norm(el.innerText), href});
+    }
+    return names.map(name => {
+        const n = norm(name);
+        const hit = links.find(l => l.label === n) || links.find(l => l.label.startsWith(n)) || links.find(l => l.label.includes(n));
+        return hit ? hit.href : null;
+    });
+}
+"""
+
+# Relevance of a page to the goal query: weighted hits of goal terms/phrases in
+# the title (x3), headings (x2) and the first 5000 characters of text,
+# normalised by the query size; plus visible alerts for the completion rules.
+SCORE_SCRIPT = """
+({terms, phrases}) => {
+    const title = (document.title || '').toLowerCase();
+    const heads = Array.from(document.querySelectorAll('h1, h2, [role=heading]')).slice(0, 10).map(h => h.innerText).join(' ').toLowerCase();
+    const body = document.body ? document.body.innerText.slice(0, 5000).toLowerCase() : '';
+    let score = 0, total = 0;
+    for (const [term, w] of Object.entries(terms)) {
+        total += w;
+        score += w * ((title.includes(term) ? 3 : 0) + (heads.includes(term) ? 2 : 0) + (body.includes(term) ? 1 : 0)) / 6;
+    }
+    for (const p of phrases) {
+        total += 3;
+        if (title.includes(p) || heads.includes(p)) score += 3; else if (body.includes(p)) score += 1.5;
+    }
+    const alerts = Array.from(document.querySelectorAll('[role=alert], [role=status], [aria-live=assertive], [aria-live=polite]'))
+        .map(el => ({text: (el.innerText || '').trim().slice(0, 200)})).filter(a => a.text).slice(0, 5);
+    return {score: total ? score / total : 0, title: document.title, alerts};
+}
+"""
+
+
+def candidate_links(page, names: list) -> list:
+    """[(name, href)] for candidate link names that resolve to distinct URLs."""
+    hrefs = page.evaluate(HREF_SCRIPT, names)
+    seen, links = set(), []
+    for name, href in zip(names, hrefs):
+        if href and href not in seen:
+            seen.add(href)
+            links.append((name, href))
+    return links
+
+
+def explore(page, goal: str, app_name: str, names: list, query: dict, max_tabs: int = MAX_TABS, timeout_ms: int = TAB_TIMEOUT_MS) -> list:
+    """
+    Open the candidate links in background tabs of the page's context (loads run
+    in parallel), score each with the goal-relevance and quick completion
+    heuristics, close them, and return [{"name", "url", "score", ...}] best first.
+    Empty when fewer than two candidates resolve to links.
+    """
+    links = candidate_links(page, names)[:max_tabs]
+    if len(links) < 2:
+        return []
+    tabs = []
+    results = []
+    try:
+        for name, href in links:
+            tab = page.context.new_page()
+            tabs.append((name, href, tab))
+            try:
+                # Returns once the response starts; the tabs keep loading side by side
+                tab.goto(href, wait_until="commit", timeout=timeout_ms)
+            except Exception as e:
+                print(f"[EXPLORE] {name}: {e}")
+        for name, href, tab in tabs:
+            try:
+                tab.wait_for_load_state("domcontentloaded", timeout=timeout_ms)
+                try:
+                    tab.wait_for_load_state("networkidle", timeout=TAB_SETTLE_MS)
+                except Exception:
+                    pass
+                page_state = tab.evaluate(SCORE_SCRIPT, {"terms": query["terms"], "phrases": query["phrases"]})
+            except Exception as e:
+                results.append({"name": name, "url": href, "score": -1.0, "reason": f"did not load ({type(e).__name__})"})
+                continue
+            verdict, reason = quick_completion_verdict(goal, app_name, page_state["alerts"], url_before=page.url, url_after=tab.url)
+            score = page_state["score"] + (COMPLETION_BONUS if verdict else -COMPLETION_BONUS if verdict is False else 0)
+            results.append({"name": name, "url": tab.url, "title": page_state["title"], "score": round(score, 3), "reason": reason})
+    finally:
+        for _, _, tab in tabs:
+            try:
+                tab.close()
+            except Exception:
+                pass
+    return sorted(results, key=lambda r: r["score"], reverse=True)
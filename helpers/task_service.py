@@ -0,0 +1,493 @@
+import asyncio
+import heapq
+import itertools
+import json
+import threading
+import time
+import uuid
+from http import HTTPStatus
+
+
+class QueueFull(Exception):
+    """Raised when a task is rejected because the queue is at capacity."""
+
+
+class Job:
+    """One submitted task plus the progress events streamed back to clients."""
+
+    def __init__(self, task: str, app: str, url: str, priority: int = 0):
+        self.id = uuid.uuid4().hex[:12]
+        self.task = task
+        self.app = app
+        self.url = url
+        self.priority = priority
+        self.status = "queued"
+        self.enqueued_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.worker = None
+        self.result = None
+        self.events = []
+        self._subscribers = []          # (loop, asyncio.Queue)
+        self._lock = threading.Lock()
+
+    def publish(self, event: dict):
+        """Record a progress event and push it to every SSE subscriber (thread-safe)."""
+        event = {"ts": time.time(), **event}
+        with self._lock:
+            self.events.append(event)
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    def subscribe(self, loop) -> tuple[asyncio.Queue, list]:
+        queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers.append((loop, queue))
+            backlog = list(self.events)
+        return queue, backlog
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers = [(l, q) for l, q in self._subscribers if q is not queue]
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "task": self.task,
+            "app": self.app,
+            "url": self.url,
+            "priority": self.priority,
+            "status": self.status,
+            "enqueued_at": self.enqueued_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "queue_wait_s": self.queue_wait,
+            "exec_s": self.exec_time,
+            "worker": self.worker,
+            "result": self.result,
+        }
+
+    @property
+    def queue_wait(self) -> float | None:
+        return None if self.started_at is None else round(self.started_at - self.enqueued_at, 3)
+
+    @property
+    def exec_time(self) -> float | None:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return round(self.finished_at - self.started_at, 3)
+
+
+class TaskQueue:
+    """
+    Per-app priority queues with a global and per-app capacity, and a
+    per-app limit on how many jobs may run at once. Thread-safe.
+
+    Scheduling is app-affine: jobs go to a worker that already holds a warm
+    browser context for the app, and unowned apps go to the idle worker
+    holding the fewest warm contexts, so context launches scale with the
+    number of apps rather than the number of tasks. With `exclusive`
+    (persistent profiles, which Chrome locks) an app's jobs only ever go to
+    the worker holding it; otherwise (cloned profiles) other workers may
+    take them when no idle warm worker is available.
+    """
+
+    def __init__(self, max_queued: int = 50, max_per_app: int = 20, app_concurrency: int = 1, exclusive: bool = True):
+        self.max_queued = max_queued
+        self.max_per_app = max_per_app
+        self.app_concurrency = app_concurrency
+        self.exclusive = exclusive
+        self.queues = {}            # app -> heap of (-priority, seq, job)
+        self.running = {}           # app -> running count
+        self.warm = {}              # worker id -> set of apps with a warm context
+        self.waiting = set()        # worker ids blocked in get()
+        self.paused = {}            # app -> reason (session expired, waiting for re-auth)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def __len__(self):
+        with self._cond:
+            return sum(len(q) for q in self.queues.values())
+
+    def put(self, job: Job, force: bool = False):
+        """Queue a job; `force` skips the capacity checks (re-queued jobs)."""
+        with self._cond:
+            total = sum(len(q) for q in self.queues.values())
+            app_queue = self.queues.setdefault(job.app, [])
+            if not force and total >= self.max_queued:
+                raise QueueFull(f"queue full ({total} tasks waiting)")
+            if not force and len(app_queue) >= self.max_per_app:
+                raise QueueFull(f"queue for {job.app} full ({len(app_queue)} tasks waiting)")
+            heapq.heappush(app_queue, (-job.priority, next(self._seq), job))
+            self._cond.notify_all()
+
+    def holders(self, app: str) -> list:
+        return [w for w, apps in self.warm.items() if app in apps]
+
+    def _pick(self, worker):
+        """Best job for `worker`: its own warm apps first, then apps nobody (idle) holds warm."""
+        own = self.warm.setdefault(worker, set())
+        least_loaded = len(own) <= min((len(self.warm.get(w, ())) for w in self.waiting), default=0)
+        best, best_key = None, None
+        for app, heap in self.queues.items():
+            if not heap or app in self.paused or self.running.get(app, 0) >= self.app_concurrency:
+                continue
+            if app not in own:
+                holders = self.holders(app)
+                if self.exclusive and holders:
+                    continue
+                if not self.exclusive and any(w in self.waiting for w in holders):
+                    continue
+                if not least_loaded:
+                    continue
+            neg_priority, seq, _ = heap[0]
+            key = (neg_priority, 0 if app in own else 1, seq)
+            if best_key is None or key < best_key:
+                best, best_key = app, key
+        if best is None:
+            return None
+        self.running[best] = self.running.get(best, 0) + 1
+        own.add(best)
+        return heapq.heappop(self.queues[best])[2]
+
+    def get(self, worker=0, warm_apps: set | None = None, timeout: float | None = None) -> Job | None:
+        """Block until a job runnable by `worker` is available; None on timeout or close."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self.warm[worker] = set(warm_apps or ())
+            self.waiting.add(worker)
+            try:
+                while not self._closed:
+                    job = self._pick(worker)
+                    if job is not None:
+                        return job
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return None
+                    self._cond.wait(remaining)
+                return None
+            finally:
+                self.waiting.discard(worker)
+                self._cond.notify_all()
+
+    def task_done(self, job: Job):
+        with self._cond:
+            self.running[job.app] = max(0, self.running.get(job.app, 0) - 1)
+            self._cond.notify_all()
+
+    def pause(self, app: str, reason: str):
+        """Stop dispatching an app's jobs (other apps keep running)."""
+        with self._cond:
+            self.paused[app] = reason
+
+    def resume(self, app: str) -> bool:
+        with self._cond:
+            was_paused = self.paused.pop(app, None) is not None
+            self._cond.notify_all()
+            return was_paused
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def depths(self) -> dict:
+        with self._cond:
+            return {
+                app: {
+                    "queued": len(q),
+                    "running": self.running.get(app, 0),
+                    "warm_in": self.holders(app),
+                    "paused": self.paused.get(app),
+                }
+                for app, q in self.queues.items()
+            }
+
+
+class TaskService:
+    """
+    Local HTTP task service (asyncio, stdlib only).
+
+      POST /tasks              {"task": "...", "priority": 0, "app": opt, "url": opt} -> 202 {"id": ...}
+                               429 + Retry-After when the queue is full
+      GET  /tasks/<id>         job status and result
+      GET  /tasks/<id>/events  Server-Sent Events stream of step progress
+      GET  /stats              queue depths, warm workers per app, queue wait vs execution time, LLM gateway metrics
+      GET  /metrics            per-worker resources (browser/process RSS, pages, contexts, recycles, pruned runs), kept jobs
+      POST /apps/<app>/resume  resume an app paused by an expired session (after re-auth)
+
+    Workers pull jobs with `next_job()` and report back with `finish()`.
+    """
+
+    def __init__(
+            self,
+            host: str = "127.0.0.1",
+            port: int = 8765,
+            max_queued: int = 50,
+            max_per_app: int = 20,
+            app_concurrency: int = 1,
+            exclusive_profiles: bool = True,
+            detect=None,
+            max_jobs: int = 1000,
+        ):
+        self.host = host
+        self.port = port
+        self.queue = TaskQueue(max_queued, max_per_app, app_concurrency, exclusive=exclusive_profiles)
+        self.jobs = {}
+        self.max_jobs = max_jobs        # finished jobs (and their events) kept for GET /tasks/<id>
+        self.resources = {}             # worker id -> latest ResourceGuard metrics
+        self.timings = {}               # app -> summed queue wait / execution time of finished jobs
+        self._timings_lock = threading.Lock()
+        if detect is None:
+            from helpers.webapp_info import detect_webapp_and_url as detect
+        self.detect = detect
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    # ------------------------------ worker API ------------------------------
+
+    def next_job(self, worker=0, warm_apps: set | None = None, timeout: float | None = None) -> Job | None:
+        """Next job for `worker`, preferring apps in `warm_apps` (its warm browser contexts)."""
+        job = self.queue.get(worker, warm_apps, timeout)
+        if job is not None:
+            job.status = "running"
+            job.worker = worker
+            job.started_at = time.time()
+            job.publish({"type": "started", "worker": worker, "queue_wait_s": job.queue_wait})
+        return job
+
+    def finish(self, job: Job, result: dict | None):
+        result = result or {}
+        if result.get("session_expired"):
+            # Pause only this app until someone re-authenticates, and keep the job
+            self.queue.pause(job.app, result.get("error") or "session expired")
+            self.queue.task_done(job)
+            job.status = "queued"
+            job.started_at = None
+            self.queue.put(job, force=True)
+            job.publish({"type": "paused", "app": job.app, "reason": result.get("error")})
+            print(f"[WARNING] Paused {job.app} queue: {result.get('error')}")
+            return
+        job.result = result
+        job.status = "done" if job.result.get("success") else "failed"
+        job.finished_at = time.time()
+        self.queue.task_done(job)
+        with self._timings_lock:
+            t = self.timings.setdefault(job.app, {"count": 0, "queue_wait_s": 0.0, "exec_s": 0.0})
+            t["count"] += 1
+            t["queue_wait_s"] += job.queue_wait
+            t["exec_s"] += job.exec_time
+        job.publish({"type": "finished", "status": job.status, "result": job.result})
+        self._prune_jobs()
+
+    def _prune_jobs(self):
+        """Forget the oldest finished jobs past `max_jobs` so a long-running service stays bounded."""
+        excess = len(self.jobs) - self.max_jobs
+        if excess <= 0:
+            return
+        for job_id, job in list(self.jobs.items()):
+            if excess <= 0:
+                break
+            if job.finished:
+                self.jobs.pop(job_id, None)
+                excess -= 1
+
+    def report_resources(self, worker, metrics: dict):
+        """Latest resource metrics of a worker (see helpers/resource_guard.py)."""
+        self.resources[worker] = metrics
+
+    # ----------------------------- server control ---------------------------
+
+    def start(self):
+        """Run the HTTP server on a background thread; returns once it is listening."""
+        self._thread = threading.Thread(target=self._run, name="task-service", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        print(f"[INFO] Task service listening on http://{self.host}:{self.port}")
+
+    def stop(self):
+        self.queue.close()
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+        # Port 0 picks a free port; report the real one
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            self._loop.close()
+
+    # ------------------------------ HTTP layer ------------------------------
+
+    async def _handle(self, reader, writer):
+        try:
+            method, path, body = await self._read_request(reader)
+            await self._route(method, path, body, writer)
+        except (ValueError, asyncio.IncompleteReadError):
+            await self._send(writer, HTTPStatus.BAD_REQUEST, {"error": "malformed request"})
+        except ConnectionError:
+            pass
+        except Exception as e:
+            print(f"[ERROR] Request handler failed: {e}")
+            try:
+                await self._send(writer, HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "internal error"})
+            except Exception:
+                pass
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    async def _read_request(self, reader) -> tuple[str, str, bytes]:
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        method, path, _ = request_line.split(" ", 2)
+        length = 0
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value.strip())
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), path.split("?", 1)[0].rstrip("/") or "/", body
+
+    async def _send(self, writer, status: HTTPStatus, payload: dict, headers: dict | None = None):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = [f"HTTP/1.1 {status.value} {status.phrase}", "Content-Type: application/json",
+                f"Content-Length: {len(data)}", "Connection: close"]
+        head += [f"{k}: {v}" for k, v in (headers or {}).items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + data)
+        await writer.drain()
+
+    async def _route(self, method: str, path: str, body: bytes, writer):
+        parts = path.strip("/").split("/")
+        if method == "POST" and parts == ["tasks"]:
+            return await self._submit(body, writer)
+        if method == "POST" and len(parts) == 3 and parts[0] == "apps" and parts[2] == "resume":
+            return await self._resume(parts[1], writer)
+        if method == "GET" and parts == ["stats"]:
+            return await self._send(writer, HTTPStatus.OK, self.stats())
+        if method == "GET" and parts == ["metrics"]:
+            return await self._send(writer, HTTPStatus.OK, self.metrics())
+        if method == "GET" and len(parts) in (2, 3) and parts[0] == "tasks":
+            job = self.jobs.get(parts[1])
+            if job is None:
+                return await self._send(writer, HTTPStatus.NOT_FOUND, {"error": "unknown task"})
+            if len(parts) == 2:
+                return await self._send(writer, HTTPStatus.OK, job.to_dict())
+            if parts[2] == "events":
+                return await self._stream(job, writer)
+        await self._send(writer, HTTPStatus.NOT_FOUND, {"error": f"no route for {method} {path}"})
+
+    async def _submit(self, body: bytes, writer):
+        try:
+            payload = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            return await self._send(writer, HTTPStatus.BAD_REQUEST, {"error": "body must be JSON"})
+        if not isinstance(payload, dict):
+            return await self._send(writer, HTTPStatus.BAD_REQUEST, {"error": "body must be a JSON object"})
+        task = payload.get("task")
+        if not isinstance(task, str) or not task.strip():
+            return await self._send(writer, HTTPStatus.BAD_REQUEST, {"error": "missing 'task'"})
+        task = task.strip()
+
+        app, url = payload.get("app"), payload.get("url")
+        if any(v is not None and not isinstance(v, str) for v in (app, url)):
+            return await self._send(writer, HTTPStatus.BAD_REQUEST, {"error": "'app' and 'url' must be strings"})
+        if not app or not url:
+            # App detection is a blocking LLM call, keep it off the event loop
+            try:
+                info = await asyncio.get_running_loop().run_in_executor(None, self.detect, task)
+            except Exception as e:
+                print(f"[WARNING] App detection failed: {e}")
+                return await self._send(writer, HTTPStatus.SERVICE_UNAVAILABLE, {"error": f"app detection failed: {e}"}, {"Retry-After": "30"})
+            info = info if isinstance(info, dict) else {}
+            app, url = app or info.get("app"), url or info.get("url")
+        if not isinstance(app, str) or not isinstance(url, str) or not app.strip() or not url.strip():
+            return await self._send(writer, HTTPStatus.BAD_REQUEST, {"error": "could not determine target web app"})
+
+        try:
+            priority = int(payload.get("priority", 0))
+        except (TypeError, ValueError):
+            return await self._send(writer, HTTPStatus.BAD_REQUEST, {"error": "'priority' must be an integer"})
+
+        job = Job(task, app.strip().lower(), url.strip(), priority)
+        # Registered first: a worker may pick the job up (and finish it) as soon as it is queued
+        self.jobs[job.id] = job
+        try:
+            self.queue.put(job)
+        except QueueFull as e:
+            self.jobs.pop(job.id, None)
+            return await self._send(writer, HTTPStatus.TOO_MANY_REQUESTS, {"error": str(e)}, {"Retry-After": "30"})
+        job.publish({"type": "queued", "app": job.app})
+        await self._send(writer, HTTPStatus.ACCEPTED, {"id": job.id, "app": job.app, "status": job.status})
+
+    async def _resume(self, app: str, writer):
+        from helpers.login_wall import is_profile_stale
+        from helpers.browser_pool import PROFILES_ROOT
+
+        if is_profile_stale(PROFILES_ROOT / app):
+            return await self._send(writer, HTTPStatus.CONFLICT, {"error": f"{app} profile is still stale; log in with the interactive profile first"})
+        resumed = self.queue.resume(app)
+        await self._send(writer, HTTPStatus.OK, {"app": app, "resumed": resumed})
+
+    async def _stream(self, job: Job, writer):
+        head = ["HTTP/1.1 200 OK", "Content-Type: text/event-stream", "Cache-Control: no-cache", "Connection: close"]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+        queue, backlog = job.subscribe(asyncio.get_running_loop())
+        try:
+            for event in backlog:
+                writer.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+            await writer.drain()
+            if any(e.get("type") == "finished" for e in backlog):
+                return
+            while True:
+                event = await queue.get()
+                writer.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+                await writer.drain()
+                if event.get("type") == "finished":
+                    return
+        finally:
+            job.unsubscribe(queue)
+
+    def stats(self) -> dict:
+        from helpers.llm_gateway import GATEWAY
+
+        with self._timings_lock:
+            timings = {
+                app: {
+                    "count": t["count"],
+                    "avg_queue_wait_s": round(t["queue_wait_s"] / t["count"], 3),
+                    "avg_exec_s": round(t["exec_s"] / t["count"], 3),
+                }
+                for app, t in self.timings.items()
+            }
+        return {"queued": len(self.queue), "apps": self.queue.depths(), "jobs": len(self.jobs), "timings": timings, "llm": GATEWAY.metrics()}
+
+    def metrics(self) -> dict:
+        from helpers.resource_guard import process_rss_mb
+
+        jobs = list(self.jobs.values())
+        return {
+            "process_mb": process_rss_mb(),
+            "jobs": len(jobs),
+            "job_events": sum(len(j.events) for j in jobs),
+            "workers": {str(w): m for w, m in sorted(self.resources.items())},
+        }
@@ -0,0 +1,130 @@
+import re
+
+# Fills/selects/finds type the goal's values; clicks are only reused when their
+# target does not name one of them either (see cacheable)
+CACHEABLE_TYPES = ("click",)
+MIN_LABEL_OVERLAP = 0.5
+MAX_LABELS = 150
+WAIT_FOR_TARGET_MS = 3000
+
+_QUOTED = re.compile(r"([\"'“‘]).+?[\"'”’]")
+_NAMED = re.compile(r"\b(called|named|titled|saying)\s+[^,.;]+?(?=\s+(?:in|on|to|for|with|and)\b|[,.;]|$)", re.I)
+_NUMBERED = re.compile(r"\S*\d\S*")
+
+
+def task_template(goal: str, app_name: str) -> str:
+    """Goal with its values blanked out: 'Create a project called Apollo in Linear'
+    -> 'create a project called <v> in <app>'. Runs of the same kind share a template."""
+    text = _QUOTED.sub("<v>", goal)
+    text = _NAMED.sub(lambda m: f"{m.group(1)} <v>", text)
+    text = _NUMBERED.sub("<n>", text)
+    if app_name:
+        text = re.sub(rf"\b{re.escape(app_name)}\b", "<app>", text, flags=re.I)
+    return " ".join(text.lower().split()).rstrip(".!")
+
+
+def goal_values(goal: str) -> list:
+    """The values task_template blanks out (quoted, named and numbered), lowercased:
+    'Open issue ENG-42 called "Login"' -> ['login', 'eng-42']."""
+    values = [m.group(0)[1:-1] for m in _QUOTED.finditer(goal)]
+    values += [m.group(0)[len(m.group(1)):] for m in _NAMED.finditer(goal)]
+    values += _NUMBERED.findall(goal)
+    cleaned = []
+    for value in values:
+        value = " ".join(value.lower().split()).strip("\"'“”‘’.,;:!?()[]")
+        if value and value not in cleaned:
+            cleaned.append(value)
+    return cleaned
+
+
+def names_value(label: str, values) -> bool:
+    """Does a target label contain one of the goal's values (so it only fits that one task)?"""
+    return any(value in label for value in values)
+
+
+# Stable part of a landing page: URL path plus the labels of visible
+# buttons, links and tabs (navigation), not the volatile list contents' text.
+LANDING_SCRIPT = """
+(maxLabels) => {
+    const norm = s => (s || '').toLowerCase().replace(/\\s+/g, ' ').trim().slice(0, 60);
+    const labels = new Set();
+    for (const el of document.querySelectorAll("button, a[href], [role=button], [role=link], [role=tab], [role=menuitem]")) {
+        if (!el.getClientRects().length) continue;
+        const label = norm(el.getAttribute('aria-label')) || norm((el.innerText || '').split('\\n')[0]);
+        if (label) labels.add(label);
+        if (labels.size >= maxLabels) break;
+    }
+    return {path: location.pathname, labels: Array.from(labels)};
+}
+"""
+
+# True once a visible button/link with this label is on the page
+TARGET_SCRIPT = """
+(label) => {
+    const norm = s => (s || '').toLowerCase().replace(/\\s+/g, ' ').trim().slice(0, 60);
+    for (const el of document.querySelectorAll("button, a[href], [role=button], [role=link], [role=tab], [role=menuitem]")) {
+        if (!el.getClientRects().length) continue;
+        if (norm(el.getAttribute('aria-label')) === label || norm((el.innerText || '').split('\\n')[0]) === label) return true;
+    }
+    return false;
+}
+"""
+
+
+def landing_snapshot(page) -> dict:
+    try:
+        return page.evaluate(LANDING_SCRIPT, MAX_LABELS)
+    except Exception:
+        return {"path": "", "labels": []}
+
+
+def target_label(action: dict) -> str:
+    loc = action.get("locator") or {}
+    name = loc.get("name") or loc.get("aria-label") or loc.get("text") or ""
+    return " ".join(name.lower().split())[:60]
+
+
+def wait_for_target(page, action: dict, timeout_ms: int = WAIT_FOR_TARGET_MS) -> bool:
+    """Wait (event-driven) until the cached first action's target is rendered."""
+    label = target_label(action)
+    if not label:
+        return False
+    try:
+        page.wait_for_function(TARGET_SCRIPT, arg=label, timeout=timeout_ms)
+        return True
+    except Exception:
+        return False
+
+
+def validate(entry: dict, landing: dict) -> tuple[bool, str]:
+    """Is the cached first action still valid for this landing page? Returns (ok, reason)."""
+    cached = entry["landing"]
+    label = target_label(entry["action"])
+    if "values" not in cached:
+        return False, "cached before targets were checked for task values"
+    if names_value(label, cached["values"]):
+        return False, f"target [{label}] names a value of the run it was learned from"
+    if cached.get("path") != landing.get("path"):
+        return False, f"landed on {landing.get('path')!r}, cached {cached.get('path')!r}"
+    labels = set(landing.get("labels", []))
+    if label not in labels:
+        return False, f"target [{label}] not on the page"
+    before = set(cached.get("labels", []))
+    overlap = len(before & labels) / max(1, len(before | labels))
+    if overlap < MIN_LABEL_OVERLAP:
+        return False, f"landing page changed ({overlap:.0%} of labels in common)"
+    return True, f"{overlap:.0%} of labels in common"
+
+
+def cacheable(step: dict, goal: str) -> bool:
+    """A successful first step worth replaying for every goal of the same template: a click
+    on a named target that is not one of this goal's values ("ENG-42", "Apollo")."""
+    label = target_label(step)
+    return (
+        step.get("type") in CACHEABLE_TYPES
+        and step.get("status") == "success"
+        and not step.get("text")
+        and not step.get("value")
+        and bool(label)
+        and not names_value(label, goal_values(goal))
+    )
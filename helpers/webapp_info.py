@@ -1,8 +1,8 @@
 import re
 import json
-from langchain.chat_models import init_chat_model
+from helpers.llm_gateway import chat_model
 
-detector_model = init_chat_model("openai:gpt-4.1-mini")
+DETECTOR_MODEL = "openai:gpt-4.1-mini"
 
 def detect_webapp_and_url(question: str) -> dict | None:
     """
@@ -31,7 +31,7 @@ def detect_webapp_and_url(question: str) -> dict | None:
         """
     )
 
-    response = detector_model.invoke([
+    response = chat_model(DETECTOR_MODEL).invoke([
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": f"Question: {question}\nApp name:"}
     ])
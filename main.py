@@ -1,11 +1,131 @@
-from agents.agent_a import Command_AgentA, ConsoleSource
-from agents.agent_b import Navigator_AgentB
+import argparse
+import threading
+import time
+
+# Agents and helpers are imported where they are used so `--help` and the
+# first prompt don't wait on their imports (see benchmarks/import_bench.py).
+
+
+def run_worker(service, worker_id: int, args, store=None):
+    """Pull jobs from the task service until it shuts down."""
+    from agents.agent_a import Command_AgentA, APISource
+    from agents.agent_b import Navigator_AgentB
+    from helpers.browser_pool import BrowserPool
+    from helpers.resource_guard import ResourceGuard
+
+    pool = BrowserPool(
+        mode="shared" if args.shared_profiles else "persistent",
+        cdp_endpoint=args.cdp_endpoint,
+        profile=args.profile,
+    )
+    agent_b = Navigator_AgentB(name=f"Agent B#{worker_id}", interactive=False, pool=pool, store=store,
+                               artifact_mode=args.artifacts, explore_tabs=args.explore_tabs)
+    source = APISource(service, worker_id, warm_apps=agent_b.warm_apps)
+    agent_a = Command_AgentA(source, name=f"Agent A#{worker_id}")
+    guard = ResourceGuard(agent_b, resource_limits(args))
+
+    while True:
+        source.current_job = None
+        try:
+            # Fetching marks the job running and takes its app slot, so a failing
+            # normalize call must still finish the job below
+            task = agent_a.generate_task()
+            if task is None:
+                agent_b.close()
+                break
+            job = source.current_job
+            result = agent_b.handle_question(
+                task,
+                app_info={"app": job.app, "url": job.url},
+                on_event=job.publish,
+            )
+        except Exception as e:
+            job = source.current_job
+            if job is None:
+                print(f"[ERROR] Worker {worker_id} could not fetch a task: {e}")
+                time.sleep(1)
+                continue
+            result = {"success": False, "error": str(e)}
+        service.finish(job, result)
+        service.report_resources(worker_id, guard.after_task())
+
+
+def resource_limits(args) -> dict:
+    return {
+        "max_browser_mb": args.max_browser_mb,
+        "max_runs_mb": args.max_runs_mb,
+        "keep_runs_days": args.keep_runs_days,
+    }
+
+
+def serve(args):
+    from helpers.task_service import TaskService
+    from helpers.run_store import RunStore
+
+    service = TaskService(
+        host=args.host,
+        port=args.port,
+        max_queued=args.max_queued,
+        max_per_app=args.max_per_app,
+        app_concurrency=args.app_concurrency if args.shared_profiles else 1,
+        exclusive_profiles=not args.shared_profiles,
+    )
+    service.start()
+    # One run index shared by all workers
+    store = RunStore()
+    workers = [
+        threading.Thread(target=run_worker, args=(service, i + 1, args, store), name=f"worker-{i + 1}", daemon=True)
+        for i in range(args.workers)
+    ]
+    for w in workers:
+        w.start()
+    try:
+        for w in workers:
+            w.join()
+    except KeyboardInterrupt:
+        print("\n[INFO] Shutting down task service\n")
+    finally:
+        service.stop()
 
 
 def main():
+    parser = argparse.ArgumentParser(description="ScreenTrail UI agent")
+    parser.add_argument("--serve", action="store_true", help="run the local HTTP task service instead of the console prompt")
+    parser.add_argument("--profile", choices=["interactive", "production"], default=None,
+                        help="execution profile (default: interactive for the console, production for --serve)")
+    parser.add_argument("--artifacts", choices=["full", "failures"], default=None,
+                        help="full: screenshot every step; failures: keep states in memory, write diagnostics only on failure (default: from the profile)")
+    parser.add_argument("--explore-tabs", type=int, default=0,
+                        help="when the model is unsure between links, open up to N of them in parallel tabs and continue with the best (0: off)")
+    parser.add_argument("--max-browser-mb", type=float, default=1500, help="recycle browser contexts when their RSS exceeds this")
+    parser.add_argument("--max-runs-mb", type=float, default=4096, help="disk budget for screenshots/; oldest runs are pruned past it")
+    parser.add_argument("--keep-runs-days", type=float, default=30, help="prune runs older than this")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=2, help="number of Navigator workers (service mode)")
+    parser.add_argument("--max-queued", type=int, default=50, help="total queued tasks before rejecting with 429")
+    parser.add_argument("--max-per-app", type=int, default=20, help="queued tasks per app before rejecting with 429")
+    parser.add_argument("--app-concurrency", type=int, default=2, help="tasks per app running at once (with --shared-profiles)")
+    parser.add_argument("--shared-profiles", action="store_true",
+                        help="clone each app's logged-in state into lightweight contexts so one app can run in several workers")
+    parser.add_argument("--cdp-endpoint", default=None, help="attach all workers to one Chrome started with --remote-debugging-port")
+    args = parser.parse_args()
+    if args.profile is None:
+        args.profile = "production" if args.serve else "interactive"
+
+    if args.serve:
+        serve(args)
+        return
+
+    from agents.agent_a import Command_AgentA, ConsoleSource
+    from agents.agent_b import Navigator_AgentB
+    from helpers.browser_pool import BrowserPool
+    from helpers.resource_guard import ResourceGuard
+
     # Create both agents
     agent_a = Command_AgentA(ConsoleSource())
-    agent_b = Navigator_AgentB()
+    agent_b = Navigator_AgentB(pool=BrowserPool(profile=args.profile), artifact_mode=args.artifacts, explore_tabs=args.explore_tabs)
+    guard = ResourceGuard(agent_b, resource_limits(args))
 
     while True:
         task = agent_a.generate_task()
@@ -13,6 +133,8 @@ def main():
             print("[INFO] No task received, shutting down\n")
             break
         agent_b.handle_question(task)
+        guard.after_task()
+    agent_b.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()